@@ -0,0 +1,80 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Compares the results of two 'geomdl-cli bench' runs
+#
+# Matches the benchmarks of the baseline and the current results, prints the change in the run time and the peak
+# memory usage and fails if any benchmark is slower than the threshold, e.g. between two releases:
+#
+# Usage: python benchmarks/compare.py baseline.json current.json [--threshold=20]
+#
+
+import sys
+import json
+
+
+def load_results(file_name):
+    """Loads the benchmark results and maps them to their keys"""
+    with open(file_name) as fp:
+        report = json.load(fp)
+    results = {}
+    for res in report['results']:
+        key = (res['stage'], res['name'], res.get('delta', None), res.get('backend', None))
+        results[key] = res
+    return report, results
+
+
+def main():
+    files = [a for a in sys.argv[1:] if not a.startswith("--")]
+    params = dict(a[2:].split("=") for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    if len(files) != 2:
+        print("Usage: python benchmarks/compare.py baseline.json current.json [--threshold=20]")
+        sys.exit(2)
+    threshold = float(params.get('threshold', 20.0))
+
+    base_report, base = load_results(files[0])
+    curr_report, curr = load_results(files[1])
+    print("Baseline: geomdl-cli {v} ({d})".format(v=base_report['version'], d=base_report['date']))
+    print("Current:  geomdl-cli {v} ({d})".format(v=curr_report['version'], d=curr_report['date']))
+
+    failed = False
+    for key in sorted(curr, key=lambda k: [str(v) for v in k]):
+        old = base.get(key, None)
+        new = curr[key]
+        name = " ".join(str(k) for k in key if k is not None)
+        if old is None or 'error' in old or 'error' in new:
+            status = "error" if 'error' in new else "new"
+            print("{n:<50} {s}".format(n=name, s=status))
+            continue
+        time_change = (new['time'] / old['time'] - 1.0) * 100.0 if old['time'] > 0 else 0.0
+        mem_change = (new['peak_memory'] / old['peak_memory'] - 1.0) * 100.0 if old['peak_memory'] > 0 else 0.0
+        status = "ok"
+        if time_change > threshold:
+            status = "SLOWER"
+            failed = True
+        print("{n:<50} time {t:+7.1f}%   memory {m:+7.1f}%   {s}".format(n=name, t=time_change, m=mem_change,
+                                                                          s=status))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Cold-start benchmark for geomdl-cli commands
+#
+# Runs each command in a fresh interpreter, reports the wall time and fails if the lightweight commands load the
+# heavy dependencies or exceed the time budget.
+#
+# Usage: python benchmarks/import_time.py [--repeat=5] [--budget=150]
+#
+
+import sys
+import json
+import subprocess
+
+# Modules which must not be loaded by the lightweight commands
+HEAVY_MODULES = ('matplotlib', 'jinja2', 'ruamel.yaml', 'libconf', 'geomdl.visualization', 'geomdl.exchange')
+
+# Commands and their arguments to benchmark; "light" commands must not load the heavy modules
+COMMANDS = [
+    dict(args=['help'], light=True),
+    dict(args=['version'], light=True),
+    dict(args=['config'], light=True),
+    dict(args=['plot', '--help'], light=True),
+    dict(args=['eval', '--help'], light=True),
+    dict(args=['export', '--help'], light=True),
+    dict(args=['bench', '--help'], light=True),
+]
+
+# Code to run inside the subprocess
+RUNNER = """\
+import sys, time, json
+start = time.perf_counter()
+sys.argv = ['geomdl-cli'] + {args!r}
+from geomdl.cli import command_line
+try:
+    command_line.main()
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+sys.stderr.write(json.dumps(dict(time=elapsed, modules=sorted(sys.modules.keys()))) + "\\n")
+"""
+
+
+def run_command(args):
+    """Runs the command in a new interpreter and returns the elapsed time and the loaded modules"""
+    proc = subprocess.run([sys.executable, '-c', RUNNER.format(args=args)],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    result = json.loads(proc.stderr.strip().splitlines()[-1])
+    return result['time'], result['modules']
+
+
+def main():
+    params = dict(a[2:].split("=") for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    repeat = int(params.get('repeat', 5))
+    budget = float(params.get('budget', 150.0)) / 1000.0
+
+    failed = False
+    for cmd in COMMANDS:
+        timings = []
+        modules = []
+        for _ in range(repeat):
+            t, modules = run_command(cmd['args'])
+            timings.append(t)
+        best = min(timings)
+        heavy = sorted(set(m for m in modules for h in HEAVY_MODULES if m == h or m.startswith(h + ".")))
+        status = "ok"
+        if cmd['light'] and heavy:
+            status = "FAIL (loads " + ", ".join(heavy) + ")"
+            failed = True
+        elif cmd['light'] and best > budget:
+            status = "FAIL (over budget)"
+            failed = True
+        print("{cmd:<20} {t:8.1f} ms   {s}".format(cmd=" ".join(cmd['args']), t=best * 1000, s=status))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
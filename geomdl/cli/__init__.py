@@ -63,6 +63,33 @@ __cli_commands__ = dict(
         func="command_export",
         func_args=1,
     ),
+    cache=dict(
+        desc="displays and clears the cache of the parsed and evaluated shapes",
+        module="geomdl.cli.commands",
+        func="command_cache",
+    ),
+    serve=dict(
+        desc="runs a local evaluation server to which the commands are forwarded",
+        module="geomdl.cli.commands",
+        func="command_serve",
+    ),
+    watch=dict(
+        desc="watches the input file and re-runs plot, eval or export command after every change",
+        module="geomdl.cli.commands",
+        func="command_watch",
+        func_args=1,
+    ),
+    run=dict(
+        desc="runs the jobs listed in a manifest file in the dependency order",
+        module="geomdl.cli.commands",
+        func="command_run",
+        func_args=1,
+    ),
+    bench=dict(
+        desc="benchmarks the parsing, evaluation and export stages",
+        module="geomdl.cli.commands",
+        func="command_bench",
+    ),
 )
 
 # Default configuration
@@ -70,8 +97,21 @@ __cli_config__ = dict(
     user_override=False,  # True if a user configuration is loaded, False otherwise
     plot_vis="legend:off",  # visualization options for plot command (--vis parameter)
     plot_name=None,  # figure save name option for plot command (--name parameter)
+    plot_max_points=10000,  # maximum number of plotted points of each shape, 0 plots all (--max-points parameter)
     eval_format="screen",  # export option for eval command (--format parameter)
+    eval_tile_size=0,  # number of points evaluated at once by eval command, 0 evaluates complete shapes (--tile-size)
     export_format="json",  # export file type option for export command (--format parameter)
+    backend="geomdl",  # evaluation backend for plot, eval and export commands (--backend parameter)
+    adaptive_max_points=250000,  # maximum number of points evaluated by --tolerance parameter, 0 disables the limit
+    cache_enabled=True,  # enables the cache of the parsed and evaluated shapes (--no-cache parameter disables)
+    cache_dir=None,  # cache directory, None uses the "cache" directory inside the user configuration directory
+    cache_size=512,  # maximum cache size in megabytes
+    serve_socket=None,  # Unix socket of the evaluation server, None uses "server.sock" in the user configuration dir
+    serve_forward=True,  # forwards eval, export and plot commands to the evaluation server, if it is running
+    serve_cache_entries=32,  # number of input files whose shapes are kept in the memory by the evaluation server
+    serve_token=None,  # access token of the HTTP evaluation server, None generates a random token on every start
+    watch_interval=0.5,  # polling interval of watch command in seconds (--interval parameter)
+    run_check="mtime",  # up-to-date check of the outputs of run command, mtime or hash (--check parameter)
 )
 
 # Custom configuration directory
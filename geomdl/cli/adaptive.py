@@ -0,0 +1,316 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Adaptive evaluation of curves and surfaces driven by the chordal error
+#
+
+import math
+from geomdl import helpers
+from . import config
+
+# Maximum number of bisections of a curve segment
+CLI_ADAPTIVE_MAX_DEPTH = 16
+
+# Maximum number of the refinement passes of a surface grid
+CLI_ADAPTIVE_MAX_PASSES = 16
+
+# Maximum number of the parameters in a parametric direction
+CLI_ADAPTIVE_MAX_SIZE = 4097
+
+
+def _check_budget(num_points, max_points):
+    """Raises an error if the number of the adaptive points exceeds the budget (0 disables the check)"""
+    if 0 < max_points < num_points:
+        raise RuntimeError("The tolerance requires more than " + str(max_points) + " points. Please increase the "
+                           "tolerance or the adaptive_max_points configuration variable")
+
+
+def _distance(pt1, pt2):
+    """Computes the distance between two points"""
+    return math.sqrt(sum((c1 - c2) ** 2 for c1, c2 in zip(pt1, pt2)))
+
+
+def chord_deviation(pt, start, end):
+    """ Computes the distance of the point to the chord (line segment) between the start and the end points.
+
+    :param pt: point
+    :param start: start point of the chord
+    :param end: end point of the chord
+    :return: distance of the point to the chord
+    :rtype: float
+    """
+    chord = [e - s for s, e in zip(start, end)]
+    length_sq = sum(c * c for c in chord)
+    if length_sq == 0.0:
+        return _distance(pt, start)
+    t = sum((p - s) * c for p, s, c in zip(pt, start, chord)) / length_sq
+    t = min(1.0, max(0.0, t))
+    return _distance(pt, [s + t * c for s, c in zip(start, chord)])
+
+
+def initial_params(degree, knotvector, segments=None):
+    """ Generates the initial parameters, splitting each non-zero knot span into equal segments.
+
+    Sharp features are usually located at the knots, so the knots are always included.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param segments: number of segments of each knot span (default: max(2, degree))
+    :type segments: int
+    :return: sorted parameters
+    :rtype: list
+    """
+    segments = max(2, degree) if segments is None else segments
+    knots = sorted(set(knotvector[degree:len(knotvector) - degree]))
+    params = [knots[0]]
+    for k0, k1 in zip(knots, knots[1:]):
+        params += [k0 + (k1 - k0) * i / float(segments) for i in range(1, segments + 1)]
+    return params
+
+
+class ShapeSampler(object):
+    """ Evaluates the points of a curve or a surface on arbitrary parameters.
+
+    The spans and the basis functions are computed once for each parameter value and reused, as the adaptive
+    refinement evaluates the shape on a small set of parameters in each direction.
+    """
+    def __init__(self, shape):
+        self._degree = shape.degree if shape.pdimension == 1 else [shape.degree_u, shape.degree_v]
+        self._degree = self._degree if isinstance(self._degree, list) else [self._degree]
+        self._knotvector = [shape.knotvector] if shape.pdimension == 1 else [shape.knotvector_u, shape.knotvector_v]
+        self._size = [shape.ctrlpts_size] if shape.pdimension == 1 else [shape.ctrlpts_size_u, shape.ctrlpts_size_v]
+        self._rational = shape.rational
+        self._ctrlptsw = shape.ctrlptsw if shape.rational else shape.ctrlpts
+        self._dim = shape.dimension + 1 if shape.rational else shape.dimension
+        self._basis = [dict() for _ in self._degree]
+        self.num_evals = 0
+
+    def _basis_funcs(self, idx, param):
+        ret = self._basis[idx].get(param, None)
+        if ret is None:
+            degree = self._degree[idx]
+            knotvector = self._knotvector[idx]
+            span = helpers.find_span_binsearch(degree, knotvector, self._size[idx], param)
+            ret = (span - degree, helpers.basis_function(degree, knotvector, span, param))
+            self._basis[idx][param] = ret
+        return ret
+
+    def _point(self, ptw):
+        if self._rational:
+            return [c / ptw[-1] for c in ptw[:-1]]
+        return ptw
+
+    def curve_point(self, u):
+        """Evaluates the curve point at parameter u"""
+        self.num_evals += 1
+        start, basis = self._basis_funcs(0, u)
+        ptw = [0.0] * self._dim
+        for i, b in enumerate(basis):
+            cpt = self._ctrlptsw[start + i]
+            for c in range(self._dim):
+                ptw[c] += b * cpt[c]
+        return self._point(ptw)
+
+    def surface_point(self, u, v):
+        """Evaluates the surface point at parameter (u, v)"""
+        self.num_evals += 1
+        start_u, basis_u = self._basis_funcs(0, u)
+        start_v, basis_v = self._basis_funcs(1, v)
+        size_v = self._size[1]
+        ptw = [0.0] * self._dim
+        for i, bu in enumerate(basis_u):
+            row = (start_u + i) * size_v + start_v
+            for j, bv in enumerate(basis_v):
+                b = bu * bv
+                cpt = self._ctrlptsw[row + j]
+                for c in range(self._dim):
+                    ptw[c] += b * cpt[c]
+        return self._point(ptw)
+
+
+def curve_params(shape, tolerance, max_points=0):
+    """ Computes the parameters of a curve whose chordal error is below the tolerance.
+
+    Each segment of the initial parameters is bisected until the distance of its mid point and its quarter points to
+    the chord is below the tolerance.
+
+    :param shape: curve
+    :param tolerance: maximum chordal error
+    :type tolerance: float
+    :param max_points: maximum number of the evaluated points, 0 disables the limit
+    :type max_points: int
+    :return: parameters and the evaluated points
+    :rtype: tuple
+    """
+    sampler = ShapeSampler(shape)
+    params = initial_params(shape.degree, shape.knotvector)
+    points = [sampler.curve_point(u) for u in params]
+
+    ret_params = [params[0]]
+    ret_points = [points[0]]
+    for idx in range(len(params) - 1):
+        # Depth-first bisection keeps the parameters sorted
+        stack = [(params[idx + 1], points[idx + 1], 0), (params[idx], points[idx], 0)]
+        while len(stack) > 1:
+            u0, pt0, depth = stack.pop()
+            u1, pt1, _ = stack[-1]
+            um = 0.5 * (u0 + u1)
+            ptm = sampler.curve_point(um)
+            error = chord_deviation(ptm, pt0, pt1)
+            if error <= tolerance and depth > 0:
+                # Check the quarter points too, as the mid point can be on the chord of an S-shaped segment
+                error = max(chord_deviation(sampler.curve_point(0.5 * (u0 + um)), pt0, pt1),
+                            chord_deviation(sampler.curve_point(0.5 * (um + u1)), pt0, pt1))
+            if error > tolerance and depth < CLI_ADAPTIVE_MAX_DEPTH:
+                stack.append((um, ptm, depth + 1))
+                stack.append((u0, pt0, depth + 1))
+                continue
+            ret_params.append(u1)
+            ret_points.append(pt1)
+            _check_budget(len(ret_params), max_points)
+    return ret_params, ret_points
+
+
+def _refine_indices(params, errors, tolerance):
+    """Returns the sorted parameter list with the mid points of the intervals whose errors are above the tolerance"""
+    # The inserted mid points must not grow the list beyond the maximum size
+    num_inserts = CLI_ADAPTIVE_MAX_SIZE - len(params)
+    ret = [params[0]]
+    for i in range(len(params) - 1):
+        if errors[i] > tolerance and num_inserts > 0:
+            ret.append(0.5 * (params[i] + params[i + 1]))
+            num_inserts -= 1
+        ret.append(params[i + 1])
+    return ret
+
+
+def surface_params(shape, tolerance, max_points=0):
+    """ Computes a non-uniform tensor-product grid of a surface whose chordal error is below the tolerance.
+
+    The error of each grid cell is measured at its edge mid points (the deviation from the edges) and at its center
+    (the deviation from the diagonals of the cell). The parameter intervals of the failing cells are split in the
+    direction of the failing edges, or in both directions if only the center fails, until all cells pass.
+
+    The grid is refined as a whole, i.e. the inserted parameters span the complete surface. Therefore, the grid is
+    structured and the triangulation of the surface does not contain T-junctions (cracks), while the flat regions are
+    sampled with fewer points. The grids of the different surfaces are refined independently, so the triangulations
+    of the neighboring surfaces may not match along their shared edges.
+
+    :param shape: surface
+    :param tolerance: maximum chordal error
+    :type tolerance: float
+    :param max_points: maximum number of the evaluated grid points, 0 disables the limit
+    :type max_points: int
+    :return: parameters in u- and v-directions and the evaluated points (v-direction changes first)
+    :rtype: tuple
+    """
+    sampler = ShapeSampler(shape)
+    params_u = initial_params(shape.degree_u, shape.knotvector_u)
+    params_v = initial_params(shape.degree_v, shape.knotvector_v)
+    _check_budget(len(params_u) * len(params_v), max_points)
+    cache = {}
+
+    def point(u, v):
+        pt = cache.get((u, v), None)
+        if pt is None:
+            pt = sampler.surface_point(u, v)
+            cache[(u, v)] = pt
+        return pt
+
+    for _ in range(CLI_ADAPTIVE_MAX_PASSES):
+        errors_u = [0.0] * (len(params_u) - 1)
+        errors_v = [0.0] * (len(params_v) - 1)
+        for i in range(len(params_u) - 1):
+            u0, u1 = params_u[i], params_u[i + 1]
+            um = 0.5 * (u0 + u1)
+            for j in range(len(params_v) - 1):
+                v0, v1 = params_v[j], params_v[j + 1]
+                vm = 0.5 * (v0 + v1)
+                p00, p01, p10, p11 = point(u0, v0), point(u0, v1), point(u1, v0), point(u1, v1)
+                # Edges in u- and v-directions
+                err_u = max(chord_deviation(point(um, v0), p00, p10), chord_deviation(point(um, v1), p01, p11))
+                err_v = max(chord_deviation(point(u0, vm), p00, p01), chord_deviation(point(u1, vm), p10, p11))
+                # Cell center and the diagonals
+                ptm = point(um, vm)
+                err_c = max(chord_deviation(ptm, p00, p11), chord_deviation(ptm, p01, p10))
+                if err_c > tolerance and err_u <= tolerance and err_v <= tolerance:
+                    err_u = err_v = err_c
+                errors_u[i] = max(errors_u[i], err_u)
+                errors_v[j] = max(errors_v[j], err_v)
+
+        if max(errors_u) <= tolerance and max(errors_v) <= tolerance:
+            break
+        params_u = _refine_indices(params_u, errors_u, tolerance)
+        params_v = _refine_indices(params_v, errors_v, tolerance)
+        # Stop before evaluating the refined grid, as the evaluation time grows with the number of the grid points
+        _check_budget(len(params_u) * len(params_v), max_points)
+
+    points = [point(u, v) for u in params_u for v in params_v]
+    return params_u, params_v, points
+
+
+def evaluate_adaptive(obj, tolerance):
+    """ Evaluates the curves and the surfaces adaptively using the chordal error tolerance.
+
+    The sample sizes of the shapes are updated to the number of the adaptive parameters and the evaluated points are
+    preloaded into the shapes. Therefore, the evaluated points, the writers, the mesh exporters and the
+    visualization modules use the adaptive points, while the parameters of the shapes are no longer uniform.
+
+    The total number of the evaluated points is limited by ``adaptive_max_points`` configuration variable, as a small
+    tolerance may require millions of points.
+
+    :param obj: a container or a list of spline geometries
+    :param tolerance: maximum chordal error, i.e. the distance of the shape to the line segments or the triangles
+    :type tolerance: float
+    :return: total number of the evaluated points
+    :rtype: int
+    """
+    from . import cache
+    from . import timings
+
+    tolerance = float(tolerance)
+    if tolerance <= 0.0:
+        raise RuntimeError("The tolerance must be a positive number")
+
+    max_points = int(config.get('adaptive_max_points', 0) or 0)
+    num_points = 0
+    with timings.stage('eval'):
+        for shape in obj:
+            # Remaining number of the points for the shape; at least 1, so that a used up budget fails the check
+            budget = max(1, max_points - num_points) if max_points > 0 else 0
+            if shape.pdimension == 1:
+                params, points = curve_params(shape, tolerance, budget)
+                shape.sample_size = len(params)
+            elif shape.pdimension == 2:
+                params_u, params_v, points = surface_params(shape, tolerance, budget)
+                shape.sample_size_u = len(params_u)
+                shape.sample_size_v = len(params_v)
+            else:
+                raise RuntimeError("Adaptive evaluation supports curves and surfaces only")
+
+            # The adaptive points are not stored in the persistent cache, as it is keyed by the uniform sample size
+            evaluator = shape.evaluator.wrapped if hasattr(shape.evaluator, 'wrapped') else shape.evaluator
+            shape.evaluator = cache.CachingEvaluator(shape, evaluator, keep=True)
+            shape.evaluator.preload(points)
+            num_points += len(points)
+    return num_points
@@ -0,0 +1,224 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Alternative evaluation backends for geomdl-cli
+#
+
+from geomdl import evaluators
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Parametric direction names used in the geomdl property names, e.g. degree_u, knotvector_v
+PARAMETRIC_DIRECTIONS = ('u', 'v', 'w')
+
+
+def basis_matrix(degree, knotvector, num_ctrlpts, params):
+    """ Computes the basis functions of all parameters as a dense matrix.
+
+    Vectorized implementation of the Algorithm A2.1 (FindSpan) and Algorithm A2.2 (BasisFuns) from The NURBS Book
+    which processes all parameters at once.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param num_ctrlpts: number of control points
+    :type num_ctrlpts: int
+    :param params: parameters
+    :type params: numpy.ndarray
+    :return: (number of parameters, number of control points) basis function matrix
+    :rtype: numpy.ndarray
+    """
+    kv = np.asarray(knotvector, dtype=float)
+    t = np.asarray(params, dtype=float)
+    spans = np.clip(np.searchsorted(kv, t, side='right') - 1, degree, num_ctrlpts - 1)
+
+    nt = len(t)
+    basis = np.zeros((nt, degree + 1))
+    basis[:, 0] = 1.0
+    left = np.zeros((nt, degree + 1))
+    right = np.zeros((nt, degree + 1))
+    for j in range(1, degree + 1):
+        left[:, j] = t - kv[spans + 1 - j]
+        right[:, j] = kv[spans + j] - t
+        saved = np.zeros(nt)
+        for r in range(j):
+            temp = basis[:, r] / (right[:, r + 1] + left[:, j - r])
+            basis[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        basis[:, j] = saved
+
+    result = np.zeros((nt, num_ctrlpts))
+    rows = np.arange(nt)
+    for k in range(degree + 1):
+        result[rows, spans - degree + k] = basis[:, k]
+    return result
+
+
+def grid_basis_matrix(degree, knotvector, num_ctrlpts, start, stop, num):
+    """ Returns the basis function matrix of the uniform parameter grid from the memoized tables.
+
+    The matrices are shared by the shapes with the same degree, knot vector and parameter grid and must not be modified.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param num_ctrlpts: number of control points
+    :type num_ctrlpts: int
+    :param start: first parameter
+    :type start: float
+    :param stop: last parameter
+    :type stop: float
+    :param num: number of parameters
+    :type num: int
+    :return: (number of parameters, number of control points) basis function matrix
+    :rtype: numpy.ndarray
+    """
+    from . import basis
+    return basis.cache.get(('matrix', degree, tuple(knotvector), num_ctrlpts, start, stop, num),
+                           lambda: basis_matrix(degree, knotvector, num_ctrlpts, np.linspace(start, stop, num)))
+
+
+def shape_data(shape):
+    """ Extracts the degrees, knot vectors, control point sizes and sample sizes of the shape.
+
+    :param shape: a spline geometry
+    :return: list of (degree, knot vector, number of control points, sample size) tuples for each parametric direction
+    :rtype: list
+    """
+    if shape.pdimension == 1:
+        return [(shape.degree, shape.knotvector, shape.ctrlpts_size, shape.sample_size)]
+    return [(getattr(shape, 'degree_' + d), getattr(shape, 'knotvector_' + d),
+             getattr(shape, 'ctrlpts_size_' + d), getattr(shape, 'sample_size_' + d))
+            for d in PARAMETRIC_DIRECTIONS[:shape.pdimension]]
+
+
+def homogeneous_ctrlpts(shape):
+    """ Returns the weighted control points of the shape as an array in (u, v, w) grid order.
+
+    :param shape: a spline geometry
+    :return: control points array with the weight as the last coordinate
+    :rtype: numpy.ndarray
+    """
+    pts = np.asarray(shape.ctrlpts, dtype=float)
+    weights = np.asarray(shape.weights, dtype=float) if shape.rational else np.ones(len(pts))
+    ctrlptsw = np.hstack([pts * weights[:, None], weights[:, None]])
+    sizes = [d[2] for d in shape_data(shape)]
+    if len(sizes) == 3:
+        # geomdl stores the volume control points in (w, u, v) order
+        return ctrlptsw.reshape(sizes[2], sizes[0], sizes[1], -1).transpose(1, 2, 0, 3)
+    return ctrlptsw.reshape(sizes + [-1])
+
+
+def evaluate_grid(bases, ctrlptsw):
+    """ Evaluates the tensor product of the basis function matrices and the weighted control points.
+
+    :param bases: basis function matrix of each parametric direction
+    :type bases: list
+    :param ctrlptsw: weighted control points grid
+    :type ctrlptsw: numpy.ndarray
+    :return: evaluated points as a (number of points, dimension) array
+    :rtype: numpy.ndarray
+    """
+    result = ctrlptsw
+    # Contract one parametric direction at a time, the evaluated direction moves to the end of the index list
+    for basis in bases:
+        result = np.tensordot(basis, result, axes=(1, 0))
+        result = np.moveaxis(result, 0, len(bases) - 1)
+    result = result.reshape(-1, result.shape[-1])
+    return result[:, :-1] / result[:, -1:]
+
+
+class NumpyEvaluator(evaluators.AbstractEvaluator):
+    """ Vectorized evaluator using NumPy.
+
+    Computes the basis function matrices of the complete parameter grid at once, or takes them from the memoized
+    tables, and evaluates the curves, surfaces and volumes via batched matrix products. The evaluated points are
+    returned in the same order and format as the geomdl evaluators. The derivatives are computed by the original
+    evaluator of the shape.
+
+    :param shape: the shape to evaluate
+    :param evaluator: the original evaluator of the shape
+    """
+    def __init__(self, shape, evaluator):
+        if np is None:
+            raise RuntimeError("Please install 'numpy' package to use numpy backend: pip install numpy")
+        super(NumpyEvaluator, self).__init__(name="NumpyEvaluator")
+        self._shape = shape
+        self._evaluator = evaluator
+
+    def evaluate(self, *args, **kwargs):
+        data = shape_data(self._shape)
+        start = kwargs.get('start', [d[1][d[0]] for d in data])
+        stop = kwargs.get('stop', [d[1][-(d[0] + 1)] for d in data])
+        if not isinstance(start, (list, tuple)):
+            start = [start]
+            stop = [stop]
+        # Single point evaluation, e.g. evaluate_single()
+        single = list(start) == list(stop)
+
+        bases = []
+        for (degree, knotvector, size, sample_size), t0, t1 in zip(data, start, stop):
+            if single:
+                bases.append(basis_matrix(degree, knotvector, size, np.linspace(t0, t1, 1)))
+            else:
+                bases.append(grid_basis_matrix(degree, knotvector, size, t0, t1, sample_size))
+        return evaluate_grid(bases, homogeneous_ctrlpts(self._shape)).tolist()
+
+    def derivatives(self, *args, **kwargs):
+        return self._evaluator.derivatives(*args, **kwargs)
+
+
+# Available evaluation backends; "geomdl" uses the default evaluators of geomdl
+CLI_EVAL_BACKENDS = dict(
+    geomdl=None,
+    numpy=NumpyEvaluator,
+)
+
+
+def set_backend(obj, backend):
+    """ Sets the evaluation backend of the shapes.
+
+    If the evaluated points are cached, the backend is used for evaluating the shapes which are not in the cache.
+
+    :param obj: a spline geometry, a container or a list of spline geometries
+    :param backend: backend name, see ``CLI_EVAL_BACKENDS``
+    :type backend: str
+    """
+    try:
+        backend_cls = CLI_EVAL_BACKENDS[backend]
+    except KeyError:
+        raise RuntimeError("Unknown evaluation backend '" + str(backend) + "'. Possible backends: " +
+                           ", ".join(sorted(CLI_EVAL_BACKENDS.keys())))
+    if backend_cls is None:
+        return
+    for shape in obj:
+        evaluator = shape.evaluator
+        # Keep the caching evaluator on top
+        if hasattr(evaluator, 'wrapped'):
+            evaluator.wrapped = backend_cls(shape, evaluator.wrapped)
+        else:
+            shape.evaluator = backend_cls(shape, evaluator)
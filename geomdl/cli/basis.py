@@ -0,0 +1,157 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Memoized basis function tables for geomdl-cli
+#
+# The knot spans and the basis functions of a parametric direction only depend on the degree, the knot vector and the
+# parameter grid. The multi-patch models often repeat the same degrees and knot vectors in all patches, so the tables
+# are computed once and shared by all shapes evaluated in the same process, e.g. the shapes of a container or the jobs
+# of a manifest.
+#
+
+import threading
+from collections import OrderedDict
+from geomdl import evaluators
+from . import timings
+
+# Maximum number of tables kept in the memory
+CLI_BASIS_CACHE_SIZE = 256
+
+
+class BasisCache(object):
+    """ Least recently used cache of the basis function tables.
+
+    The cache hits and misses are counted in the timings of the command as ``basis_cache`` counter.
+
+    :param max_size: maximum number of tables
+    :type max_size: int
+    """
+    def __init__(self, max_size=CLI_BASIS_CACHE_SIZE):
+        self.max_size = max_size
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, func):
+        """ Returns the table of the key, computing it via the function if it is not in the cache.
+
+        The returned tables are shared and must not be modified.
+
+        :param key: hashable key, e.g. the degree, the knot vector and the parameter grid
+        :param func: function computing the table
+        :return: table
+        """
+        with self._lock:
+            table = self._tables.get(key, None)
+            if table is not None:
+                self._tables.move_to_end(key)
+        timings.timer.count('basis_cache', 'misses' if table is None else 'hits')
+        if table is None:
+            table = func()
+            with self._lock:
+                self._tables[key] = table
+                while len(self._tables) > self.max_size:
+                    self._tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        """Removes all tables"""
+        with self._lock:
+            self._tables.clear()
+
+
+# Basis function tables of the current process
+cache = BasisCache()
+
+
+def grid_tables(degree, knotvector, size, sample_size, precision):
+    """ Returns the knot spans and the basis functions of a parametric direction on the uniform parameter grid.
+
+    The parameters are generated and the tables are computed in the same way as geomdl evaluators do.
+
+    :param degree: degree
+    :type degree: int
+    :param knotvector: knot vector
+    :type knotvector: list, tuple
+    :param size: number of control points
+    :type size: int
+    :param sample_size: number of parameters
+    :type sample_size: int
+    :param precision: number of decimal places of the parameters
+    :type precision: int
+    :return: knot spans and basis functions of the parameters
+    :rtype: tuple
+    """
+    def compute():
+        from geomdl import helpers, linalg
+        knots = linalg.linspace(knotvector[degree], knotvector[-(degree + 1)], sample_size, decimals=precision)
+        spans = helpers.find_spans(degree, knotvector, size, knots, helpers.find_span_linear)
+        return spans, helpers.basis_functions(degree, knotvector, spans, knots)
+
+    return cache.get(('grid', degree, tuple(knotvector), size, sample_size, precision), compute)
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class TableEvaluator(evaluators.AbstractEvaluator):
+    """ Evaluator using the memoized basis function tables.
+
+    Evaluates the complete curves, surfaces and volumes via :py:class:`.tiles.GridEvaluator` whose basis function tables
+    are shared by the shapes with the same degrees, knot vectors and sample sizes. The evaluated points are the same as
+    the original evaluator's. The segments, the single points and the derivatives are evaluated by the original
+    evaluator of the shape.
+
+    :param shape: the shape to evaluate
+    :param evaluator: the original evaluator of the shape
+    """
+    def __init__(self, shape, evaluator):
+        super(TableEvaluator, self).__init__(name=evaluator.name)
+        self._shape = shape
+        self._evaluator = evaluator
+
+    def evaluate(self, datadict, **kwargs):
+        degree, knotvector = datadict['degree'], datadict['knotvector']
+        start = [kv[deg] for deg, kv in zip(degree, knotvector)]
+        stop = [kv[-(deg + 1)] for deg, kv in zip(degree, knotvector)]
+        # The curves pass the parameters as numbers
+        if _as_list(kwargs.get('start', start)) != start or _as_list(kwargs.get('stop', stop)) != stop:
+            return self._evaluator.evaluate(datadict, **kwargs)
+        from . import tiles
+        grid = tiles.GridEvaluator(self._shape, data=datadict)
+        return grid.evaluate([(0, size) for size in grid.sample_sizes])
+
+    def derivatives(self, *args, **kwargs):
+        return self._evaluator.derivatives(*args, **kwargs)
+
+
+def set_evaluators(obj):
+    """ Sets the evaluators of the shapes using the memoized basis function tables.
+
+    :param obj: a spline geometry, a container or a list of spline geometries
+    """
+    for shape in obj:
+        evaluator = shape.evaluator
+        # Keep the caching evaluator on top
+        if hasattr(evaluator, 'wrapped'):
+            evaluator.wrapped = TableEvaluator(shape, evaluator.wrapped)
+        else:
+            shape.evaluator = TableEvaluator(shape, evaluator)
@@ -0,0 +1,319 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Batch processing functions for geomdl-cli
+#
+
+import os
+import os.path
+import glob
+import copy
+import itertools
+from concurrent import futures
+from . import streams
+from . import timings
+
+
+# Prefix for the manifest files, e.g. geomdl-cli eval @files.txt
+CLI_MANIFEST_PREFIX = "@"
+
+
+def find_input_files(file_name, extensions):
+    """ Expands the command input into a list of input files.
+
+    The input can be a single file, a directory, a glob pattern (e.g. ``shapes/*.yaml``) or a manifest file prefixed
+    by ``@`` containing one file name per line. Directories are scanned for the files with the given extensions, also
+    compressed, e.g. surface.json.gz.
+
+    :param file_name: command input
+    :type file_name: str
+    :param extensions: file extensions to look for in the directories
+    :type extensions: list, tuple
+    :return: list of input files
+    :rtype: list
+    """
+    # Manifest file
+    if file_name.startswith(CLI_MANIFEST_PREFIX):
+        manifest_name = file_name[len(CLI_MANIFEST_PREFIX):]
+        manifest_dir = os.path.dirname(manifest_name)
+        file_list = []
+        with open(manifest_name, 'r') as fp:
+            for line in fp:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                file_list += find_input_files(os.path.join(manifest_dir, line), extensions)
+        return file_list
+
+    # Directory
+    if os.path.isdir(file_name):
+        file_list = []
+        for fn in sorted(os.listdir(file_name)):
+            fpath = os.path.join(file_name, fn)
+            fext = os.path.splitext(streams.split_compression(fn)[0])[1]
+            if os.path.isfile(fpath) and fext[1:].lower() in extensions:
+                file_list.append(fpath)
+        return file_list
+
+    # Glob pattern
+    if glob.has_magic(file_name):
+        return sorted(glob.glob(file_name))
+
+    # Single file
+    return [file_name]
+
+
+def is_batch(file_name):
+    """ Checks if the command input requires batch processing.
+
+    :param file_name: command input
+    :type file_name: str
+    :return: True if the input is a directory, a glob pattern or a manifest file
+    :rtype: bool
+    """
+    return file_name.startswith(CLI_MANIFEST_PREFIX) or os.path.isdir(file_name) or glob.has_magic(file_name)
+
+
+def input_root(file_list):
+    """ Finds the deepest directory containing all input files.
+
+    :param file_list: list of input files
+    :type file_list: list
+    :return: common directory of the input files
+    :rtype: str
+    """
+    return os.path.commonpath([os.path.dirname(os.path.abspath(fn)) for fn in file_list])
+
+
+def output_file_name(file_name, extension, output_dir=None, root_dir=None):
+    """ Generates the output file name for the input file in batch mode.
+
+    The output file name keeps the extension of the input file, e.g. surface.yaml is exported as surface.yaml.json, so
+    the input files sharing a name, e.g. surface.yaml and surface.json, do not overwrite each other's outputs. The
+    compression extension of the input file is dropped.
+
+    :param file_name: input file name
+    :type file_name: str
+    :param extension: extension of the output file
+    :type extension: str
+    :param output_dir: output directory (default is the directory of the input file)
+    :type output_dir: str
+    :param root_dir: directory of the input files whose subdirectories are mirrored in the output directory (default
+        writes all outputs directly into the output directory)
+    :type root_dir: str
+    :return: output file name
+    :rtype: str
+    """
+    fname = streams.split_compression(file_name)[0] + "." + extension
+    if output_dir:
+        if root_dir:
+            fname = os.path.join(output_dir, os.path.relpath(os.path.abspath(fname), root_dir))
+        else:
+            fname = os.path.join(output_dir, os.path.basename(fname))
+        fdir = os.path.dirname(fname)
+        if fdir and not os.path.isdir(fdir):
+            os.makedirs(fdir)
+    return fname
+
+
+def find_conflicts(file_list, output_list):
+    """ Finds the input files whose outputs overwrite an input file or the output of another input file.
+
+    :param file_list: list of input files
+    :type file_list: list
+    :param output_list: list of the output files of each input file
+    :type output_list: list
+    :return: error message of each conflicting input file
+    :rtype: dict
+    """
+    inputs = {os.path.realpath(fn): fn for fn in file_list}
+    names = {}
+    owners = {}
+    for fname, outputs in zip(file_list, output_list):
+        for out in outputs:
+            names.setdefault(os.path.realpath(out), out)
+            owners.setdefault(os.path.realpath(out), []).append(fname)
+
+    errors = {}
+    for path, fnames in owners.items():
+        out = names[path]
+        if path in inputs:
+            for fname in fnames:
+                errors[fname] = "Output file '" + out + "' would overwrite the input file '" + inputs[path] + "'"
+        elif len(fnames) > 1:
+            for fname in fnames:
+                errors[fname] = "Output file '" + out + "' is shared by the input files " + \
+                    ", ".join(["'" + fn + "'" for fn in fnames])
+    return errors
+
+
+def num_jobs(jobs):
+    """ Converts ``--jobs`` parameter value to the number of worker processes.
+
+    :param jobs: number of jobs; 0 or less uses all available cores
+    :type jobs: int, str
+    :return: number of worker processes
+    :rtype: int
+    """
+    jobs = int(jobs)
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def _run_task(func, file_name, kwargs):
+    """Runs a single batch task and returns the error message, if there is any"""
+    try:
+        func(file_name, **kwargs)
+    except Exception as e:
+        return str(e.args[-1]) if e.args else e.__class__.__name__
+    return None
+
+
+def run_batch(func, tasks, jobs=1, errors=None):
+    """ Runs the function for each task and prints a summary of the results.
+
+    Each task is a tuple of the input file name and the keyword arguments of the function. A failing task does not
+    stop the remaining tasks from running.
+
+    :param func: function to run, must be a module-level function for the parallel execution
+    :param tasks: list of (file name, keyword arguments) tuples
+    :type tasks: list
+    :param jobs: number of worker processes
+    :type jobs: int
+    :param errors: error messages of the input files failing before running, e.g. the output file conflicts
+    :type errors: dict
+    :return: list of (file name, error message) tuples for the failed tasks
+    :rtype: list
+    """
+    errors = errors or {}
+    num_tasks = len(tasks)
+    failed = []
+
+    def report(fname, err):
+        if err is None:
+            print("[ok] " + fname)
+        else:
+            print("[failed] " + fname + ": " + err)
+            failed.append((fname, err))
+
+    # The conflicting tasks fail without running
+    for fname, _ in tasks:
+        if fname in errors:
+            report(fname, errors[fname])
+    tasks = [(fname, fkwargs) for fname, fkwargs in tasks if fname not in errors]
+    jobs = min(num_jobs(jobs), max(len(tasks), 1))
+
+    if jobs == 1:
+        for fname, fkwargs in tasks:
+            report(fname, _run_task(func, fname, fkwargs))
+    else:
+        with futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            fs = {executor.submit(_run_task, func, fname, fkwargs): fname for fname, fkwargs in tasks}
+            for f in futures.as_completed(fs):
+                try:
+                    err = f.result()
+                except Exception as e:
+                    err = str(e)
+                report(fs[f], err)
+
+    # Print summary
+    print("Processed {n} file(s): {s} succeeded, {f} failed".format(
+        n=num_tasks, s=num_tasks - len(failed), f=len(failed))
+    )
+    for fname, err in failed:
+        print("- " + fname + ": " + err)
+    return failed
+
+
+def _evaluate_shape(shape, backend):
+    """Evaluates a single shape in a worker process"""
+    if backend != 'geomdl':
+        from . import backends
+        backends.set_backend(shape, backend)
+    return shape.evalpts
+
+
+def evaluate_parallel(obj, jobs=1, backend='geomdl', update_delta=False):
+    """ Evaluates the shapes of a container in parallel using a process pool.
+
+    The evaluated points are returned to the main process in the original order and preloaded into the shapes, so
+    the shapes are not evaluated again when the writers, the exporters or the visualization modules access their
+    evaluated points. The shapes whose evaluated points are already cached are skipped.
+
+    :param obj: a container or a list of spline geometries
+    :param jobs: number of worker processes
+    :type jobs: int
+    :param backend: evaluation backend used by the worker processes
+    :type backend: str
+    :param update_delta: applies the evaluation delta of the container to its shapes, as the container renders and
+        mesh exports do
+    :type update_delta: bool
+    """
+    from geomdl import multi
+    from . import cache
+
+    jobs = num_jobs(jobs)
+    if jobs < 2:
+        return
+    if update_delta and isinstance(obj, multi.AbstractContainer):
+        for shape in obj:
+            shape.delta = obj.delta
+    shapes = [shape for shape in obj if not (isinstance(shape.evaluator, cache.CachingEvaluator) and
+                                             shape.evaluator.is_cached())]
+    if len(shapes) < 2:
+        return
+
+    # Send copies of the shapes with the default geomdl evaluators, as the evaluators of the CLI hold references
+    # to the objects living in the main process
+    copies = []
+    for shape in shapes:
+        shape_copy = copy.copy(shape)
+        shape_copy.evaluator = shape.__class__().evaluator
+        copies.append(shape_copy)
+
+    with timings.stage('eval'), futures.ProcessPoolExecutor(max_workers=min(jobs, len(shapes))) as executor:
+        results = executor.map(_evaluate_shape, copies, itertools.repeat(backend),
+                               chunksize=max(1, len(shapes) // (jobs * 4)))
+        for shape, points in zip(shapes, results):
+            if not isinstance(shape.evaluator, cache.CachingEvaluator):
+                shape.evaluator = cache.CachingEvaluator(shape, shape.evaluator)
+            shape.evaluator.preload(points)
+
+
+def evaluate_shapes(obj, jobs=1, backend='geomdl'):
+    """ Evaluates all shapes of a container before their evaluated points are read.
+
+    The shapes are evaluated in parallel via :py:func:`evaluate_parallel` if ``jobs`` is greater than 1, and the
+    remaining shapes are evaluated in the calling process. geomdl evaluates the shapes lazily on the first access to
+    their evaluated points, so the threads reading the points of an unevaluated shape would evaluate it concurrently.
+
+    :param obj: a container or a list of spline geometries
+    :param jobs: number of worker processes
+    :type jobs: int
+    :param backend: evaluation backend used by the worker processes
+    :type backend: str
+    :return: total number of the evaluated points
+    :rtype: int
+    """
+    evaluate_parallel(obj, jobs=jobs, backend=backend)
+    # geomdl keeps the evaluated points of the shapes, which are evaluated here if they are not evaluated yet
+    return sum(len(shape.evalpts) for shape in obj)
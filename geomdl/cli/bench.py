@@ -0,0 +1,374 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Benchmark suite for the parsing, evaluation and export stages of geomdl-cli
+#
+
+import os
+import os.path
+import sys
+import math
+import time
+import glob
+import shutil
+import platform
+import tempfile
+import tracemalloc
+from . import __version__
+
+# Default evaluation deltas for the evaluation stage
+CLI_BENCH_DELTAS = dict(
+    curve=(0.01, 0.001, 0.0001),
+    surface=(0.05, 0.02, 0.01),
+    volume=(0.2, 0.1, 0.05),
+)
+
+# Evaluation delta of the shapes used in the export stage
+CLI_BENCH_EXPORT_DELTA = dict(curve=0.001, surface=0.02, volume=0.1)
+
+# Benchmark stages in the order of execution
+CLI_BENCH_STAGES = ('import', 'template', 'eval', 'export')
+
+# Evaluated points formats of the export stage (single shape XML VTK formats are covered by vtm)
+CLI_BENCH_EVALPTS_FORMATS = ('csv', 'txt', 'npy', 'npz', 'raw', 'vtk', 'vtm')
+
+# CAD exchange formats of the export stage and the shape types supporting them
+CLI_BENCH_NURBS_FORMATS = dict(
+    cfg=('curve', 'surface', 'volume'),
+    yaml=('curve', 'surface', 'volume'),
+    json=('curve', 'surface', 'volume'),
+    gnb=('curve', 'surface', 'volume'),
+    obj=('surface',),
+    stl=('surface',),
+    off=('surface',),
+    smesh=('surface',),
+    vmesh=('volume',),
+)
+
+
+def measure(func, setup=None, repeat=3):
+    """ Measures the run time and the peak memory usage of the function.
+
+    The function is timed ``repeat`` times and the best time is reported. The peak memory usage is measured in a
+    separate run via :py:mod:`tracemalloc`, so that the tracing overhead does not affect the timings.
+
+    :param func: function to measure
+    :param setup: function to call before each run (not included in the measurements)
+    :param repeat: number of timed runs
+    :type repeat: int
+    :return: best time (in seconds), mean time (in seconds) and peak memory usage (in bytes)
+    :rtype: tuple
+    """
+    timings = []
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), sum(timings) / len(timings), peak
+
+
+def result(stage, name, timing, points=0, size=0, **kwargs):
+    """ Generates a benchmark result dictionary with the throughput values.
+
+    :param stage: benchmark stage
+    :type stage: str
+    :param name: benchmark name
+    :type name: str
+    :param timing: return value of :py:func:`.measure`
+    :type timing: tuple
+    :param points: number of the processed points
+    :type points: int
+    :param size: number of the processed bytes (e.g. the size of the input or the output file)
+    :type size: int
+    :return: benchmark result
+    :rtype: dict
+    """
+    best, mean, peak = timing
+    ret = dict(stage=stage, name=name, time=best, mean_time=mean, peak_memory=peak)
+    if points:
+        ret['points'] = points
+        ret['points_per_s'] = points / best if best > 0 else None
+    if size:
+        ret['bytes'] = size
+        ret['mb_per_s'] = size / 1048576.0 / best if best > 0 else None
+    ret.update(kwargs)
+    return ret
+
+
+def synthetic_shapes(scale=1):
+    """ Generates a large curve, surface and volume for benchmarking.
+
+    The number of the control points in each parametric direction is proportional to ``scale``.
+
+    :param scale: scale of the generated shapes
+    :type scale: int
+    :return: shape type and shape pairs
+    :rtype: list
+    """
+    from geomdl import NURBS
+    from geomdl import utilities as geomdl_utils
+
+    curve = NURBS.Curve()
+    curve.degree = 3
+    num = 64 * scale
+    curve.ctrlpts = [[math.cos(i * 0.3) * (1.0 + i * 0.05), math.sin(i * 0.3) * (1.0 + i * 0.05), i * 0.1]
+                     for i in range(num)]
+    curve.knotvector = geomdl_utils.generate_knot_vector(curve.degree, num)
+
+    surf = NURBS.Surface()
+    surf.degree_u = 3
+    surf.degree_v = 3
+    num = 16 * scale
+    surf.ctrlpts_size_u = num
+    surf.ctrlpts_size_v = num
+    surf.ctrlpts = [[float(u), float(v), math.sin(u * 0.5) * math.cos(v * 0.5)]
+                    for u in range(num) for v in range(num)]
+    surf.knotvector_u = geomdl_utils.generate_knot_vector(surf.degree_u, num)
+    surf.knotvector_v = geomdl_utils.generate_knot_vector(surf.degree_v, num)
+
+    vol = NURBS.Volume()
+    vol.degree_u = 2
+    vol.degree_v = 2
+    vol.degree_w = 2
+    num = 6 * scale
+    vol.ctrlpts_size_u = num
+    vol.ctrlpts_size_v = num
+    vol.ctrlpts_size_w = num
+    vol.ctrlpts = [[float(u), float(v), w + 0.2 * math.sin(u + v)]
+                   for w in range(num) for u in range(num) for v in range(num)]
+    vol.knotvector_u = geomdl_utils.generate_knot_vector(vol.degree_u, num)
+    vol.knotvector_v = geomdl_utils.generate_knot_vector(vol.degree_v, num)
+    vol.knotvector_w = geomdl_utils.generate_knot_vector(vol.degree_w, num)
+
+    return [('curve', curve), ('surface', surf), ('volume', vol)]
+
+
+def input_files(work_dir, shapes, examples_dir=None):
+    """ Collects the example files and exports the synthetic shapes in all importable formats.
+
+    :param work_dir: directory for the exported files
+    :type work_dir: str
+    :param shapes: synthetic shapes
+    :type shapes: list
+    :param examples_dir: directory of the example files (default: "examples" directory of the source tree)
+    :type examples_dir: str
+    :return: list of input files
+    :rtype: list
+    """
+    from geomdl import exchange
+    from .gnb import export_gnb
+    from .utilities import CLI_FILE_IMPORT_TYPES
+
+    if examples_dir is None:
+        examples_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                                    "examples")
+    files = sorted(f for f in glob.glob(os.path.join(examples_dir, "*"))
+                   if os.path.splitext(f)[1][1:] in CLI_FILE_IMPORT_TYPES)
+
+    exporters = dict(cfg=exchange.export_cfg, yaml=exchange.export_yaml, json=exchange.export_json, gnb=export_gnb)
+    for shape_type, shape in shapes:
+        for ext, exporter in exporters.items():
+            file_name = os.path.join(work_dir, "synthetic_" + shape_type + "." + ext)
+            try:
+                exporter(shape, file_name)
+            except Exception:
+                # The exporter is benchmarked and its error is reported in the export stage
+                continue
+            files.append(file_name)
+    return files
+
+
+def bench_import(files, repeat):
+    """Benchmarks the importers of the supported input formats without template processing"""
+    from .utilities import import_file
+    from .parsers import CLI_FILE_PARSERS, is_template
+
+    results = []
+    for file_name in files:
+        ftype = os.path.splitext(file_name)[1][1:]
+        name = ftype + ":" + os.path.basename(file_name)
+        # Templated files cannot be parsed without template processing, its cost is reported in the template stage
+        with open(file_name, 'rb') as fp:
+            file_src = fp.read()
+        use_template = ftype in CLI_FILE_PARSERS and is_template(file_src.decode('utf-8', 'replace'))
+        try:
+            timing = measure(lambda: import_file(file_name, ftype, template=use_template), repeat=repeat)
+        except Exception as e:
+            results.append(dict(stage='import', name=name, error=str(e)))
+            continue
+        results.append(result('import', name, timing, size=len(file_src), template=use_template))
+    return results
+
+
+def bench_template(files, repeat):
+    """Benchmarks the Jinja2 template processing of the input files"""
+    from geomdl import _exchange
+    from .parsers import CLI_FILE_PARSERS
+
+    results = []
+    for file_name in files:
+        # Binary files are not processed as templates
+        if os.path.splitext(file_name)[1][1:] not in CLI_FILE_PARSERS:
+            continue
+        file_src = _exchange.read_file(file_name)
+        try:
+            timing = measure(lambda: _exchange.process_template(file_src), repeat=repeat)
+        except Exception as e:
+            results.append(dict(stage='template', name=os.path.basename(file_name), error=str(e)))
+            continue
+        results.append(result('template', os.path.basename(file_name), timing, size=len(file_src)))
+    return results
+
+
+def bench_eval(shapes, repeat, deltas=None, backends=None):
+    """Benchmarks the evaluation of the synthetic shapes using the evaluation backends at several deltas"""
+    import copy
+    from . import backends as cli_backends
+
+    results = []
+    for backend in backends or available_backends():
+        for shape_type, shape in shapes:
+            for delta in deltas or CLI_BENCH_DELTAS[shape_type]:
+                bshape = copy.copy(shape)
+                bshape.evaluator = shape.__class__().evaluator
+                cli_backends.set_backend(bshape, backend)
+                bshape.delta = delta
+                timing = measure(bshape.evaluate, repeat=repeat)
+                num_points = len(bshape.evalpts)
+                results.append(result('eval', shape_type + ":" + backend, timing, points=num_points,
+                                      size=num_points * bshape.dimension * 8, delta=delta, backend=backend))
+    return results
+
+
+def bench_export(shapes, work_dir, repeat):
+    """Benchmarks the evaluated points writers and the CAD exchange format exporters"""
+    import copy
+    from . import cache
+    from . import utilities
+
+    results = []
+    for shape_type, shape in shapes:
+        # Evaluate once and keep the points, so that only the writers are measured
+        eshape = copy.copy(shape)
+        eshape.evaluator = cache.CachingEvaluator(eshape, shape.__class__().evaluator, keep=True)
+        eshape.delta = CLI_BENCH_EXPORT_DELTA[shape_type]
+        num_points = len(eshape.evalpts)
+
+        tasks = [('evalpts', fmt, utilities.export_evalpts) for fmt in CLI_BENCH_EVALPTS_FORMATS]
+        tasks += [('nurbs', fmt, utilities.export_nurbs) for fmt, types in sorted(CLI_BENCH_NURBS_FORMATS.items())
+                  if shape_type in types]
+        for kind, fmt, func in tasks:
+            out_dir = os.path.join(work_dir, "export_" + shape_type + "_" + fmt)
+
+            def setup():
+                shutil.rmtree(out_dir, ignore_errors=True)
+                os.mkdir(out_dir)
+
+            file_name = os.path.join(out_dir, "shape." + fmt)
+            name = kind + ":" + fmt + ":" + shape_type
+            try:
+                timing = measure(lambda: func(obj=eshape, file_name=file_name, export_format=fmt), setup=setup,
+                                 repeat=repeat)
+            except Exception as e:
+                # Report the failing exporters instead of stopping the benchmark suite
+                results.append(dict(stage='export', name=name, error=str(e)))
+                continue
+            finally:
+                size = sum(os.path.getsize(f) for f in glob.glob(os.path.join(out_dir, "*")))
+                shutil.rmtree(out_dir, ignore_errors=True)
+            results.append(result('export', name, timing, points=num_points, size=size,
+                                  delta=CLI_BENCH_EXPORT_DELTA[shape_type]))
+    return results
+
+
+def available_backends():
+    """Returns the list of the evaluation backends which can be used in the current environment"""
+    from . import backends
+
+    return [name for name in sorted(backends.CLI_EVAL_BACKENDS)
+            if name != 'numpy' or backends.np is not None]
+
+
+def run(stages=None, repeat=3, scale=1, deltas=None, backends=None, examples_dir=None):
+    """ Runs the benchmark suite.
+
+    :param stages: stages to run (default: all stages in :py:data:`CLI_BENCH_STAGES`)
+    :type stages: list, tuple
+    :param repeat: number of timed runs of each benchmark
+    :type repeat: int
+    :param scale: scale of the synthetic shapes
+    :type scale: int
+    :param deltas: evaluation deltas of the evaluation stage (default: :py:data:`CLI_BENCH_DELTAS`)
+    :type deltas: list, tuple
+    :param backends: evaluation backends of the evaluation stage (default: all available backends)
+    :type backends: list, tuple
+    :param examples_dir: directory of the example input files
+    :type examples_dir: str
+    :return: benchmark report
+    :rtype: dict
+    """
+    from geomdl import __version__ as geomdl_version
+
+    stages = stages or CLI_BENCH_STAGES
+    for stage in stages:
+        if stage not in CLI_BENCH_STAGES:
+            raise RuntimeError("Unknown benchmark stage '" + str(stage) + "'. Possible stages: " +
+                               ", ".join(CLI_BENCH_STAGES))
+
+    report = dict(
+        version=__version__,
+        geomdl_version=geomdl_version,
+        python_version=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        date=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        settings=dict(stages=list(stages), repeat=repeat, scale=scale),
+        results=[],
+    )
+
+    work_dir = tempfile.mkdtemp(prefix="geomdl-cli-bench-")
+    try:
+        shapes = synthetic_shapes(scale)
+        files = input_files(work_dir, shapes, examples_dir) if 'import' in stages or 'template' in stages else []
+        for stage in stages:
+            if stage == 'import':
+                report['results'] += bench_import(files, repeat)
+            elif stage == 'template':
+                report['results'] += bench_template(files, repeat)
+            elif stage == 'eval':
+                report['results'] += bench_eval(shapes, repeat, deltas, backends)
+            else:
+                report['results'] += bench_export(shapes, work_dir, repeat)
+            sys.stderr.write("Completed '" + stage + "' stage\n")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
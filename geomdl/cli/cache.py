@@ -0,0 +1,427 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Persistent cache of the parsed and evaluated shapes for geomdl-cli
+#
+
+import os
+import os.path
+import sys
+import stat
+import json
+import time
+import array
+import pickle
+import shutil
+import hashlib
+import itertools
+import collections
+from geomdl import __version__ as geomdl_version
+from geomdl import evaluators
+from . import __version__, __cli_config_dir__, config
+
+
+# Name of the file storing the parsed shapes inside a cache entry
+CACHE_SHAPES_FILE = "shapes.pkl"
+
+# Name template of the files storing the evaluated points inside a cache entry
+CACHE_POINTS_FILE = "points_{idx}.bin"
+
+# Input files larger than this size (in bytes) are identified by their path, size and modification time
+CACHE_HASH_MAX_SIZE = 16 * 1024 * 1024
+
+# Input file types which are always identified by their path, size and modification time
+CACHE_STAT_FILE_TYPES = ('gnb',)
+
+
+def cache_dir():
+    """ Returns the cache directory.
+
+    The default cache directory is ``cache`` directory inside the user configuration directory, e.g.
+    ``~/.geomdl-cli/cache``. It can be changed via ``cache_dir`` configuration variable.
+
+    :return: path to the cache directory
+    :rtype: str
+    """
+    if config.get('cache_dir', None):
+        return config['cache_dir']
+    return os.path.join(os.path.expanduser("~"), __cli_config_dir__, "cache")
+
+
+def is_private(path):
+    """ Checks if the directory is owned by the current user and cannot be written by the other users.
+
+    The cache entries are loaded via pickle, so only the private cache directories are used. The check always
+    passes on the platforms without the POSIX file ownership, e.g. Windows.
+
+    :param path: path to the directory
+    :type path: str
+    :return: True if the directory is private
+    :rtype: bool
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def cache_key(file_name, file_type, delta, indices=None, template=None, backend='geomdl'):
+    """ Generates the cache key of the input file.
+
+    The key is computed from the file contents, the file type, the evaluation delta, the indices of the imported
+    shapes, the template processing option, the evaluation backend and geomdl and geomdl-cli versions, so any change in
+    the input file, in the options or in the libraries invalidates the cached data.
+
+    The gnb files and the files larger than :py:data:`CACHE_HASH_MAX_SIZE` are identified by their absolute path, size
+    and modification time instead of their contents, so that the key does not read the complete file, e.g. when only
+    a few shapes of a large gnb file are selected.
+
+    :param file_name: input file name
+    :type file_name: str
+    :param file_type: input file type
+    :type file_type: str
+    :param delta: evaluation delta
+    :type delta: float
+    :param indices: indices of the imported shapes (default: all shapes)
+    :type indices: list
+    :param template: template processing option; True, False or None for detecting the templates automatically
+    :type template: bool
+    :param backend: evaluation backend
+    :type backend: str
+    :return: cache key
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    st = os.stat(file_name)
+    if file_type in CACHE_STAT_FILE_TYPES or st.st_size > CACHE_HASH_MAX_SIZE:
+        h.update("|".join([os.path.abspath(file_name), str(st.st_size), str(st.st_mtime_ns)]).encode('utf-8'))
+    else:
+        with open(file_name, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b""):
+                h.update(chunk)
+    h.update("|".join([file_type, repr(float(delta)), repr(template), str(backend),
+                       geomdl_version, __version__]).encode('utf-8'))
+    if indices is not None:
+        h.update(("|" + ",".join(str(idx) for idx in indices)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _write_atomic(file_name, content):
+    """Writes the file contents via a temporary file to prevent partially written cache files"""
+    tmp_name = file_name + ".tmp" + str(os.getpid())
+    with open(tmp_name, 'wb') as fp:
+        fp.write(content)
+    os.replace(tmp_name, file_name)
+
+
+def _pack_points(points, eval_range):
+    """Packs the evaluated points as a JSON header line followed by little-endian float64 values"""
+    dim = len(points[0]) if points else 0
+    header = dict(dim=dim, count=len(points), range=eval_range)
+    arr = array.array('d', itertools.chain.from_iterable(points))
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return json.dumps(header).encode('utf-8') + b"\n" + arr.tobytes()
+
+
+def _unpack_points(content):
+    """Unpacks the evaluated points packed by :py:func:`_pack_points`"""
+    pos = content.index(b"\n")
+    header = json.loads(content[:pos].decode('utf-8'))
+    arr = array.array('d')
+    arr.frombytes(content[pos + 1:])
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    dim = header['dim']
+    points = [arr[i:i + dim].tolist() for i in range(0, len(arr), dim)]
+    return header['range'], points
+
+
+def _eval_range(shape, kwargs):
+    """Generates a key from the evaluation range and the sample size of the shape"""
+    def to_list(val):
+        return list(val) if isinstance(val, (list, tuple)) else [val]
+    return [to_list(kwargs.get('start', None)), to_list(kwargs.get('stop', None)), to_list(shape.sample_size)]
+
+
+class CachingEvaluator(evaluators.AbstractEvaluator):
+    """ Evaluator returning the cached evaluated points.
+
+    Wraps the original evaluator of the shape. If the shape is evaluated in the same range with the same sample size
+    as the cached points, the cached points are returned; otherwise, the original evaluator is called and the newly
+    evaluated points are passed to the callback function for storing.
+    """
+    def __init__(self, shape, evaluator, points=None, eval_range=None, callback=None, keep=False):
+        super(CachingEvaluator, self).__init__(name=evaluator.name)
+        self._shape = shape
+        self._evaluator = evaluator
+        self._points = points
+        self._range = eval_range
+        self._callback = callback
+        self._keep = keep
+        self._pending = None
+
+    @property
+    def wrapped(self):
+        """Evaluator used for the shapes which are not in the cache"""
+        return self._evaluator
+
+    @wrapped.setter
+    def wrapped(self, value):
+        self._evaluator = value
+
+    def is_cached(self):
+        """Checks if there are cached points for the current sample size of the shape"""
+        sample_size = _eval_range(self._shape, {})[2]
+        if self._pending is not None:
+            return self._pending[1] == sample_size
+        return self._points is not None and self._range[2] == sample_size
+
+    def preload(self, points):
+        """ Sets the points to return from the next evaluation of the complete shape.
+
+        The points are used if the sample size of the shape does not change until the evaluation, e.g. the points
+        computed in another process.
+
+        :param points: evaluated points
+        :type points: list
+        """
+        self._pending = (points, _eval_range(self._shape, {})[2])
+
+    def evaluate(self, *args, **kwargs):
+        eval_range = _eval_range(self._shape, kwargs)
+        if self._points is not None and eval_range == self._range:
+            return self._points
+        if self._pending is not None and eval_range[0] != eval_range[1] and eval_range[2] == self._pending[1]:
+            points = self._pending[0]
+            self._pending = None
+        else:
+            points = self._evaluator.evaluate(*args, **kwargs)
+        # Single point evaluations use the same start and stop values, no need to store them
+        if eval_range[0] != eval_range[1]:
+            if self._callback is not None:
+                self._callback(points, eval_range)
+            if self._keep:
+                self._points = points
+                self._range = eval_range
+        return points
+
+    def derivatives(self, *args, **kwargs):
+        return self._evaluator.derivatives(*args, **kwargs)
+
+
+class ShapeCache(object):
+    """ Size-bounded on-disk cache of the parsed and evaluated shapes.
+
+    Each cache entry is a directory named by the cache key, containing the pickled shapes and the evaluated points
+    of each shape in binary format. The least recently used entries are removed when the cache size exceeds the
+    limit after writing the shapes or the evaluated points.
+
+    Long-running processes, e.g. the evaluation server, can also keep the recently used shapes and their evaluated
+    points in the memory by setting :py:attr:`memory_entries` class attribute.
+
+    The cache directory is created accessible only by the current user. The cache is not used if the directory is
+    owned by another user or can be written by the other users (see :py:func:`is_private`).
+
+    :param root: cache directory (default is the value returned by :py:func:`cache_dir`)
+    :type root: str
+    :param max_size: maximum cache size in megabytes (default is ``cache_size`` configuration variable)
+    :type max_size: int, float
+    """
+    # Number of entries to keep in the memory (shared by all instances in the process)
+    memory_entries = 0
+    _memory = collections.OrderedDict()
+
+    def __init__(self, root=None, max_size=None):
+        self._root = root if root else cache_dir()
+        self._max_size = float(max_size if max_size is not None else config.get('cache_size', 512)) * 1024 * 1024
+        self._size = None  # estimated cache size in bytes, None if it is not computed yet
+
+    @property
+    def root(self):
+        """Cache directory"""
+        return self._root
+
+    def _entry_dir(self, key):
+        return os.path.join(self._root, key)
+
+    def _install_evaluators(self, key, shapes, points=None):
+        """Replaces the evaluators of the shapes with the caching evaluators"""
+        entry_dir = self._entry_dir(key)
+        for idx, shape in enumerate(shapes):
+            def store(pts, eval_range, idx=idx):
+                try:
+                    content = _pack_points(pts, eval_range)
+                    _write_atomic(os.path.join(entry_dir, CACHE_POINTS_FILE.format(idx=idx)), content)
+                    self._written(len(content))
+                except (IOError, OSError):
+                    pass
+            eval_range, pts = points[idx] if points and idx in points else (None, None)
+            shape.evaluator = CachingEvaluator(shape, shape.evaluator, pts, eval_range, store,
+                                               keep=self.memory_entries > 0)
+        self._remember(key, shapes)
+        return shapes
+
+    def _written(self, num_bytes):
+        """Updates the estimated cache size after writing a cache file and evicts the entries if it exceeds the limit"""
+        if self._size is None:
+            self._size = sum([e['size'] for e in self.entries()])
+        else:
+            self._size += num_bytes
+        if self._size > self._max_size:
+            self.evict()
+
+    def _remember(self, key, shapes):
+        """Keeps the shapes in the memory, if enabled"""
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = shapes
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def load(self, key):
+        """ Loads the shapes from the cache.
+
+        :param key: cache key
+        :type key: str
+        :return: list of shapes or None, if the key does not exist in the cache
+        :rtype: list
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if not is_private(self._root):
+            return None
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, CACHE_SHAPES_FILE), 'rb') as fp:
+                shapes = pickle.load(fp)
+            points = {}
+            for idx in range(len(shapes)):
+                fname = os.path.join(entry_dir, CACHE_POINTS_FILE.format(idx=idx))
+                if os.path.isfile(fname):
+                    with open(fname, 'rb') as fp:
+                        points[idx] = _unpack_points(fp.read())
+            # Update access time for LRU eviction
+            os.utime(entry_dir, None)
+        except Exception:
+            return None
+        return self._install_evaluators(key, shapes, points)
+
+    def store(self, key, shapes):
+        """ Stores the shapes in the cache.
+
+        The evaluated points are stored later, when the shapes are evaluated for the first time.
+
+        :param key: cache key
+        :type key: str
+        :param shapes: list of shapes
+        :type shapes: list
+        :return: list of shapes
+        :rtype: list
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            if not os.path.isdir(self._root):
+                os.makedirs(self._root, mode=0o700)
+            if not is_private(self._root):
+                return shapes
+            if not os.path.isdir(entry_dir):
+                os.makedirs(entry_dir)
+            content = pickle.dumps(shapes, protocol=pickle.HIGHEST_PROTOCOL)
+            _write_atomic(os.path.join(entry_dir, CACHE_SHAPES_FILE), content)
+            self._written(len(content))
+        except (IOError, OSError):
+            return shapes
+        return self._install_evaluators(key, shapes)
+
+    def entries(self):
+        """ Returns the cache entries, from the most recently used to the least recently used.
+
+        :return: list of dicts containing key, size (in bytes) and last access time of the entries
+        :rtype: list
+        """
+        result = []
+        if not os.path.isdir(self._root):
+            return result
+        for key in os.listdir(self._root):
+            entry_dir = self._entry_dir(key)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = 0
+            for fn in os.listdir(entry_dir):
+                try:
+                    size += os.path.getsize(os.path.join(entry_dir, fn))
+                except OSError:
+                    pass
+            result.append(dict(key=key, size=size, time=os.path.getmtime(entry_dir)))
+        return sorted(result, key=lambda e: e['time'], reverse=True)
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache size is below the limit.
+
+        :return: number of removed entries
+        :rtype: int
+        """
+        entries = self.entries()
+        total = sum([e['size'] for e in entries])
+        removed = 0
+        while entries and total > self._max_size:
+            entry = entries.pop()
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+            total -= entry['size']
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        """ Removes all cache entries.
+
+        :return: number of removed entries
+        :rtype: int
+        """
+        self._memory.clear()
+        self._size = None
+        entries = self.entries()
+        for entry in entries:
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+        return len(entries)
+
+    def stats(self):
+        """ Returns the cache statistics.
+
+        :return: dict containing the cache directory, its privacy, number of entries, total size and size limit (in
+            bytes)
+        :rtype: dict
+        """
+        entries = self.entries()
+        return dict(
+            root=self._root,
+            private=is_private(self._root) if os.path.isdir(self._root) else True,
+            entries=len(entries),
+            size=sum([e['size'] for e in entries]),
+            max_size=int(self._max_size),
+            last_used=time.ctime(entries[0]['time']) if entries else None,
+        )
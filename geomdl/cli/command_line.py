@@ -28,6 +28,8 @@ import sys
 import importlib
 import json
 from . import __cli_name__, __cli_commands__, __cli_config__, __cli_config_dir__, __cli_config_file__
+from . import server
+from . import timings
 
 
 def enable_user_config(data):
@@ -83,8 +85,9 @@ def main():
     # Default user configuration directories
     user_config_root_dirs = [os.getcwd(), os.path.expanduser("~")]
     # Load user commands
-    for root_dir in user_config_root_dirs:
-        load_custom_config(root_dir)
+    with timings.stage('config'):
+        for root_dir in user_config_root_dirs:
+            load_custom_config(root_dir)
 
     # Extract command parameters and update sys.argv
     command_params = {}
@@ -111,13 +114,27 @@ def main():
     # Get command name
     cmd_name = str(sys.argv[1])
 
+    # Forward the command to the evaluation server, if it is running
+    if cmd_name in server.CLI_FORWARD_COMMANDS:
+        response = server.forward(cmd_name, sys.argv[2:], command_params)
+        if response is not None:
+            print(response['output'], end="")
+            if response['error']:
+                print("An error occurred: {}".format(response['error']))
+            sys.exit(response['status'])
+
+    # Report the stage timings on exit
+    timings.timer.enabled = "timings" in command_params
+    timings.timer.command = cmd_name
+
     # Command execution
     try:
         # Load the command information from the command dictionary
         command = __cli_commands__[cmd_name]
 
         # Import the module and get the function to be executed
-        module = importlib.import_module(command['module'])
+        with timings.stage('import'):
+            module = importlib.import_module(command['module'])
         func = getattr(module, command['func'])
 
         # Print command help if "--help" is present in the command arguments
@@ -135,10 +152,14 @@ def main():
                           __cli_name__ + " " + cmd_name + " --help' for command help.")
                     sys.exit(0)
                 # Call the command with the command arguments
-                func(*sys.argv[2:], **command_params)
+                cmd_args = sys.argv[2:]
             else:
                 # Call the command without the command arguments
-                func(**command_params)
+                cmd_args = []
+            if "profile" in command_params:
+                timings.profile(func, str(command_params['profile']), *cmd_args, **command_params)
+            else:
+                func(*cmd_args, **command_params)
         except KeyError:
             print("Problem executing " + cmd_name.upper() + " command. Please see the documentation for details.")
             sys.exit(1)
@@ -146,11 +167,18 @@ def main():
         print("The command " + cmd_name.upper() + " is not available. Please run '" + __cli_name__ +
               " help' to see the list of commands available.")
         sys.exit(1)
+    except BrokenPipeError:
+        # The reader of the standard output exited before the end of the output, e.g. head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except Exception as e:
         print("An error occurred: {}".format(e.args[-1]))
         if "debug" in command_params:
             import traceback; traceback.print_exc()
         sys.exit(1)
+    finally:
+        if timings.timer.enabled:
+            timings.timer.report()
 
     # Command execution completed
     sys.exit(0)
@@ -21,11 +21,18 @@
 #
 # geomdl-cli command definitions
 #
+# Please keep the module-level imports lightweight. The heavy dependencies, e.g. geomdl, matplotlib, Jinja2, should
+# be imported inside the commands requiring them to keep "help", "version" and "config" commands fast.
+#
 
+import os
+import sys
 from . import __version__
 from . import __cli_commands__
 from . import config
-from . import utilities
+from . import batch
+from . import streams
+from . import timings
 
 
 def command_help(**kwargs):
@@ -44,6 +51,12 @@ Usage:
 Individual command help available via
 
     geomdl-cli {command} --help
+
+Global parameters:
+
+    --timings       reports the wall time and the peak memory usage of each stage as JSON lines on stderr
+    --profile=fn    profiles the command via cProfile and tracemalloc and saves the results as 'fn' and 'fn.mem'
+    --debug         displays the traceback of the errors
 """
     # Display the package help
     print(help_text)
@@ -57,8 +70,9 @@ def command_version(**kwargs):
     """\
 VERSION: Displays geomdl-cli and geomdl version\
     """
+    from geomdl import __version__ as geomdl_version
     print("geomdl-cli version", __version__)
-    utilities.print_version()
+    print("geomdl version", geomdl_version)
 
 
 def command_config(**kwargs):
@@ -70,12 +84,202 @@ CONFIG: Displays geomdl-cli configuration\
         print("- {k}: {v}".format(k=cfg[0], v=cfg[1]))
 
 
+def command_cache(**kwargs):
+    """\
+CACHE: Displays and clears the cache of the parsed and evaluated shapes
+
+'plot', 'eval' and 'export' commands store the parsed shapes and their evaluated points in a persistent cache. \
+The repeated runs over the unchanged input files skip parsing and evaluation. The cache entries are keyed by the \
+input file contents, file type, evaluation delta, shape indices, template processing option, evaluation backend and \
+geomdl version. The least recently used entries are removed when the cache size exceeds the limit.
+
+The cache entries are loaded via pickle, so the cache directory must be trusted. It is created accessible only by the \
+current user, and the cache is not used if the directory is owned by another user or can be written by other users.
+
+Usage:
+
+    geomdl-cli cache                displays the cache statistics
+    geomdl-cli cache --list         lists the cache entries
+    geomdl-cli cache --clear        removes all cache entries
+
+Available parameters:
+
+    --help          displays this message
+    --list          lists the cache entries, from the most recently used to the least recently used
+    --clear         removes all cache entries
+
+Configuration variables:
+
+    cache_enabled   enables the cache ('--no-cache' parameter disables it for a single run)
+    cache_dir       cache directory (default: cache directory inside the user configuration directory)
+    cache_size      maximum cache size in megabytes
+
+Please see the documentation for more details.\
+    """
+    import time
+    from . import cache
+
+    shape_cache = cache.ShapeCache()
+    if 'clear' in kwargs:
+        print("Removed {n} cache entries from {d}".format(n=shape_cache.clear(), d=shape_cache.root))
+        return
+
+    if 'list' in kwargs:
+        for entry in shape_cache.entries():
+            print("{k}  {s:>10.1f} KB  {t}".format(k=entry['key'], s=entry['size'] / 1024.0,
+                                                   t=time.ctime(entry['time'])))
+        return
+
+    stats = shape_cache.stats()
+    print("Cache directory:", stats['root'])
+    print("Cache enabled:", bool(config['cache_enabled']))
+    if not stats['private']:
+        print("Warning: the cache directory is not private (owned by another user or writable by other users), "
+              "the cache is not used")
+    print("Number of entries:", stats['entries'])
+    print("Cache size: {s:.1f} MB (limit: {m:.1f} MB)".format(s=stats['size'] / 1048576.0,
+                                                             m=stats['max_size'] / 1048576.0))
+    if stats['last_used']:
+        print("Last used:", stats['last_used'])
+
+
+def command_serve(**kwargs):
+    """\
+SERVE: Runs a local evaluation server
+
+'geomdl-cli serve' command starts a long-running server which keeps the interpreter, the imported modules and the \
+recently used shapes in the memory. The server runs the commands on a bounded pool of worker processes.
+
+While the server is running, 'eval', 'export' and 'plot' (only with '--name' parameter) commands are automatically \
+forwarded to the server over the Unix socket and the command output is printed by the client. The forwarded \
+commands run with the configuration and the user-defined commands of the client. '--local' parameter runs a command \
+without forwarding.
+
+The server can also be used directly by sending a JSON request per line over the Unix socket, or as an HTTP POST \
+request to /run when the server is started with '--port' parameter:
+
+    {"command": "eval", "args": ["shape.yaml"], "params": {"format": "csv"}, "cwd": "/path/to/dir"}
+
+The response contains the exit status, the command output (e.g. the evaluated points) and the error message:
+
+    {"status": 0, "output": "...", "error": null}
+
+The optional "config", "commands" and "path" keys replace the configuration, the command definitions and the \
+module search paths of the server while the command is running. The server runs only 'eval', 'export' and 'plot' \
+commands and the HTTP server does not accept "commands" and "path" keys.
+
+The HTTP server prints an access token on start, which must be sent in 'Authorization: Bearer <token>' header of \
+each request. The POST requests must have 'application/json' content type and the requests sent by web pages, i.e. \
+with a foreign 'Origin' header, are rejected.
+
+Usage:
+
+    geomdl-cli serve                        starts the server on the Unix socket
+    geomdl-cli serve --jobs=4               starts the server with 4 worker processes
+    geomdl-cli serve --port=8080            starts the server on http://127.0.0.1:8080
+    geomdl-cli serve --stop                 stops the server running on the Unix socket
+    geomdl-cli serve --status               displays the status of the server running on the Unix socket
+
+Available parameters:
+
+    --help          displays this message
+    --socket=path   path to the Unix socket (default: server.sock inside the user configuration directory)
+    --port=n        serves over HTTP on localhost instead of the Unix socket
+    --token=t       access token of the HTTP server (default: a random token printed on start)
+    --jobs=n        number of worker processes (n = 0 uses all available cores, default n = 1)
+    --stop          stops the server
+    --status        displays the server status
+
+Configuration variables:
+
+    serve_socket            default value for '--socket' parameter
+    serve_forward           set to false to disable forwarding the commands to the server
+    serve_cache_entries     number of input files whose shapes are kept in the memory
+    serve_token             default value for '--token' parameter
+
+Please see the documentation for more details.\
+    """
+    from . import server
+
+    if 'stop' in kwargs or 'status' in kwargs:
+        request = dict(command='__shutdown__' if 'stop' in kwargs else '__status__')
+        response = server.send_request(request, path=kwargs.get('socket', None))
+        if response is None:
+            raise RuntimeError("The server is not running")
+        if 'stop' in kwargs:
+            print(response['output'], end="")
+        else:
+            print("Server is running (pid: {p}, workers: {j})".format(p=response['pid'], j=response['jobs']))
+        return
+
+    server.serve(**kwargs)
+
+
+def command_bench(**kwargs):
+    """\
+BENCH: Benchmarks the parsing, evaluation and export stages
+
+'geomdl-cli bench' command runs a benchmark suite on the example files and on synthetically generated large curves, \
+surfaces and volumes. Each stage is timed separately:
+
+    - import: parsing the input files in each supported format (cfg, yaml and json)
+    - template: Jinja2 template processing of the input files
+    - eval: evaluating the shapes at several deltas using each available evaluation backend
+    - export: each evaluated points format of 'eval' command and each CAD exchange format of 'export' command
+
+The results are printed in JSON format. Each result contains the best and the mean run time in seconds, the peak \
+memory usage in bytes measured via tracemalloc and, when applicable, the throughput in points per second and \
+megabytes per second. The results of different releases can be compared to find the performance regressions.
+
+Usage:
+
+    geomdl-cli bench                                runs all benchmarks and prints the results
+    geomdl-cli bench --name=results.json            saves the results as 'results.json'
+    geomdl-cli bench --stage=eval --scale=2         runs the evaluation benchmarks on larger shapes
+
+Available parameters:
+
+    --help          displays this message
+    --stage=s       comma-separated list of the stages to run (default: import,template,eval,export)
+    --repeat=n      number of timed runs of each benchmark (default n = 3)
+    --scale=n       scale of the synthetic shapes (default n = 1)
+    --delta=d       comma-separated list of the evaluation deltas to benchmark (default: depends on the shape type)
+    --backend=b     comma-separated list of the evaluation backends to benchmark (default: all available backends)
+    --input=dir     directory of the example files (default: "examples" directory of the source tree)
+    --name=fn       saves the results as a file
+
+Please see the documentation for more details.\
+    """
+    import json
+    from . import bench
+
+    def split_list(value, conv=str):
+        return [conv(v.strip()) for v in str(value).split(",") if v.strip()] if value else None
+
+    report = bench.run(
+        stages=split_list(kwargs.get('stage', None)),
+        repeat=int(kwargs.get('repeat', 3)),
+        scale=int(kwargs.get('scale', 1)),
+        deltas=split_list(kwargs.get('delta', None), float),
+        backends=split_list(kwargs.get('backend', None)),
+        examples_dir=kwargs.get('input', None)
+    )
+    output = json.dumps(report, indent=2)
+    if 'name' in kwargs:
+        with open(kwargs['name'], 'w') as fp:
+            fp.write(output + "\n")
+        print("Benchmark results saved as", kwargs['name'])
+    else:
+        print(output)
+
+
 def command_plot(file_name, **kwargs):
     """\
 PLOT: Plots NURBS curves and surfaces using matplotlib
 
 'geomdl-cli plot' command takes a supported file type as an input and plots the NURBS curves and/or surfaces in the \
-input file. The supported file types are: libconfig (.cfg), YAML (.yaml) and JSON (.json)
+input file. The supported file types are: libconfig (.cfg), YAML (.yaml), JSON (.json), NDJSON shape streams (.ndjson) \
+and geomdl-cli binary (.gnb)
 
 The input files can be created manually or can be exported via appropriate 'geomdl' API call. Please see \
 'geomdl.exchange' documentation for importing and exporting NURBS shapes in the supported file formats.
@@ -86,20 +290,43 @@ Usage:
     geomdl-cli plot {file} --delta=0.1                 plots the shape using the evaluation delta of 0.1
     geomdl-cli plot {file} --index=2                   plots the 2nd shape defined in the input file
     geomdl-cli plot {file} --index=1 --delta=0.025     plots the 1st shape using the evaluation delta of 0.025
+    geomdl-cli plot {file} --index=0,4-6               plots the shapes with the indices 0, 4, 5 and 6
+    geomdl-cli plot {dir} --name=thumbs --jobs=4       renders all shapes in the directory as png files
 
 Available parameters:
 
     --help          displays this message
     --type=t        defines the input file type
-    --index=n       plots n-th curve or surface in the input file (works only for multi shapes)
+    --index=i       plots the selected shapes of a multi shape file (e.g. 3 or 3,7,10-20)
     --delta=d       overrides pre-defined evaluation delta in the input file (0.0 < d < 1.0)
-    --name=fn       saves the figure as a file (the figure window will not open if this parameter is set)
+    --tolerance=e   evaluates the curves and surfaces adaptively with the maximum chordal error e (overrides delta)
+    --name=fn       saves the figure as a file (the figure window will not open if this parameter is set), "-" writes \
+the image to the standard output
+    --format=f      image format of the figures in batch mode or on the standard output (default f = png)
+    --max-points=n  maximum number of the plotted points of each shape (n = 0 plots all evaluated points)
     --vis           sets the visualization options
+    --backend=b     sets the evaluation backend (b should be one of them: geomdl or numpy)
+    --no-cache      disables the cache of the parsed and evaluated shapes
+    --no-template   skips the Jinja2 template processing of the input file
+    --jobs=n        number of worker processes for the input files in batch mode or for the shapes of a multi shape \
+file (n = 0 uses all available cores)
+
+Batch mode:
+
+{file} can also be a directory, a glob pattern or a manifest file prefixed by '@' (e.g. @files.txt) which lists \
+one input file per line. In batch mode, the shapes are rendered as images without opening any windows, '--name' sets \
+the output directory and '--format' sets the image format. The image file names keep the extension of the input \
+files, e.g. surface.yaml.png, and the conflicting outputs fail without running. Each worker process reuses a single \
+headless figure for all of its input files. The 'ctrlpts', 'evalpts' and 'axes' visualization options are supported \
+in batch mode.
 
 Configuration variables:
 
-    plot_vis        default value for '--vis' parameter
-    plot_name       default value for '--name' parameter
+    plot_vis                default value for '--vis' parameter
+    plot_name               default value for '--name' parameter
+    plot_max_points         default value for '--max-points' parameter
+    backend                 default value for '--backend' parameter
+    adaptive_max_points     maximum number of points evaluated by '--tolerance' parameter
 
 Visualization options:
 
@@ -115,28 +342,30 @@ The following examples illustrate some ways to input the visualization options t
 
 Notes:
 
-    - If this command is too slow for you, please set the delta value to a bigger value, e.g. 0.05 or 0.1.
+    - The number of the plotted points of each shape is limited by '--max-points' parameter. The smaller shapes of \
+a model, e.g. the patches of a multi-patch surface, are evaluated with proportionally fewer points and the control \
+grids are hidden if the model has more control points than the limit. '--vis="ctrlpts:on"' displays them anyway. \
+The limit of 'plot_max_points' configuration variable is not applied if '--delta' parameter is set.
+    - If this command is still too slow for you, please set the delta value to a bigger value, e.g. 0.05 or 0.1, or \
+use the numpy backend via '--backend=numpy'.
     - Please note that you may only export the figure in the file formats which matplotlib support.
 
 Please see the documentation for more details.\
     """
-    def parse_vis_options(options_str):
-        row_sep = ";"
-        col_sep = ":"
-        off_on = {'off': False, 'on': True}
-        options_arr = options_str.split(row_sep)
-        ret_dict = {}
-        print("Visualization options:")
-        for idx, opt in enumerate(options_arr):
-            opt = opt.strip().split(col_sep)
-            if len(opt) != 2:
-                continue
-            opt[0] = opt[0].strip()
-            opt[1] = opt[1].strip()
-            if opt[1] in off_on:
-                ret_dict[opt[0]] = off_on[opt[1]]
-                print("- {k}: {v}".format(k=opt[0], v=opt[1]))
-        return ret_dict
+    # Render the input files as images in batch mode
+    if batch.is_batch(file_name):
+        _run_batch(_render_file, file_name, kwargs.get('format', 'png'), kwargs)
+        return
+
+    # Render the image headlessly for the standard output
+    if streams.is_stdio(kwargs.get('name', config['plot_name'])):
+        kwargs['name'] = streams.CLI_STDIO_NAME
+        kwargs['backend'] = kwargs.get('backend', config['backend'])
+        _render_file(file_name, **kwargs)
+        return
+
+    with timings.stage('import'):
+        from . import utilities
 
     # Get keyword arguments
     file_type = kwargs.get('type', '')
@@ -144,6 +373,7 @@ Please see the documentation for more details.\
     shape_delta = kwargs.get('delta', -1.0)
     save_file_name = kwargs.get('name', config['plot_name'])
     vis_options = kwargs.get('vis', config['plot_vis'])
+    backend = kwargs.get('backend', config['backend'])
 
     # Prepare render method parameters
     if save_file_name:
@@ -156,10 +386,99 @@ Please see the documentation for more details.\
         file_name=file_name,
         delta=shape_delta,
         shape_idx=shape_idx,
-        file_type=file_type
+        file_type=file_type,
+        use_cache=_use_cache(kwargs),
+        backend=backend,
+        use_template=_use_template(kwargs)
+    )
+    vis_options = _parse_vis_options(vis_options)
+    if 'tolerance' in kwargs:
+        from . import adaptive
+        adaptive.evaluate_adaptive(ns, kwargs['tolerance'])
+        # Keep the adaptive sample sizes of the shapes while rendering the containers
+        render_params['delta'] = False
+    else:
+        lod_enabled = _apply_lod(ns, vis_options, kwargs)
+        if lod_enabled:
+            # Keep the sample sizes of the shapes selected by LOD while rendering the containers
+            render_params['delta'] = False
+        batch.evaluate_parallel(ns, jobs=kwargs.get('jobs', 1), backend=backend, update_delta=not lod_enabled)
+    with timings.stage('render'):
+        utilities.build_vis(obj=ns, **vis_options)
+        ns.render(**render_params)
+
+
+def _parse_vis_options(options_str, verbose=True):
+    """Parses the visualization options of PLOT command, e.g. ctrlpts:off;axes:off"""
+    row_sep = ";"
+    col_sep = ":"
+    off_on = {'off': False, 'on': True}
+    options_arr = options_str.split(row_sep)
+    ret_dict = {}
+    if verbose:
+        print("Visualization options:")
+    for idx, opt in enumerate(options_arr):
+        opt = opt.strip().split(col_sep)
+        if len(opt) != 2:
+            continue
+        opt[0] = opt[0].strip()
+        opt[1] = opt[1].strip()
+        if opt[1] in off_on:
+            ret_dict[opt[0]] = off_on[opt[1]]
+            if verbose:
+                print("- {k}: {v}".format(k=opt[0], v=opt[1]))
+    return ret_dict
+
+
+def _apply_lod(obj, vis_options, kwargs):
+    """ Selects the evaluation density of the shapes for plotting (used by PLOT command).
+
+    Hides the control grids of the dense models, unless they are enabled via '--vis' parameter. Returns True if the
+    sample sizes of the shapes are changed. An explicit '--delta' parameter disables the default point limit of the
+    configuration, so that the shapes are plotted with the requested delta unless '--max-points' is also set.
+    """
+    if 'max-points' in kwargs:
+        max_points = int(kwargs['max-points'] or 0)
+    elif 'delta' in kwargs:
+        return False
+    else:
+        max_points = int(config['plot_max_points'] or 0)
+    if max_points <= 0:
+        return False
+    from . import lod
+    if not lod.apply_lod(obj, max_points) and 'ctrlpts' not in vis_options:
+        vis_options['ctrlpts'] = False
+    return True
+
+
+def _render_file(file_name, **kwargs):
+    """Renders a single input file as an image using the headless renderer (used by PLOT command in batch mode)"""
+    with timings.stage('import'):
+        from . import utilities
+        from . import render
+
+    ns = utilities.generate_nurbs_from_file(
+        file_name=file_name,
+        delta=kwargs.get('delta', -1.0),
+        shape_idx=kwargs.get('index', -1),
+        file_type=kwargs.get('type', ''),
+        use_cache=_use_cache(kwargs),
+        backend=kwargs['backend'],
+        use_template=_use_template(kwargs)
     )
-    utilities.build_vis(obj=ns, **parse_vis_options(vis_options))
-    ns.render(**render_params)
+    vis_options = _parse_vis_options(kwargs.get('vis', config['plot_vis']), verbose=False)
+    if 'tolerance' in kwargs:
+        from . import adaptive
+        adaptive.evaluate_adaptive(ns, kwargs['tolerance'])
+    else:
+        _apply_lod(ns, vis_options, kwargs)
+    with timings.stage('render'):
+        if streams.is_stdio(kwargs['name']):
+            # Some image formats seek while saving, the image is buffered until it is complete
+            with streams.open_output(kwargs['name'], 'wb', spooled=True) as fp:
+                render.render_shapes(ns, fp, options=vis_options, image_format=kwargs.get('format', 'png'))
+        else:
+            render.render_shapes(ns, kwargs['name'], options=vis_options)
 
 
 def command_eval(file_name, **kwargs):
@@ -167,7 +486,8 @@ def command_eval(file_name, **kwargs):
 EVAL: Evaluates NURBS curves and surfaces and prints the evaluated points or exports them as a file
 
 'geomdl-cli eval' command takes a supported file type as an input and plots the NURBS curves and/or surfaces in the \
-input file. The supported file types are: libconfig (.cfg), YAML (.yaml) and JSON (.json)
+input file. The supported file types are: libconfig (.cfg), YAML (.yaml), JSON (.json), NDJSON shape streams (.ndjson) \
+and geomdl-cli binary (.gnb)
 
 The input files can be created manually or can be exported via appropriate 'geomdl' API call. Please see \
 'geomdl.exchange' documentation for importing and exporting NURBS shapes in the supported file formats.
@@ -176,23 +496,88 @@ The default behavior of the command is printing the evaluated surface or curve p
 and surfaces, there will be a "---" line between the evaluated points of the individual shapes. This command can also \
 export the evaluated points in various formats, such as CSV, TXT and legacy VTK.
 
+The txt format contains the evaluated points as comma-separated values like the csv format, without the header line. \
+Please note that the earlier versions wrote the control points in txt format, as geomdl's txt exporter only writes \
+control points. The shapes of multi shape files are evaluated with the delta of the container, i.e. '--delta' value \
+or geomdl default, as in the earlier versions; the deltas of the individual shapes in the file are not used.
+
+The binary formats store the evaluated points as little-endian float arrays which can be loaded without parsing, \
+e.g. numpy.load(file_name, mmap_mode='r'):
+
+    - npy: a single (number of points, dimension) array containing the points of all shapes
+    - npz: an archive containing an array for each shape, shaped by the sample size of the shape
+    - raw: raw binary data with a JSON sidecar file ({name}.json, without the compression extension) describing the \
+data type and the shape offsets
+
+The VTK formats store the curves as poly lines and the surfaces and volumes as structured grids:
+
+    - vtk: legacy VTK unstructured grid containing all shapes
+    - vts, vtp: VTK XML structured grid (surfaces and volumes) and poly data (curves) for single shapes
+    - vtm: VTK XML multiblock data set referencing a vts or vtp file for each shape
+
 Usage:
 
     geomdl-cli eval {file}                                 evaluates the shape and prints the points to the screen
     geomdl-cli eval {file} --format=csv --name=test.csv    exports the evaluated points in CSV format as 'test.csv'
+    geomdl-cli eval {file} --format=csv,npy,vtm            exports the evaluated points in multiple formats at once
+    geomdl-cli eval "shapes/*.yaml" --format=csv --jobs=4  exports the evaluated points of all matching files
 
 Available parameters:
 
     --help          displays this message
     --type=t        defines the input file type
-    --index=n       evaluates n-th curve or surface in the file (works only for multi shapes)
+    --index=i       evaluates the selected shapes of a multi shape file (e.g. 3 or 3,7,10-20)
     --delta=d       overrides pre-defined evaluation delta in the file (0.0 < d < 1.0)
-    --format=f      defines the export file format (f should be one of them: screen, csv, txt or vtk)
+    --tolerance=e   evaluates the curves and surfaces adaptively with the maximum chordal error e (overrides delta)
+    --format=f      defines the export file format (screen, csv, txt, npy, npz, raw, vtk, vts, vtp or vtm) or a \
+comma-separated list of them
     --name=fn       sets the export file name (default fn = input path and name + new extension)
+    --precision=p   number of decimal places of the evaluated points (default: full precision)
+    --dtype=t       data type of the binary formats (t should be one of them: float64 or float32)
+    --encoding=e    encoding of the VTK formats (e should be one of them: ascii, base64 or binary)
+    --backend=b     sets the evaluation backend (b should be one of them: geomdl or numpy)
+    --tile-size=n   evaluates and writes at most n points at once, which bounds the memory usage (n = 0 evaluates \
+complete shapes)
+    --no-cache      disables the cache of the parsed and evaluated shapes
+    --no-template   skips the Jinja2 template processing of the input file
+    --jobs=n        number of worker processes for the input files in batch mode or for the shapes of a multi shape \
+file (n = 0 uses all available cores)
+
+Batch mode:
+
+{file} can also be a directory, a glob pattern or a manifest file prefixed by '@' (e.g. @files.txt) which lists \
+one input file per line. In batch mode, '--name' sets the output directory and a summary of the successful and failed \
+files is printed at the end. The output file names keep the extension of the input files, e.g. surface.yaml.csv, and \
+the output directory mirrors the subdirectories of the input files. The input files whose outputs would overwrite an \
+input file or another output fail without running.
+
+Standard input and output:
+
+The file name '-' reads the standard input, which requires '--type' parameter, and '--name=-' writes to the standard \
+output, e.g. 'geomdl-cli export {file} --format=ndjson --name=- | geomdl-cli eval - --type=ndjson --format=csv'. The \
+shapes of the NDJSON streams are evaluated and written one by one as they are read.
+
+Compressed files:
+
+The input and output files with gz, xz or zst (requires zstandard package) extension are decompressed and compressed \
+while reading and writing, e.g. 'geomdl-cli eval surface.json.gz --format=csv --name=points.csv.gz'. The compressed \
+standard input is detected automatically.
+
+Tiled evaluation:
+
+With '--tile-size' parameter, the parameter grid of each shape is evaluated in blocks of at most n points which are \
+written before the next block is evaluated, so the memory usage depends on the tile size instead of the evaluation \
+delta, e.g. for volumes evaluated with small deltas. With geomdl backend, the output files are identical to the \
+complete evaluation. The shapes of a multi shape file are not evaluated in parallel and the tiles are not stored in \
+the cache. The tiles cannot be used with multiple export formats, including the tile size set by the configuration \
+variable, which can be disabled via '--tile-size=0'.
 
 Configuration variables:
 
-    eval_format     default value for '--format' parameter
+    eval_format             default value for '--format' parameter
+    eval_tile_size          default value for '--tile-size' parameter
+    backend                 default value for '--backend' parameter
+    adaptive_max_points     maximum number of points evaluated by '--tolerance' parameter
 
 Please see the documentation for more details.\
     """
@@ -200,24 +585,70 @@ Please see the documentation for more details.\
     export_format = kwargs.get('format', config['eval_format'])
 
     # Check user input
-    possible_types = ['screen', 'csv', 'txt', 'vtk']
-    if export_format not in possible_types:
-        ptypes_str = ", ".join([pt for pt in possible_types])
-        raise RuntimeError("Cannot export in '" + str(export_format) + "' format. Possible types: " + ptypes_str)
+    possible_types = ['screen', 'csv', 'txt', 'npy', 'npz', 'raw', 'vtk', 'vts', 'vtp', 'vtm']
+    export_format = ",".join(_parse_formats(export_format, possible_types))
 
+    # Process multiple input files
+    if batch.is_batch(file_name):
+        if 'screen' in export_format.split(","):
+            raise RuntimeError("Batch mode requires a file export format, e.g. --format=csv")
+        _run_batch(_eval_file, file_name, export_format, kwargs)
+        return
+
+    kwargs['format'] = export_format
+    _eval_file(file_name, **kwargs)
+
+
+def _eval_file(file_name, **kwargs):
+    """Evaluates a single input file (used by EVAL command)"""
+    with timings.stage('import'):
+        from . import utilities
+
+    export_format = kwargs['format']
     file_type = kwargs.get('type', '')
     shape_idx = kwargs.get('index', -1)
     shape_delta = kwargs.get('delta', -1.0)
-    export_filename = kwargs.get('name', utilities.replace_extension(file_name, export_format))
+    export_filename = kwargs.get('name', _output_name(file_name, export_format))
+    _check_output(file_name, export_filename)
+    precision = kwargs.get('precision', None)
+    dtype = kwargs.get('dtype', 'float64')
+    encoding = kwargs.get('encoding', 'binary')
+    backend = kwargs.get('backend', config['backend'])
+    tile_size = 0 if 'tolerance' in kwargs else int(kwargs.get('tile-size', config['eval_tile_size']) or 0)
+    if tile_size > 0 and ',' in export_format:
+        raise RuntimeError("Tiled evaluation ('--tile-size' parameter or eval_tile_size configuration variable) cannot "
+                           "be used with multiple export formats")
+
+    # The shapes of the NDJSON streams are evaluated and exported one by one as they are read
+    if ',' not in export_format and utilities.input_file_type(file_name, file_type) == 'ndjson':
+        ns = utilities.generate_nurbs_stream(file_name, shape_delta, shape_idx, backend=backend,
+                                             tolerance=kwargs.get('tolerance', None))
+        utilities.export_evalpts(obj=ns, file_name=export_filename, export_format=export_format,
+                                 precision=precision, dtype=dtype, encoding=encoding,
+                                 tile_size=tile_size, backend=backend)
+        return
 
     # Evaluate the NURBS object and display/export the evaluated points
     ns = utilities.generate_nurbs_from_file(
         file_name=file_name,
         delta=shape_delta,
         shape_idx=shape_idx,
-        file_type=file_type
+        file_type=file_type,
+        use_cache=_use_cache(kwargs),
+        backend=backend,
+        use_template=_use_template(kwargs)
     )
-    utilities.export_evalpts(obj=ns, file_name=export_filename, export_format=export_format)
+    if ',' in export_format:
+        _export_outputs(ns, file_name, export_format, kwargs)
+        return
+    if 'tolerance' in kwargs:
+        from . import adaptive
+        adaptive.evaluate_adaptive(ns, kwargs['tolerance'])
+    elif tile_size <= 0:
+        batch.evaluate_parallel(ns, jobs=kwargs.get('jobs', 1), backend=backend)
+    utilities.export_evalpts(obj=ns, file_name=export_filename, export_format=export_format,
+                             precision=precision, dtype=dtype, encoding=encoding, tile_size=tile_size,
+                             backend=backend)
 
 
 def command_export(file_name, **kwargs):
@@ -225,31 +656,69 @@ def command_export(file_name, **kwargs):
 EXPORT: Exports NURBS curves and surfaces in supported formats
 
 'geomdl-cli export' command takes a supported file type as an input and plots the NURBS curves and/or surfaces in the \
-input file. The supported file types are: libconfig (.cfg), YAML (.yaml) and JSON (.json)
+input file. The supported file types are: libconfig (.cfg), YAML (.yaml), JSON (.json), NDJSON shape streams (.ndjson) \
+and geomdl-cli binary (.gnb)
 
 The input files can be created manually or can be exported via appropriate 'geomdl' API call. Please see \
 'geomdl.exchange' documentation for importing and exporting NURBS shapes in the supported file formats.
 
-The following file types are supported for exporting: cfg, yaml, json, smesh, obj, stl, off. \
-Please see 'geomdl.exchange' module documentation for details on file export options.
+The following file types are supported for exporting: cfg, yaml, json, gnb, ndjson, smesh, vmesh, obj, stl, off. \
+Please see 'geomdl.exchange' module documentation for details on file export options. The evaluated points can also \
+be exported in the formats of 'eval' command, e.g. csv or vtk.
+
+Multiple formats can be exported at once via a comma-separated list, e.g. '--format=json,stl,obj,csv'. The input file \
+is parsed and evaluated only once and the output files are written concurrently, using the same evaluated points.
+
+The mesh formats (obj, stl and off) are triangulated and written surface by surface and row by row, so large \
+multi-surface models can be exported without keeping the complete mesh in the memory.
+
+The file name '-' reads the standard input, which requires '--type' parameter, and '--name=-' writes to the standard \
+output. The shapes of the NDJSON streams (ndjson format) are exported one by one as they are read in ndjson, obj, stl \
+and off formats, so the commands can be chained in pipelines. The input and output files with gz, xz or zst extension \
+are decompressed and compressed while reading and writing, e.g. '--name=surface.stl.gz'.
+
+The gnb format is the binary shape format of geomdl-cli. It can be imported faster than the text formats and only the \
+selected shapes are read from the file while using '--index' parameter.
 
 Usage:
 
     geomdl-cli export {file}                     exports the shape in pickle format (default)
     geomdl-cli export {file} --format=cfg        exports the shape in libconfig format
+    geomdl-cli export {file} --format=json,stl,csv    exports the shape in multiple formats at once
+    geomdl-cli export {dir} --format=stl --jobs=4     exports all shapes in the directory using 4 processes
 
 Available parameters:
 
     --help          displays this message
     --type=t        defines the input file type
-    --index=n       exports n-th curve or surface in the input file (works only for multi shapes)
+    --index=i       exports the selected shapes of a multi shape file (e.g. 3 or 3,7,10-20)
     --delta=d       overrides pre-defined evaluation delta in the input file (0.0 < d < 1.0)
-    --format=f      defines the export file type (default f = json)
+    --tolerance=e   triangulates the surfaces adaptively with the maximum chordal error e (obj, stl and off formats)
+    --format=f      defines the export file type or a comma-separated list of them (default f = json)
     --name=fn       sets the export file name (default fn = input path and name + new extension)
+    --encoding=e    encoding of the stl and VTK formats (e should be one of them: ascii or binary)
+    --precision=p   number of decimal places of the evaluated points in csv and txt formats
+    --dtype=t       data type of the evaluated points in the binary formats (t should be one of them: float64 or \
+float32)
+    --backend=b     sets the evaluation backend (b should be one of them: geomdl or numpy)
+    --no-cache      disables the cache of the parsed and evaluated shapes
+    --no-template   skips the Jinja2 template processing of the input file
+    --jobs=n        number of worker processes for the input files in batch mode or for the shapes of a multi shape \
+file (n = 0 uses all available cores)
+
+Batch mode:
+
+{file} can also be a directory, a glob pattern or a manifest file prefixed by '@' (e.g. @files.txt) which lists \
+one input file per line. In batch mode, '--name' sets the output directory and a summary of the successful and failed \
+files is printed at the end. The output file names keep the extension of the input files, e.g. surface.yaml.csv, and \
+the output directory mirrors the subdirectories of the input files. The input files whose outputs would overwrite an \
+input file or another output fail without running.
 
 Configuration variables:
 
-    export_format   default value for '--format' parameter
+    export_format           default value for '--format' parameter
+    backend                 default value for '--backend' parameter
+    adaptive_max_points     maximum number of points evaluated by '--tolerance' parameter
 
 Please see the documentation for more details.\
     """
@@ -257,24 +726,314 @@ Please see the documentation for more details.\
     export_format = kwargs.get('format', config['export_format'])
 
     # Check user input
-    possible_types = ['cfg', 'yaml', 'json', 'obj', 'stl', 'off', 'smesh', 'vmesh']
-    if export_format not in possible_types:
-        ptypes_str = ", ".join([pt for pt in possible_types])
-        raise RuntimeError("Cannot export in '" + str(export_format) + "' format. Possible types: " + ptypes_str)
+    possible_types = ['cfg', 'yaml', 'json', 'gnb', 'ndjson', 'obj', 'stl', 'off', 'smesh', 'vmesh',
+                      'csv', 'txt', 'npy', 'npz', 'raw', 'vtk', 'vts', 'vtp', 'vtm']
+    export_format = ",".join(_parse_formats(export_format, possible_types))
+
+    # Process multiple input files
+    if batch.is_batch(file_name):
+        _run_batch(_export_file, file_name, export_format, kwargs)
+        return
+
+    kwargs['format'] = export_format
+    _export_file(file_name, **kwargs)
 
-    # Get remaining keyword arguments
+
+def _export_file(file_name, **kwargs):
+    """Exports a single input file (used by EXPORT command)"""
+    with timings.stage('import'):
+        from . import utilities
+
+    export_format = kwargs['format']
     file_type = kwargs.get('type', '')
     shape_idx = kwargs.get('index', -1)
     shape_delta = kwargs.get('delta', -1.0)
-    export_filename = kwargs.get('name', utilities.replace_extension(file_name, export_format))
+    export_filename = kwargs.get('name', _output_name(file_name, export_format))
+    _check_output(file_name, export_filename)
+    backend = kwargs.get('backend', config['backend'])
+
+    # The shapes of the NDJSON streams are exported one by one as they are read, if the format allows it
+    streaming_formats = utilities.CLI_MESH_EXPORT_TYPES + ('ndjson',)
+    if export_format in streaming_formats and utilities.input_file_type(file_name, file_type) == 'ndjson':
+        adaptive_eval = 'tolerance' in kwargs and export_format in utilities.CLI_MESH_EXPORT_TYPES
+        ns = utilities.generate_nurbs_stream(file_name, shape_delta, shape_idx, backend=backend,
+                                             tolerance=kwargs['tolerance'] if adaptive_eval else None)
+        utilities.export_nurbs(obj=ns, file_name=export_filename, export_format=export_format,
+                               update_delta=False, encoding=kwargs.get('encoding', 'binary'))
+        return
 
     # Export the NURBS object
     ns = utilities.generate_nurbs_from_file(
         file_name=file_name,
         delta=shape_delta,
         shape_idx=shape_idx,
-        file_type=file_type
+        file_type=file_type,
+        use_cache=_use_cache(kwargs),
+        backend=backend,
+        use_template=_use_template(kwargs)
     )
-    utilities.export_nurbs(obj=ns, file_name=export_filename, export_format=export_format)
+    if ',' in export_format or export_format in utilities.CLI_EVALPTS_EXPORT_TYPES:
+        _export_outputs(ns, file_name, export_format, kwargs)
+        return
+    # Only the mesh formats use the evaluated points
+    adaptive_eval = 'tolerance' in kwargs and export_format in utilities.CLI_MESH_EXPORT_TYPES
+    if adaptive_eval:
+        from . import adaptive
+        adaptive.evaluate_adaptive(ns, kwargs['tolerance'])
+    elif export_format in utilities.CLI_MESH_EXPORT_TYPES:
+        batch.evaluate_parallel(ns, jobs=kwargs.get('jobs', 1), backend=backend, update_delta=True)
+    utilities.export_nurbs(obj=ns, file_name=export_filename, export_format=export_format,
+                           update_delta=not adaptive_eval, encoding=kwargs.get('encoding', 'binary'))
+
+
+def command_watch(file_name, **kwargs):
+    """\
+WATCH: Watches the input file and re-runs PLOT, EVAL or EXPORT command after every change
+
+'geomdl-cli watch' command keeps running and polls the input file for changes. After every change, the shape \
+definitions in the file are compared with the previous ones and only the changed shapes are rebuilt and re-evaluated; \
+the unchanged shapes keep their evaluated points. While plotting, the changed shapes are redrawn on the existing \
+figure instead of creating a new one.
+
+Usage:
+
+    geomdl-cli watch {file}                                  plots the shapes and updates the figure on every change
+    geomdl-cli watch {file} --command=export --format=stl    re-exports the shapes on every change
+    geomdl-cli watch {file} --command=eval --format=vtk      re-exports the evaluated points on every change
+
+Available parameters:
+
+    --help          displays this message
+    --command=c     command to run on every change (c should be one of them: plot, eval or export, default c = plot)
+    --type=t        defines the input file type (only yaml, cfg and json files can be watched)
+    --index=i       watches the selected shapes of a multi shape file (e.g. 3 or 3,7,10-20)
+    --delta=d       overrides pre-defined evaluation delta in the input file (0.0 < d < 1.0)
+    --format=f      export format of EVAL and EXPORT commands
+    --name=fn       output file name (PLOT command saves the figure as a file instead of displaying it)
+    --vis           sets the visualization options of PLOT command (ctrlpts, evalpts and axes options are supported)
+    --precision=p   number of decimal digits in the text outputs of EVAL command
+    --encoding=e    encoding of the VTK and stl formats
+    --interval=s    polling interval in seconds
+    --count=n       stops after n updates (default: runs until interrupted via Ctrl+C)
+    --no-template   skips the Jinja2 template processing of the input file
+
+Configuration variables:
+
+    watch_interval  default value for '--interval' parameter
 
+Please see the documentation for more details.\
+    """
+    from . import utilities
+    from . import watch
+
+    if streams.is_stdio(file_name):
+        raise RuntimeError("Cannot watch the standard input, please use a file")
+    action_name = kwargs.get('command', 'plot')
+    watcher = watch.ShapeWatcher(
+        file_name=file_name,
+        file_type=utilities.input_file_type(file_name, kwargs.get('type', '')),
+        delta=kwargs.get('delta', -1.0),
+        indices=utilities.parse_indices(kwargs.get('index', -1)),
+        template=_use_template(kwargs)
+    )
 
+    if action_name == 'plot':
+        action = watch.LivePlot(kwargs.get('name', config['plot_name']),
+                                options=_parse_vis_options(kwargs.get('vis', config['plot_vis']), verbose=False))
+    elif action_name == 'eval':
+        export_format = kwargs.get('format', config['eval_format'])
+        export_filename = kwargs.get('name', utilities.replace_extension(file_name, export_format))
+
+        def action(w, changed):
+            utilities.export_evalpts(obj=w.obj, file_name=export_filename, export_format=export_format,
+                                     precision=kwargs.get('precision', None), dtype=kwargs.get('dtype', 'float64'),
+                                     encoding=kwargs.get('encoding', 'binary'), release=False)
+    elif action_name == 'export':
+        export_format = kwargs.get('format', config['export_format'])
+        export_filename = kwargs.get('name', utilities.replace_extension(file_name, export_format))
+
+        def action(w, changed):
+            # Keep the evaluation delta and the evaluated points of each shape for the next update
+            utilities.export_nurbs(obj=w.obj, file_name=export_filename, export_format=export_format,
+                                   update_delta=False, encoding=kwargs.get('encoding', 'binary'), release=False)
+    else:
+        raise RuntimeError("Cannot watch '" + str(action_name) + "' command. Possible commands: plot, eval, export")
+
+    print("Watching " + file_name + " (press Ctrl+C to stop)", file=sys.stderr)
+    watch.watch(watcher, action, interval=float(kwargs.get('interval', config['watch_interval'])),
+                count=int(kwargs.get('count', 0)))
+
+
+def command_run(file_name, **kwargs):
+    """\
+RUN: Runs the jobs listed in a manifest file
+
+'geomdl-cli run' command reads a YAML or JSON manifest file listing the jobs, i.e. the commands with their inputs, \
+options and outputs, and runs them on a pool of worker processes in the dependency order. Any command of the command \
+line application can be scheduled, including the user-defined commands.
+
+A job runs after the jobs listed in its 'depends' list and the jobs producing its inputs. The jobs whose outputs are \
+up to date are skipped, like make does. The jobs evaluating the same input file with the same delta share the parsed \
+and evaluated shapes via the cache, so the input file is parsed and evaluated only once.
+
+Manifest format:
+
+    options:                      default options of all jobs (optional)
+      delta: 0.01
+    jobs:
+      - name: mesh                job name (optional, defaults to the command line)
+        command: export           command name
+        input: surface.yaml       input file, relative to the manifest directory
+        options:                  command parameters without the leading dashes
+          format: stl
+          name: out/surface.stl
+        outputs: [out/surface.stl]    output files (optional, defaults to the 'name' option)
+        depends: [other-job]          jobs to run before this job (optional)
+
+The jobs without any outputs always run.
+
+Usage:
+
+    geomdl-cli run jobs.yaml                    runs the jobs whose outputs are out of date
+    geomdl-cli run jobs.yaml --jobs=4           runs the jobs on 4 worker processes
+    geomdl-cli run jobs.yaml --force            runs all jobs
+
+Available parameters:
+
+    --help          displays this message
+    --jobs=n        number of worker processes (n = 0 uses all available cores)
+    --check=c       up-to-date check of the outputs (c should be one of them: mtime or hash)
+    --force         runs all jobs, even if their outputs are up to date
+    --dry-run       prints the jobs to run without running them
+
+Up-to-date checks:
+
+    - mtime: the outputs are up to date if they are newer than all inputs of the job
+    - hash: the outputs are up to date if the contents of the inputs and the job definition did not change since \
+the last successful run; the hashes are stored in '.{manifest}.state.json' file next to the manifest
+
+Configuration variables:
+
+    run_check       default value for '--check' parameter
+
+Please see the documentation for more details.\
+    """
+    from . import pipeline
+
+    jobs = pipeline.load_manifest(file_name)
+    state_file = None
+    if not streams.is_stdio(file_name):
+        state_file = os.path.join(os.path.dirname(os.path.abspath(file_name)),
+                                  pipeline.CLI_RUN_STATE_FILE.format(name=os.path.basename(file_name)))
+    failed = pipeline.run_jobs(jobs, workers=kwargs.get('jobs', 1), check=kwargs.get('check', config['run_check']),
+                               force='force' in kwargs, dry_run='dry-run' in kwargs, state_file=state_file)
+    if failed:
+        raise RuntimeError("{f} of {n} job(s) failed".format(f=len(failed), n=len(jobs)))
+
+
+def _parse_formats(export_format, possible_types):
+    """Splits the comma-separated export formats and checks them (used by EVAL and EXPORT commands)"""
+    formats = []
+    for fmt in str(export_format).split(","):
+        fmt = fmt.strip()
+        if fmt not in possible_types:
+            ptypes_str = ", ".join([pt for pt in possible_types])
+            raise RuntimeError("Cannot export in '" + str(fmt) + "' format. Possible types: " + ptypes_str)
+        if fmt not in formats:
+            formats.append(fmt)
+    return formats
+
+
+def _export_outputs(obj, file_name, export_format, kwargs):
+    """Exports the shapes in multiple formats at once (used by EVAL and EXPORT commands)"""
+    from . import utilities
+
+    # The file names of the multiple outputs share the name and differ in the extension
+    formats = export_format.split(",")
+    if len(formats) > 1:
+        if streams.is_stdio(kwargs.get('name', file_name)):
+            raise RuntimeError("Multiple export formats cannot be written to the standard output")
+        outputs = [(fmt, utilities.replace_extension(kwargs.get('name', file_name), fmt)) for fmt in formats]
+        # The outputs are compressed if '--name' has a compression extension, e.g. out.csv.gz
+        compression = streams.split_compression(kwargs.get('name', ''))[1]
+        if compression is not None:
+            outputs = [(fmt, fname + "." + compression) for fmt, fname in outputs]
+    else:
+        outputs = [(formats[0], kwargs.get('name', _output_name(file_name, formats[0])))]
+    for _, fname in outputs:
+        _check_output(file_name, fname)
+    adaptive_eval = 'tolerance' in kwargs
+    if adaptive_eval:
+        from . import adaptive
+        adaptive.evaluate_adaptive(obj, kwargs['tolerance'])
+    utilities.export_outputs(obj, outputs, precision=kwargs.get('precision', None),
+                             dtype=kwargs.get('dtype', 'float64'), encoding=kwargs.get('encoding', 'binary'),
+                             update_delta=not adaptive_eval, jobs=kwargs.get('jobs', 1),
+                             backend=kwargs.get('backend', config['backend']))
+
+
+def _check_output(file_name, output_name):
+    """Checks that the output file does not overwrite the input file (used by EVAL and EXPORT commands)"""
+    if streams.is_stdio(file_name) or streams.is_stdio(output_name) or not os.path.exists(output_name):
+        return
+    if os.path.samefile(file_name, output_name):
+        raise RuntimeError("Output file '" + output_name + "' would overwrite the input file, please use '--name' "
+                           "parameter to set the output file name")
+
+
+def _output_name(file_name, export_format):
+    """Returns the default output file name (used by EVAL and EXPORT commands)"""
+    from . import utilities
+
+    # The shapes read from the standard input are written to the standard output
+    if streams.is_stdio(file_name):
+        return streams.CLI_STDIO_NAME
+    return utilities.replace_extension(file_name, export_format)
+
+
+def _use_cache(kwargs):
+    """Checks if the cache is enabled for the command"""
+    return bool(config['cache_enabled']) and 'no-cache' not in kwargs
+
+
+def _use_template(kwargs):
+    """Checks if the template processing is enabled for the command (None detects the templates automatically)"""
+    return False if 'no-template' in kwargs else None
+
+
+def _run_batch(func, file_name, export_format, kwargs):
+    """Runs PLOT, EVAL or EXPORT command on the input files in batch mode"""
+    with timings.stage('import'):
+        from . import utilities
+
+    file_type = kwargs.get('type', '')
+    extensions = [file_type.lower()] if file_type else list(utilities.CLI_FILE_IMPORT_TYPES.keys())
+    file_list = batch.find_input_files(file_name, extensions)
+    if not file_list:
+        raise RuntimeError("No input files found for '" + str(file_name) + "'")
+
+    # Prepare the tasks, '--name' parameter sets the output directory in batch mode which mirrors the subdirectories
+    # of the input files
+    output_dir = kwargs.get('name', None)
+    root_dir = batch.input_root(file_list)
+    formats = export_format.split(",")
+    tasks = []
+    outputs = []
+    for fname in file_list:
+        foutputs = [batch.output_file_name(fname, fmt, output_dir, root_dir) for fmt in formats]
+        outputs.append(foutputs)
+        fkwargs = dict(kwargs)
+        fkwargs['format'] = export_format
+        fkwargs['name'] = foutputs[0]
+        fkwargs['backend'] = kwargs.get('backend', config['backend'])
+        fkwargs['jobs'] = 1
+        if not _use_cache(kwargs):
+            fkwargs['no-cache'] = 1
+        tasks.append((fname, fkwargs))
+
+    # Run the tasks and report the failures
+    # The outputs must not overwrite the input files or each other
+    errors = batch.find_conflicts(file_list, outputs)
+    failed = batch.run_batch(func, tasks, jobs=kwargs.get('jobs', 1), errors=errors)
+    if failed:
+        raise RuntimeError("{f} of {n} file(s) failed".format(f=len(failed), n=len(tasks)))
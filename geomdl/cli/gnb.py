@@ -0,0 +1,224 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Binary native shape format (gnb) of geomdl-cli
+#
+# A gnb file starts with a file header and an offset table, which contains the positions of the shape records. Each
+# record contains a fixed size header, the knot vectors, the control points and the weights as contiguous little-endian
+# float64 arrays and the remaining shape data (e.g. the evaluation delta and the trim curves) as UTF-8 encoded JSON.
+# The files are memory-mapped while importing, so only the records of the selected shapes are read.
+#
+#   file header:    magic (4s), version (H), parametric dimension (H), number of shapes (I), reserved (I)
+#   offset table:   record positions from the start of the file (Q x number of shapes)
+#   shape record:   rational (B), dimension (B), reserved (H), JSON data size (I), degrees (3I), sizes (3I),
+#                   knot vectors, control points, weights (only rational shapes), JSON data, padding to 8 bytes
+#
+
+import sys
+import json
+import mmap
+import array
+import struct
+import itertools
+from geomdl import multi
+from geomdl import _exchange
+from . import streams
+
+# File signature and format version
+GNB_MAGIC = b"GNB\x00"
+GNB_VERSION = 1
+
+# File header and shape record header
+GNB_FILE_HEADER = struct.Struct("<4sHHII")
+GNB_SHAPE_HEADER = struct.Struct("<BBHI3I3I")
+
+# Shape types by parametric dimension, with the importers and the exporters of the shape dictionaries
+GNB_SHAPE_TYPES = {
+    1: ("curve", _exchange.import_dict_crv, _exchange.export_dict_crv),
+    2: ("surface", _exchange.import_dict_surf, _exchange.export_dict_surf),
+    3: ("volume", _exchange.import_dict_vol, _exchange.export_dict_vol),
+}
+
+# Keys of the shape dictionaries by parametric direction
+GNB_DEGREE_KEYS = {1: ("degree",), 2: ("degree_u", "degree_v"), 3: ("degree_u", "degree_v", "degree_w")}
+GNB_SIZE_KEYS = {1: (), 2: ("size_u", "size_v"), 3: ("size_u", "size_v", "size_w")}
+GNB_KNOTVECTOR_KEYS = {1: ("knotvector",), 2: ("knotvector_u", "knotvector_v"),
+                       3: ("knotvector_u", "knotvector_v", "knotvector_w")}
+
+
+def _pack(values):
+    """Packs the values as little-endian float64 array"""
+    arr = array.array('d', values)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _unpack(buffer, offset, count):
+    """Unpacks little-endian float64 array from the buffer"""
+    arr = array.array('d')
+    arr.frombytes(buffer[offset:offset + 8 * count])
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def _shape_record(obj, pdim):
+    """Generates the binary record of the shape"""
+    data = GNB_SHAPE_TYPES[pdim][2](obj)
+    degrees = [data.pop(k) for k in GNB_DEGREE_KEYS[pdim]]
+    sizes = [data.pop(k) for k in GNB_SIZE_KEYS[pdim]] or [len(data['control_points']['points'])]
+    knotvectors = [data.pop(k) for k in GNB_KNOTVECTOR_KEYS[pdim]]
+    ctrlpts = data['control_points'].pop('points')
+    weights = data['control_points'].pop('weights', None)
+    del data['control_points']
+    dimension = len(ctrlpts[0])
+    meta = json.dumps(data).encode('utf-8')
+
+    header = GNB_SHAPE_HEADER.pack(1 if weights is not None else 0, dimension, 0, len(meta),
+                                   *(degrees + [0] * (3 - pdim) + sizes + [1] * (3 - pdim)))
+    chunks = [header]
+    chunks += [_pack(kv) for kv in knotvectors]
+    chunks.append(_pack(itertools.chain.from_iterable(ctrlpts)))
+    if weights is not None:
+        chunks.append(_pack(weights))
+    chunks.append(meta)
+    size = sum(len(c) for c in chunks)
+    chunks.append(b"\x00" * (-size % 8))
+    return b"".join(chunks)
+
+
+def export_gnb(obj, file_name):
+    """ Exports the shapes in gnb format.
+
+    The shape records are written one by one and the offset table is written after the last record.
+
+    :param obj: curve, surface, volume or a container of them
+    :param file_name: name of the export file, "-" writes to the standard output
+    :type file_name: str
+    """
+    shapes = obj if isinstance(obj, multi.AbstractContainer) else [obj]
+    pdim = obj.pdimension
+    if pdim not in GNB_SHAPE_TYPES:
+        raise RuntimeError("Cannot export the input geometry in gnb format")
+
+    with streams.open_output(file_name, 'wb', 'gnb') as fp:
+        fp.write(GNB_FILE_HEADER.pack(GNB_MAGIC, GNB_VERSION, pdim, len(shapes), 0))
+        table_pos = fp.tell()
+        fp.write(b"\x00" * (8 * len(shapes)))
+        offsets = []
+        for shape in shapes:
+            offsets.append(fp.tell())
+            fp.write(_shape_record(shape, pdim))
+        fp.seek(table_pos)
+        fp.write(struct.pack("<{}Q".format(len(offsets)), *offsets))
+
+
+def _read_shape(buffer, offset, pdim):
+    """Reads the shape record at the offset and returns the shape dictionary"""
+    if offset + GNB_SHAPE_HEADER.size > len(buffer):
+        raise RuntimeError("The gnb file is corrupted")
+    header = GNB_SHAPE_HEADER.unpack_from(buffer, offset)
+    rational, dimension, _, meta_size = header[:4]
+    degrees = header[4:4 + pdim]
+    sizes = header[7:7 + pdim]
+    num_ctrlpts = 1
+    for s in sizes:
+        num_ctrlpts *= s
+
+    # Check the record size before reading the arrays
+    num_values = sum(s + d + 1 for s, d in zip(sizes, degrees)) + num_ctrlpts * (dimension + rational)
+    pos = offset + GNB_SHAPE_HEADER.size
+    if pos + 8 * num_values + meta_size > len(buffer):
+        raise RuntimeError("The gnb file is corrupted")
+
+    data = json.loads(buffer[pos + 8 * num_values:pos + 8 * num_values + meta_size].decode('utf-8'))
+    for key, degree in zip(GNB_DEGREE_KEYS[pdim], degrees):
+        data[key] = degree
+    for key, size in zip(GNB_SIZE_KEYS[pdim], sizes):
+        data[key] = size
+    for key, size, degree in zip(GNB_KNOTVECTOR_KEYS[pdim], sizes, degrees):
+        data[key] = _unpack(buffer, pos, size + degree + 1).tolist()
+        pos += 8 * (size + degree + 1)
+    coords = _unpack(buffer, pos, num_ctrlpts * dimension).tolist()
+    pos += 8 * num_ctrlpts * dimension
+    data['control_points'] = dict(points=[coords[i:i + dimension] for i in range(0, len(coords), dimension)])
+    if rational:
+        data['control_points']['weights'] = _unpack(buffer, pos, num_ctrlpts).tolist()
+    return data
+
+
+def import_gnb(file_name, **kwargs):
+    """ Imports the shapes from a gnb file.
+
+    The file is memory-mapped and only the records of the selected shapes are read. The standard input (file name "-")
+    and the compressed files are decompressed and read completely.
+
+    Keyword Arguments:
+        * ``delta``: evaluation delta of the imported shapes
+        * ``indices``: list of the shape indices to import (default: all shapes)
+
+    :param file_name: input file name
+    :type file_name: str
+    :return: list of the imported shapes
+    :rtype: list
+    """
+    delta = kwargs.get('delta', -1.0)
+    indices = kwargs.get('indices', None)
+
+    if streams.is_stdio(file_name) or streams.is_compressed(file_name):
+        buffer = streams.read_input(file_name, binary=True)
+    else:
+        with open(file_name, 'rb') as fp:
+            try:
+                buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise RuntimeError("The input file '" + str(file_name) + "' is not a gnb file")
+    try:
+        if len(buffer) < GNB_FILE_HEADER.size:
+            raise RuntimeError("The input file '" + str(file_name) + "' is not a gnb file")
+        magic, version, pdim, count, _ = GNB_FILE_HEADER.unpack_from(buffer, 0)
+        if magic != GNB_MAGIC:
+            raise RuntimeError("The input file '" + str(file_name) + "' is not a gnb file")
+        if version > GNB_VERSION or pdim not in GNB_SHAPE_TYPES:
+            raise RuntimeError("Unsupported gnb file version: " + str(version))
+        if GNB_FILE_HEADER.size + 8 * count > len(buffer):
+            raise RuntimeError("The gnb file is corrupted")
+        offsets = struct.unpack_from("<{}Q".format(count), buffer, GNB_FILE_HEADER.size)
+
+        if indices is None:
+            indices = range(count)
+        for idx in indices:
+            if not 0 <= idx < count:
+                raise RuntimeError("Shape index " + str(idx) + " is out of range, the input file contains "
+                                   + str(count) + " shapes")
+
+        importer = GNB_SHAPE_TYPES[pdim][1]
+        ret_list = []
+        for idx in indices:
+            shape = importer(_read_shape(buffer, offsets[idx], pdim))
+            if 0.0 < delta < 1.0:
+                shape.delta = delta
+            ret_list.append(shape)
+        return ret_list
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
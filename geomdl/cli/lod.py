@@ -0,0 +1,145 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Level of detail (LOD) selection for plotting
+#
+# The evaluation density of each shape is selected from its size on the screen: a shape spanning the complete figure
+# is evaluated with the full point budget, while the smaller shapes, e.g. the patches of a large model, are evaluated
+# with proportionally fewer points. The evaluation density is never increased above the requested one.
+#
+
+import math
+from geomdl import multi
+
+# Sample size properties of the shapes and the containers by parametric dimension
+CLI_LOD_SIZE_ATTRS = {
+    1: ('sample_size',),
+    2: ('sample_size_u', 'sample_size_v'),
+    3: ('sample_size_u', 'sample_size_v', 'sample_size_w'),
+}
+
+# Control point grid size properties of the shapes by parametric dimension
+CLI_LOD_CTRLPTS_ATTRS = {
+    2: ('ctrlpts_size_u', 'ctrlpts_size_v'),
+    3: ('ctrlpts_size_u', 'ctrlpts_size_v', 'ctrlpts_size_w'),
+}
+
+
+def _distance(pt1, pt2):
+    """Computes the distance between two points"""
+    return math.sqrt(sum((c2 - c1) ** 2 for c1, c2 in zip(pt1, pt2)))
+
+
+def polygon_lengths(shape):
+    """ Computes the average length of the control polygon in each parametric direction of the shape.
+
+    :param shape: curve, surface or volume
+    :return: control polygon length in each parametric direction
+    :rtype: list
+    """
+    pts = shape.ctrlpts
+    if shape.pdimension == 1:
+        return [sum(_distance(pts[i], pts[i + 1]) for i in range(len(pts) - 1))]
+
+    # The v-direction changes fastest in the control points, followed by the u- and the w-directions
+    sizes = [getattr(shape, attr) for attr in CLI_LOD_CTRLPTS_ATTRS[shape.pdimension]]
+    strides = [sizes[1], 1, sizes[0] * sizes[1]][:shape.pdimension]
+    lengths = []
+    for size, stride in zip(sizes, strides):
+        total = 0.0
+        for idx in range(len(pts)):
+            if (idx // stride) % size < size - 1:
+                total += _distance(pts[idx], pts[idx + stride])
+        lengths.append(total * size / len(pts))
+    return lengths
+
+
+def model_size(shapes):
+    """Computes the diagonal length of the bounding box of the control points of the shapes"""
+    lower = None
+    upper = None
+    for shape in shapes:
+        for pt in shape.ctrlpts:
+            lower = list(pt) if lower is None else [min(a, b) for a, b in zip(lower, pt)]
+            upper = list(pt) if upper is None else [max(a, b) for a, b in zip(upper, pt)]
+    return _distance(lower, upper) if lower is not None else 0.0
+
+
+def sample_sizes(lengths, size, max_sizes, max_points, min_sizes):
+    """ Computes the sample size of a shape from its size on the screen.
+
+    :param lengths: control polygon lengths of the shape in each parametric direction
+    :type lengths: list
+    :param size: size of the complete model
+    :type size: float
+    :param max_sizes: requested sample sizes, the sample sizes are not increased above them
+    :type max_sizes: list
+    :param max_points: maximum number of evaluated points of the shape
+    :type max_points: int
+    :param min_sizes: minimum sample sizes
+    :type min_sizes: list
+    :return: sample size in each parametric direction
+    :rtype: list
+    """
+    # Number of points in each direction for a shape spanning the complete figure
+    resolution = max_points ** (1.0 / len(lengths))
+    sizes = []
+    for length, max_size, min_size in zip(lengths, max_sizes, min_sizes):
+        num = int(math.ceil(resolution * length / size)) + 1 if size > 0 else max_size
+        sizes.append(max(min(num, max_size), min(min_size, max_size)))
+
+    # Scale down to the point budget
+    total = 1
+    for num in sizes:
+        total *= num
+    if total > max_points:
+        scale = (float(max_points) / total) ** (1.0 / len(sizes))
+        sizes = [max(min(min_size, num), int(num * scale)) for num, min_size in zip(sizes, min_sizes)]
+    return sizes
+
+
+def apply_lod(obj, max_points):
+    """ Sets the sample sizes of the shapes for plotting using a screen-space point budget.
+
+    The requested sample sizes are the sample sizes of the container, which are used by the container for rendering,
+    or the sample sizes of the shape itself. The control grids are hidden if the model has more control points than
+    the point budget, as they cannot be distinguished from each other on the screen and slow down the plot.
+
+    :param obj: curve, surface, volume or a container of them
+    :param max_points: maximum number of evaluated points of each shape
+    :type max_points: int
+    :return: True if the control grids should be displayed, False otherwise
+    :rtype: bool
+    """
+    is_container = isinstance(obj, multi.AbstractContainer)
+    shapes = list(obj) if is_container else [obj]
+    size = model_size(shapes)
+    num_ctrlpts = 0
+    for shape in shapes:
+        attrs = CLI_LOD_SIZE_ATTRS[shape.pdimension]
+        max_sizes = [getattr(obj if is_container else shape, attr) for attr in attrs]
+        degrees = [shape.degree] if shape.pdimension == 1 else \
+            [getattr(shape, 'degree_' + d) for d in 'uvw'[:shape.pdimension]]
+        sizes = sample_sizes(polygon_lengths(shape), size, max_sizes, max_points, [d + 1 for d in degrees])
+        for attr, num in zip(attrs, sizes):
+            setattr(shape, attr, num)
+        num_ctrlpts += len(shape.ctrlpts)
+    return num_ctrlpts <= max_points
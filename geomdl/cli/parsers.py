@@ -0,0 +1,263 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Input file parsers for geomdl-cli
+#
+# The parsers use the accelerated libraries when they are available (orjson for JSON and the C loader of ruamel.yaml
+# for YAML) and read the numeric arrays of the YAML and libconfig files, e.g. the control points, with a bulk reader,
+# which is considerably faster than the generic parsers for the files with large numbers of control points.
+#
+
+import re
+
+# Character sequences which start Jinja2 statements, expressions and comments
+CLI_TEMPLATE_MARKERS = ("{%", "{{", "{#")
+
+# Numeric array keys read by the bulk readers; the control points are nested arrays, the others are flat arrays
+CLI_NESTED_ARRAY_KEYS = ('points',)
+CLI_FLAT_ARRAY_KEYS = ('weights', 'knotvector', 'knotvector_u', 'knotvector_v', 'knotvector_w')
+
+# Placeholder of the arrays read by the bulk readers
+ARRAY_PLACEHOLDER = "__geomdl_cli_array_{}__"
+
+_KEYS_PATTERN = "(" + "|".join(CLI_NESTED_ARRAY_KEYS + CLI_FLAT_ARRAY_KEYS) + ")"
+
+# YAML array key followed by an indented block sequence, e.g. "points:"
+YAML_ARRAY_KEY = re.compile(r"^([ \t]*)" + _KEYS_PATTERN + r":[ \t]*(#.*)?$", re.MULTILINE)
+
+# libconfig array key followed by a list or an array, e.g. "points = (" or "weights = ["
+CFG_ARRAY_KEY = re.compile(r"\b" + _KEYS_PATTERN + r"\s*[=:]\s*([\(\[])")
+
+# Innermost libconfig list or array
+CFG_GROUP = re.compile(r"[\(\[]([^\(\)\[\]]*)[\)\]]")
+
+
+def is_template(file_src):
+    """ Checks if the file contents contain Jinja2 template tags.
+
+    :param file_src: file contents
+    :type file_src: str
+    :rtype: bool
+    """
+    return any(marker in file_src for marker in CLI_TEMPLATE_MARKERS)
+
+
+def parse_json(file_src):
+    """Parses the JSON file contents using orjson, if it is installed"""
+    try:
+        import orjson
+        return orjson.loads(file_src)
+    except ImportError:
+        import json
+        return json.loads(file_src)
+
+
+def parse_yaml(file_src):
+    """Parses the YAML file contents using the safe loader of ruamel.yaml, which uses the C loader if available"""
+    try:
+        from ruamel.yaml import YAML
+    except ImportError:
+        raise RuntimeError("Please install 'ruamel.yaml' package to use YAML format: pip install ruamel.yaml")
+    return YAML(typ='safe').load(file_src)
+
+
+def parse_cfg(file_src):
+    """Parses the libconfig file contents"""
+    try:
+        import libconf
+    except ImportError:
+        raise RuntimeError("Please install 'libconf' package to use libconfig format: pip install libconf")
+    return libconf.loads(file_src)
+
+
+def _yaml_values(value):
+    """Parses a YAML scalar or a flow sequence of numbers"""
+    value = value.split("#", 1)[0].strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [float(v) for v in value[1:-1].split(",")]
+    return [float(value)]
+
+
+def read_arrays_yaml(file_src):
+    """ Reads the numeric arrays of a YAML file, e.g. the control points, the weights and the knot vectors.
+
+    The block sequences of the numbers, e.g. ``- - 1.0`` or ``- [1.0, 2.0, 3.0]`` lines of the control points, are
+    parsed directly and each array is replaced by a placeholder containing its index in the returned list.
+
+    :param file_src: file contents
+    :type file_src: str
+    :return: updated file contents and the list of the arrays
+    :rtype: tuple
+    :raises ValueError: the array contains a value which is not supported by the bulk reader
+    """
+    ret_src = []
+    arrays = []
+    pos = 0
+    for match in YAML_ARRAY_KEY.finditer(file_src):
+        if match.start() < pos:
+            continue
+        indent = len(match.group(1))
+        nested = match.group(2) in CLI_NESTED_ARRAY_KEYS
+        values = []
+        end = match.end() + 1
+        while end < len(file_src):
+            line_end = file_src.find("\n", end)
+            line_end = len(file_src) if line_end < 0 else line_end
+            line = file_src[end:line_end]
+            stripped = line.lstrip()
+            if stripped and not stripped.startswith("#"):
+                line_indent = len(line) - len(stripped)
+                if line_indent < indent or (line_indent == indent and not stripped.startswith("-")):
+                    break
+                dashes = 0
+                while stripped.startswith("- ") or stripped == "-":
+                    stripped = stripped[2:].lstrip()
+                    dashes += 1
+                if dashes == 0 or dashes > 2 or not stripped:
+                    raise ValueError("Unsupported array block")
+                row = _yaml_values(stripped)
+                if not nested:
+                    if dashes != 1 or len(row) != 1:
+                        raise ValueError("Unsupported array block")
+                    values += row
+                elif dashes == 2 or len(row) > 1:
+                    values.append(row)
+                elif values:
+                    values[-1] += row
+                else:
+                    raise ValueError("Unsupported array block")
+            end = line_end + 1
+        if not values:
+            raise ValueError("Unsupported array block")
+        ret_src.append(file_src[pos:match.start()])
+        ret_src.append(match.group(1) + match.group(2) + ": " + ARRAY_PLACEHOLDER.format(len(arrays)) + "\n")
+        arrays.append(values)
+        pos = min(end, len(file_src))
+    ret_src.append(file_src[pos:])
+    return "".join(ret_src), arrays
+
+
+def read_arrays_cfg(file_src):
+    """ Reads the numeric arrays of a libconfig file, e.g. the control points, the weights and the knot vectors.
+
+    The lists and the arrays of the numbers, e.g. ``points = ( ( 1.0, 2.0 ), ( 3.0, 4.0 ) )``, are parsed directly and
+    each array is replaced by a placeholder containing its index in the returned list.
+
+    :param file_src: file contents
+    :type file_src: str
+    :return: updated file contents and the list of the arrays
+    :rtype: tuple
+    :raises ValueError: the array contains a value which is not supported by the bulk reader
+    """
+    ret_src = []
+    arrays = []
+    pos = 0
+    for match in CFG_ARRAY_KEY.finditer(file_src):
+        if match.start() < pos:
+            continue
+        # Find the closing bracket of the array
+        depth = 0
+        end = match.start(2)
+        while end < len(file_src):
+            char = file_src[end]
+            if char in "([":
+                depth += 1
+            elif char in ")]":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif char in "\"#/":
+                raise ValueError("Unsupported array block")
+            end += 1
+        block = file_src[match.start(2) + 1:end]
+        if match.group(1) in CLI_NESTED_ARRAY_KEYS:
+            if not block or CFG_GROUP.sub("", block).replace(",", "").strip():
+                raise ValueError("Unsupported array block")
+            values = [[float(v) for v in group.split(",")] for group in CFG_GROUP.findall(block)]
+        else:
+            values = [float(v) for v in block.split(",")]
+        ret_src.append(file_src[pos:match.start()])
+        ret_src.append(match.group(1) + " = \"" + ARRAY_PLACEHOLDER.format(len(arrays)) + "\"")
+        arrays.append(values)
+        pos = end + 1
+    ret_src.append(file_src[pos:])
+    return "".join(ret_src), arrays
+
+
+# Parsers of the file types allowed for importing
+CLI_FILE_PARSERS = dict(
+    cfg=parse_cfg,
+    conf=parse_cfg,
+    yaml=parse_yaml,
+    json=parse_json,
+)
+
+# Bulk readers of the numeric arrays
+CLI_ARRAY_READERS = dict(
+    cfg=read_arrays_cfg,
+    conf=read_arrays_cfg,
+    yaml=read_arrays_yaml,
+)
+
+
+def _restore_arrays(data, arrays):
+    """Replaces the placeholders in the parsed data with the arrays and returns the number of replacements"""
+    placeholders = dict((ARRAY_PLACEHOLDER.format(idx), arr) for idx, arr in enumerate(arrays))
+    count = 0
+    for shape in data['shape']['data']:
+        for entry in (shape, shape.get('control_points', {})):
+            for key in CLI_NESTED_ARRAY_KEYS + CLI_FLAT_ARRAY_KEYS:
+                value = entry.get(key, None)
+                if isinstance(value, str) and value in placeholders:
+                    entry[key] = placeholders[value]
+                    count += 1
+    return count
+
+
+def parse(file_src, file_type):
+    """ Parses the file contents.
+
+    The numeric arrays are read using the bulk reader of the file type, if there is one. If the bulk reader cannot read
+    an array, or the arrays are not located where the control points, the weights and the knot vectors are expected,
+    the file is parsed by the generic parser instead.
+
+    :param file_src: file contents
+    :type file_src: str
+    :param file_type: file type, e.g. yaml
+    :type file_type: str
+    :return: parsed data
+    :rtype: dict
+    """
+    parser = CLI_FILE_PARSERS[file_type]
+    reader = CLI_ARRAY_READERS.get(file_type, None)
+    if reader is not None:
+        try:
+            bulk_src, arrays = reader(file_src)
+        except ValueError:
+            arrays = None
+        if arrays:
+            try:
+                data = parser(bulk_src)
+                if _restore_arrays(data, arrays) == len(arrays):
+                    return data
+            except Exception:
+                pass
+    return parser(file_src)
@@ -0,0 +1,381 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Manifest runner for geomdl-cli
+#
+# The manifest lists the jobs to run, i.e. the commands with their inputs, options and outputs. The jobs are scheduled
+# over a pool of worker processes in the dependency order and the jobs whose outputs are up to date are skipped, like
+# make does.
+#
+
+import os
+import os.path
+import sys
+import glob
+import json
+import time
+import hashlib
+from concurrent import futures
+from . import __cli_commands__, __cli_config__
+from . import batch
+from . import parsers
+from . import server
+from . import streams
+
+# Commands which parse and evaluate the input file, the jobs sharing the input and the evaluation delta reuse the cache
+CLI_RUN_CACHED_COMMANDS = ('plot', 'eval', 'export')
+
+# Methods of checking if the outputs of a job are up to date
+CLI_RUN_CHECK_MODES = ('mtime', 'hash')
+
+# Name of the file storing the input hashes of the jobs next to the manifest, used by the hash check mode
+CLI_RUN_STATE_FILE = ".{name}.state.json"
+
+
+def job_params(options):
+    """ Converts the job options to the command parameters as the command line application passes them.
+
+    :param options: job options
+    :type options: dict
+    :return: command parameters
+    :rtype: dict
+    """
+    params = {}
+    for key, value in options.items():
+        if value is None or value is False:
+            continue
+        if value is True:
+            params[key] = 1
+        elif isinstance(value, (list, tuple)):
+            params[key] = ",".join(str(v) for v in value)
+        else:
+            params[key] = str(value)
+    return params
+
+
+def _paths(root, values):
+    """Converts a path or a list of paths relative to the manifest directory to absolute paths"""
+    if values is None:
+        return []
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return [os.path.normpath(os.path.join(root, str(v))) for v in values]
+
+
+class Job(object):
+    """ A command to run with its inputs and outputs.
+
+    :param data: job definition from the manifest
+    :type data: dict
+    :param root: manifest directory, the relative paths are relative to this directory
+    :type root: str
+    :param defaults: default options of the jobs
+    :type defaults: dict
+    """
+    def __init__(self, data, root, defaults=None):
+        if not isinstance(data, dict) or 'command' not in data:
+            raise RuntimeError("Each job in the manifest must define a 'command'")
+        self.command = str(data['command'])
+        if self.command not in __cli_commands__:
+            raise RuntimeError("The command " + self.command.upper() + " is not available")
+        self.root = root
+        self.input = data.get('input', None)
+        self.args = ([str(self.input)] if self.input is not None else []) + [str(a) for a in data.get('args', [])]
+        options = dict(defaults or {})
+        options.update(data.get('options', None) or {})
+        self.params = job_params(options)
+        self.inputs = _paths(root, self.input) + _paths(root, data.get('inputs', None))
+        self.outputs = _paths(root, data.get('outputs', None))
+        if not self.outputs and 'name' in self.params:
+            self.outputs = _paths(root, self.params['name'])
+        self.depends = [str(d) for d in (data.get('depends', None) or [])]
+        self.name = str(data['name']) if 'name' in data else \
+            " ".join([self.command] + self.args + ["--" + k + "=" + str(v) for k, v in sorted(self.params.items())])
+
+    @property
+    def eval_key(self):
+        """Key of the parse and evaluate steps of the job, the jobs with the same key share the cached shapes"""
+        if self.command not in CLI_RUN_CACHED_COMMANDS or self.input is None or 'no-cache' in self.params or \
+                not __cli_config__['cache_enabled']:
+            return None
+        return (self.inputs[0], self.params.get('type', ''), self.params.get('index', ''),
+                self.params.get('delta', ''))
+
+    def digest(self):
+        """Computes the hash of the job definition and the contents of the input files"""
+        h = hashlib.sha1(json.dumps([self.command, self.args, self.params, self.outputs], sort_keys=True).encode())
+        for fname in _input_files(self.inputs):
+            with open(fname, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b""):
+                    h.update(chunk)
+        return h.hexdigest()
+
+
+def _input_files(paths):
+    """Expands the input paths, which can be directories and glob patterns, to the list of existing files"""
+    files = []
+    for path in paths:
+        for match in sorted(glob.glob(path)):
+            if os.path.isdir(match):
+                for dirpath, _, fnames in os.walk(match):
+                    files += [os.path.join(dirpath, fn) for fn in sorted(fnames)]
+            else:
+                files.append(match)
+    return files
+
+
+def load_manifest(file_name):
+    """ Reads the jobs from a YAML or JSON manifest file.
+
+    The manifest contains a list of jobs, either at the top level or under ``jobs`` key. The default options of all
+    jobs can be set under ``options`` key.
+
+    :param file_name: manifest file name, "-" reads the manifest from the standard input
+    :type file_name: str
+    :return: list of jobs
+    :rtype: list
+    """
+    # YAML parser also reads the JSON manifests from the standard input
+    file_type = "yaml" if file_name.lower().endswith((".yaml", ".yml")) or streams.is_stdio(file_name) else "json"
+    data = parsers.CLI_FILE_PARSERS[file_type](streams.read_input(file_name))
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get('options', None) or {}
+        data = data.get('jobs', None)
+    if not isinstance(data, list) or not data:
+        raise RuntimeError("The manifest '" + str(file_name) + "' does not contain any jobs")
+    # The paths of the manifest read from the standard input are relative to the working directory
+    root = os.getcwd() if streams.is_stdio(file_name) else os.path.dirname(os.path.abspath(file_name))
+    jobs = [Job(job, root, defaults) for job in data]
+
+    # Make the default names unique
+    names = {}
+    for job in jobs:
+        names[job.name] = names.get(job.name, 0) + 1
+        if names[job.name] > 1:
+            job.name += " (" + str(names[job.name]) + ")"
+    return jobs
+
+
+def dependencies(jobs):
+    """ Finds the jobs which must finish before each job starts.
+
+    A job depends on the jobs listed in its ``depends`` list and the jobs producing its inputs. The jobs sharing the
+    parse and evaluate steps also wait for the first of them, which stores the parsed and evaluated shapes in the cache
+    for the others.
+
+    :param jobs: list of jobs
+    :type jobs: list
+    :return: list of the jobs in the execution order and the names of the dependencies of each job
+    :rtype: tuple
+    """
+    by_name = dict((job.name, job) for job in jobs)
+    producers = {}
+    for job in jobs:
+        for out in job.outputs:
+            producers[out] = job.name
+
+    deps = {}
+    for job in jobs:
+        deps[job.name] = set()
+        for dep in job.depends:
+            if dep not in by_name:
+                raise RuntimeError("The job '" + job.name + "' depends on an unknown job '" + dep + "'")
+            deps[job.name].add(dep)
+        for path in job.inputs:
+            if path in producers and producers[path] != job.name:
+                deps[job.name].add(producers[path])
+
+    # Sort the jobs topologically, keeping the manifest order of the independent jobs
+    order = []
+    ordered = set()
+    remaining = list(jobs)
+    while remaining:
+        ready = [job for job in remaining if deps[job.name].issubset(ordered)]
+        if not ready:
+            raise RuntimeError("Dependency cycle between the jobs: " + ", ".join(job.name for job in remaining))
+        order += ready
+        ordered.update(job.name for job in ready)
+        remaining = [job for job in remaining if job.name not in ordered]
+
+    # The new dependencies follow the execution order, so they cannot create cycles
+    leaders = {}
+    for job in order:
+        key = job.eval_key
+        if key is None:
+            continue
+        if key in leaders:
+            deps[job.name].add(leaders[key])
+        else:
+            leaders[key] = job.name
+    return order, deps
+
+
+def is_up_to_date(job, check='mtime', state=None):
+    """ Checks if the outputs of the job are up to date.
+
+    The jobs without any outputs always run. In mtime mode, the outputs are up to date if they are newer than all
+    inputs. In hash mode, the outputs are up to date if the hash of the job definition and the input contents is the
+    same as the hash stored after the last successful run.
+
+    :param job: job to check
+    :type job: Job
+    :param check: check mode, mtime or hash
+    :type check: str
+    :param state: hashes of the jobs stored after the last successful runs (hash mode only)
+    :type state: dict
+    :rtype: bool
+    """
+    if not job.outputs or not all(os.path.exists(out) for out in job.outputs):
+        return False
+    if check == 'hash':
+        return (state or {}).get(job.name, None) == job.digest()
+    inputs = _input_files(job.inputs)
+    if not inputs:
+        return False
+    return max(os.path.getmtime(fn) for fn in inputs) <= min(os.path.getmtime(out) for out in job.outputs)
+
+
+def _init_worker(commands, config, paths):
+    """Initializes the worker process with the commands and the configuration of the main process"""
+    __cli_commands__.update(commands)
+    __cli_config__.update(config)
+    for path in paths:
+        if path not in sys.path:
+            sys.path.append(path)
+    server._init_worker()
+
+
+def run_jobs(jobs, workers=1, check='mtime', force=False, dry_run=False, state_file=None):
+    """ Runs the jobs in the dependency order and prints a summary of the results.
+
+    The jobs are run via the command dispatch table of the command line application, so the user-defined commands can
+    also be scheduled. A failing job does not stop the other jobs, but the jobs depending on it are not run.
+
+    :param jobs: list of jobs
+    :type jobs: list
+    :param workers: number of worker processes
+    :type workers: int
+    :param check: up-to-date check mode, mtime or hash
+    :type check: str
+    :param force: runs all jobs, even if they are up to date
+    :type force: bool
+    :param dry_run: prints the jobs to run without running them
+    :type dry_run: bool
+    :param state_file: file storing the input hashes of the jobs (hash mode only)
+    :type state_file: str
+    :return: list of (job name, error message) tuples for the failed jobs
+    :rtype: list
+    """
+    if check not in CLI_RUN_CHECK_MODES:
+        raise RuntimeError("Unknown check mode '" + str(check) + "'. Possible modes: " + ", ".join(CLI_RUN_CHECK_MODES))
+    order, deps = dependencies(jobs)
+    state = {}
+    if check == 'hash' and state_file and os.path.isfile(state_file):
+        with open(state_file, 'r') as fp:
+            state = json.load(fp)
+
+    workers = min(batch.num_jobs(workers), len(jobs))
+    executor = None
+    if workers > 1 and not dry_run:
+        executor = futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                               initargs=(dict(__cli_commands__), dict(__cli_config__), sys.path[:]))
+    elif not dry_run:
+        server._init_worker()
+
+    status = {}
+    failed = []
+    skipped = []
+    # Jobs which ran (or would run in dry-run mode), their dependents are not up to date
+    updated = set()
+    running = {}
+    cwd = os.getcwd()
+
+    def finish(job, err, output="", elapsed=None):
+        status[job.name] = err is None
+        if output:
+            print(output, end="" if output.endswith("\n") else "\n")
+        if err is None:
+            print("[ok] " + job.name + ("" if elapsed is None else " ({t:.2f} s)".format(t=elapsed)))
+            if check == 'hash' and not dry_run:
+                state[job.name] = job.digest()
+        else:
+            print("[failed] " + job.name + ": " + err)
+            failed.append((job.name, err))
+
+    try:
+        pending = list(order)
+        while pending or running:
+            for job in list(pending):
+                if not all(dep in status for dep in deps[job.name]):
+                    continue
+                pending.remove(job)
+                failed_deps = [dep for dep in deps[job.name] if not status[dep]]
+                if failed_deps:
+                    finish(job, "dependency '" + failed_deps[0] + "' failed")
+                elif not force and not updated.intersection(deps[job.name]) and is_up_to_date(job, check, state):
+                    status[job.name] = True
+                    skipped.append(job.name)
+                    print("[skipped] " + job.name + ": up to date")
+                elif dry_run:
+                    # The outputs of the dependencies would be updated
+                    status[job.name] = True
+                    updated.add(job.name)
+                    print("[run] " + job.name)
+                elif executor is None:
+                    updated.add(job.name)
+                    start = time.perf_counter()
+                    try:
+                        result = server.execute(job.command, job.args, job.params, job.root)
+                    finally:
+                        # The command runs in the job directory
+                        os.chdir(cwd)
+                    finish(job, result['error'], result['output'], time.perf_counter() - start)
+                else:
+                    updated.add(job.name)
+                    future = executor.submit(server.execute, job.command, job.args, job.params, job.root)
+                    running[future] = (job, time.perf_counter())
+            if running:
+                done, _ = futures.wait(list(running.keys()), return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    job, start = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = dict(output="", error=str(e))
+                    finish(job, result['error'], result['output'], time.perf_counter() - start)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if check == 'hash' and state_file and not dry_run:
+            with open(state_file, 'w') as fp:
+                json.dump(state, fp, indent=2, sort_keys=True)
+
+    # Print summary
+    if dry_run:
+        print("Found {n} job(s): {r} to run, {k} up to date".format(n=len(jobs), r=len(updated), k=len(skipped)))
+        return failed
+    print("Processed {n} job(s): {s} succeeded, {k} skipped, {f} failed".format(
+        n=len(jobs), s=len(jobs) - len(failed) - len(skipped), k=len(skipped), f=len(failed))
+    )
+    for name, err in failed:
+        print("- " + name + ": " + err)
+    return failed
@@ -0,0 +1,204 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Shape renderer of geomdl-cli
+#
+# The renderer draws the shapes on a single matplotlib figure which is reused for all inputs. The headless renderer
+# uses the Agg canvas directly without importing pyplot, so it works without a display and does not create a new
+# figure for every input file.
+#
+
+import time
+from geomdl import multi
+
+# Figure size (in inches) and resolution of the rendered figures, same as the defaults of geomdl.visualization.VisMPL
+CLI_RENDER_FIGURE_SIZE = (10.67, 8)
+CLI_RENDER_FIGURE_DPI = 96
+
+# Renderer of the current process, reused by render_shapes
+_renderer = None
+
+
+def shape_list(obj):
+    """Returns the shapes of a container or the shape itself as a list"""
+    if isinstance(obj, multi.AbstractContainer):
+        return list(obj)
+    return [obj]
+
+
+class ShapeRenderer(object):
+    """ Draws the shapes on a single matplotlib figure and keeps the artists of each shape.
+
+    The shapes drawn before are not redrawn by :py:meth:`update`, so only the new shapes are drawn when the figure is
+    updated. The options are the visualization options of PLOT command; ``ctrlpts``, ``evalpts`` and ``axes`` options
+    are supported.
+
+    :param interactive: displays the figure in a window if True, uses the headless Agg canvas otherwise
+    :type interactive: bool
+    :param options: visualization options
+    :type options: dict
+    """
+    def __init__(self, interactive=False, options=None):
+        # Registers the 3D projection on the older matplotlib versions
+        from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
+
+        if interactive:
+            import matplotlib.pyplot as plt
+            plt.ion()
+            self.plt = plt
+            self.figure = plt.figure(figsize=CLI_RENDER_FIGURE_SIZE, dpi=CLI_RENDER_FIGURE_DPI)
+        else:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.plt = None
+            self.figure = Figure(figsize=CLI_RENDER_FIGURE_SIZE, dpi=CLI_RENDER_FIGURE_DPI)
+            FigureCanvasAgg(self.figure)
+        self.options = dict(ctrlpts=True, evalpts=True, axes=True)
+        self.options.update(options or {})
+        self.axes = None
+        self.artists = {}
+
+    @property
+    def is_open(self):
+        """False if the figure window has been closed"""
+        return self.plt is None or self.plt.fignum_exists(self.figure.number)
+
+    def _draw_shape(self, shape, color):
+        """Draws the shape and returns the generated artists and the bounds of the drawn points"""
+        import numpy as np
+
+        artists = []
+        bounds = []
+        if self.options['evalpts']:
+            pts = np.asarray(shape.evalpts, dtype=float)
+            if shape.pdimension == 1:
+                artists += self.axes.plot(*pts.T, color=color)
+            elif shape.pdimension == 2 and pts.shape[1] == 3:
+                grid = pts.reshape(shape.sample_size_u, shape.sample_size_v, 3)
+                artists.append(self.axes.plot_surface(grid[..., 0], grid[..., 1], grid[..., 2], color=color,
+                                                      linewidth=0))
+            else:
+                artists.append(self.axes.scatter(*pts.T, color=color, s=1))
+            bounds.append(pts)
+        if self.options['ctrlpts']:
+            pts = np.asarray(shape.ctrlpts, dtype=float)
+            if shape.pdimension == 1:
+                artists += self.axes.plot(*pts.T, color="black", linestyle="dashed", linewidth=0.5, marker="o",
+                                          markersize=2)
+            else:
+                artists.append(self.axes.scatter(*pts.T, color="black", s=2))
+            bounds.append(pts)
+        if bounds:
+            pts = np.concatenate(bounds)
+            return artists, (pts.min(axis=0), pts.max(axis=0))
+        return artists, None
+
+    def _update_limits(self):
+        """Fits the axes limits to the drawn shapes, as the 3D axes do not shrink the limits automatically"""
+        import numpy as np
+
+        bounds = [b for a, b in self.artists.values() if b is not None]
+        if not bounds:
+            return
+        lower = np.min([b[0] for b in bounds], axis=0)
+        upper = np.max([b[1] for b in bounds], axis=0)
+        setters = (self.axes.set_xlim, self.axes.set_ylim, getattr(self.axes, 'set_zlim', None))
+        for setter, lo, hi in zip(setters, lower, upper):
+            if setter is not None:
+                margin = (hi - lo) * 0.05 or 0.5
+                setter(lo - margin, hi + margin)
+
+    def clear(self):
+        """Removes all shapes from the figure, keeping the figure and the axes"""
+        if self.axes is not None:
+            self.axes.cla()
+            if not self.options['axes']:
+                self.axes.set_axis_off()
+        self.artists = {}
+
+    def update(self, shapes):
+        """ Draws the new shapes and removes the shapes which are not in the list.
+
+        :param shapes: list of the shapes
+        :type shapes: list
+        """
+        dimension = shapes[0].dimension if shapes else 3
+        if self.axes is None or self.axes.name != ('3d' if dimension == 3 else 'rectilinear'):
+            # Recreate the axes for the new dimension
+            self.figure.clf()
+            self.axes = self.figure.add_subplot(111, projection='3d' if dimension == 3 else None)
+            if not self.options['axes']:
+                self.axes.set_axis_off()
+            self.artists = {}
+
+        # The artists are stored by shape, the shapes drawn before keep their artists
+        current = set(id(shape) for shape in shapes)
+        for key in [k for k in self.artists if k not in current]:
+            for artist in self.artists.pop(key)[0]:
+                artist.remove()
+        for idx, shape in enumerate(shapes):
+            if id(shape) not in self.artists:
+                self.artists[id(shape)] = self._draw_shape(shape, "C" + str(idx % 10))
+        self._update_limits()
+
+    def show(self):
+        """Redraws the figure window"""
+        self.figure.canvas.draw_idle()
+        self.figure.canvas.flush_events()
+
+    def save(self, file_name, image_format=None):
+        """ Saves the figure.
+
+        :param file_name: figure file name or a file object
+        :type file_name: str
+        :param image_format: image format, e.g. png; the extension of the file name sets it if not set
+        :type image_format: str
+        """
+        self.figure.savefig(file_name, format=image_format)
+
+    def wait(self, interval):
+        """Waits for the given time keeping the figure window responsive"""
+        if self.plt is None:
+            time.sleep(interval)
+        else:
+            self.plt.pause(interval)
+
+
+def render_shapes(obj, file_name, options=None, image_format=None):
+    """ Renders the shapes to an image file using the headless renderer of the current process.
+
+    The figure and the axes of the renderer are reused for all calls in the same process.
+
+    :param obj: curve, surface, volume or a container of them
+    :param file_name: image file name or a file object
+    :type file_name: str
+    :param options: visualization options
+    :type options: dict
+    :param image_format: image format, e.g. png; the extension of the file name sets it if not set
+    :type image_format: str
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = ShapeRenderer(interactive=False)
+    _renderer.options.update(options or {})
+    _renderer.clear()
+    _renderer.update(shape_list(obj))
+    _renderer.save(file_name, image_format=image_format)
@@ -0,0 +1,397 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Evaluation server for geomdl-cli
+#
+# The server keeps the interpreter, the imported modules and the shape cache warm and runs the commands sent by the
+# clients on a bounded pool of worker processes. The requests and the responses are JSON documents sent as single
+# lines over a Unix socket or as HTTP POST requests to /run on localhost.
+#
+
+import os
+import os.path
+import io
+import sys
+import json
+import socket
+import importlib
+import contextlib
+from . import __cli_name__, __cli_commands__, __cli_config_dir__, config
+from . import streams
+
+
+# Commands which can be forwarded to the server by the command line application
+CLI_FORWARD_COMMANDS = ('eval', 'export', 'plot')
+
+# Parameters which are handled by the client and not forwarded to the server
+CLI_CLIENT_PARAMS = ('local', 'debug')
+
+# Parameters running the command in the client process
+CLI_LOCAL_PARAMS = ('local', 'help', 'timings', 'profile')
+
+
+def socket_path():
+    """ Returns the path of the Unix socket of the server.
+
+    The default path is ``server.sock`` inside the user configuration directory, e.g. ``~/.geomdl-cli/server.sock``.
+    It can be changed via ``serve_socket`` configuration variable.
+
+    :return: path to the Unix socket
+    :rtype: str
+    """
+    if config.get('serve_socket', None):
+        return config['serve_socket']
+    return os.path.join(os.path.expanduser("~"), __cli_config_dir__, "server.sock")
+
+
+def _init_worker():
+    """Initializes the worker process by importing the modules required by the commands"""
+    # Worker processes cannot open figure windows
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    importlib.import_module("geomdl.cli.utilities")
+    # Keep the recently used shapes in the memory
+    cache = importlib.import_module("geomdl.cli.cache")
+    cache.ShapeCache.memory_entries = int(config.get('serve_cache_entries', 32))
+
+
+def execute(cmd_name, args, params, cwd, cli_config=None, cli_commands=None, cli_path=None):
+    """ Executes the command and captures its output.
+
+    The configuration, the command definitions and the import paths sent by the client replace the ones of the server
+    while the command is running, so that the command runs as it would run in the client process.
+
+    :param cmd_name: command name
+    :type cmd_name: str
+    :param args: command arguments
+    :type args: list
+    :param params: command parameters
+    :type params: dict
+    :param cwd: working directory of the client
+    :type cwd: str
+    :param cli_config: effective configuration of the client
+    :type cli_config: dict
+    :param cli_commands: command definitions of the client, including the user-defined commands
+    :type cli_commands: dict
+    :param cli_path: directories containing the modules of the user-defined commands
+    :type cli_path: list
+    :return: dict containing the exit status, the command output and the error message
+    :rtype: dict
+    """
+    commands = cli_commands if cli_commands else __cli_commands__
+    try:
+        command = commands[cmd_name]
+    except KeyError:
+        return dict(status=1, output="", error="The command " + str(cmd_name).upper() +
+                    " is not available on the server")
+
+    server_config = dict(config)
+    server_path = list(sys.path)
+    if cli_config:
+        config.clear()
+        config.update(cli_config)
+    if cli_path:
+        sys.path.extend(p for p in cli_path if p not in sys.path)
+    output = io.StringIO()
+    try:
+        module = importlib.import_module(command['module'])
+        func = getattr(module, command['func'])
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(output):
+            func(*args, **params)
+        result = dict(status=0, output=output.getvalue(), error=None)
+    except Exception as e:
+        result = dict(status=1, output=output.getvalue(), error=str(e.args[-1]) if e.args else str(e))
+    finally:
+        # Release the figures created by the plot command
+        if 'matplotlib.pyplot' in sys.modules:
+            sys.modules['matplotlib.pyplot'].close('all')
+        # Restore the configuration of the server for the next request
+        config.clear()
+        config.update(server_config)
+        sys.path[:] = server_path
+    return result
+
+
+class EvaluationServer(object):
+    """ Runs the commands received from the clients on a bounded pool of worker processes.
+
+    :param jobs: number of worker processes
+    :type jobs: int
+    """
+    def __init__(self, jobs=1):
+        from concurrent import futures
+        self._jobs = jobs
+        self._executor = futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+        self._servers = []
+
+    def handle(self, request):
+        """ Processes a request and returns the response.
+
+        :param request: dict containing command, args, params and cwd keys, and optionally config, commands and path
+            keys (see :py:func:`execute`)
+        :type request: dict
+        :return: response dict
+        :rtype: dict
+        """
+        cmd_name = request.get('command', '')
+        if cmd_name == '__status__':
+            return dict(status=0, output="", error=None, jobs=self._jobs, pid=os.getpid())
+        if cmd_name == '__shutdown__':
+            self.shutdown()
+            return dict(status=0, output="Server is shutting down\n", error=None)
+        if cmd_name not in CLI_FORWARD_COMMANDS:
+            return dict(status=1, output="", error="The command " + str(cmd_name).upper() +
+                        " is not available on the server")
+        future = self._executor.submit(execute, cmd_name, request.get('args', []), request.get('params', {}),
+                                       request.get('cwd', os.getcwd()), request.get('config', None),
+                                       request.get('commands', None), request.get('path', None))
+        return future.result()
+
+    def serve_unix(self, path):
+        """ Serves the requests over a Unix socket.
+
+        :param path: path to the Unix socket
+        :type path: str
+        """
+        import socketserver
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = server.handle(json.loads(line.decode('utf-8')))
+                    except ValueError as e:
+                        response = dict(status=1, output="", error="Invalid request: " + str(e))
+                    self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+                    self.wfile.flush()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(path):
+            os.remove(path)
+        sock_dir = os.path.dirname(path)
+        if sock_dir and not os.path.isdir(sock_dir):
+            os.makedirs(sock_dir)
+        srv = Server(path, Handler)
+        self._servers.append(srv)
+        try:
+            srv.serve_forever()
+        finally:
+            srv.server_close()
+            if os.path.exists(path):
+                os.remove(path)
+
+    def serve_http(self, port, token, host="127.0.0.1"):
+        """ Serves the requests over HTTP; POST /run runs a command and GET /status returns the server status.
+
+        The requests must send the access token in ``Authorization: Bearer <token>`` header. POST requests must have
+        ``application/json`` content type, and the requests sent by the web pages of the other origins are rejected.
+        The requests cannot replace the command definitions or the import paths of the server.
+
+        :param port: port number
+        :type port: int
+        :param token: access token
+        :type token: str
+        :param host: host name, localhost by default
+        :type host: str
+        """
+        from http import server as http_server
+        import socketserver
+        import hmac
+        server = self
+        origins = ("http://" + host + ":" + str(port), "http://localhost:" + str(port))
+
+        class Handler(http_server.BaseHTTPRequestHandler):
+            def _respond(self, response):
+                content = json.dumps(response).encode('utf-8')
+                self.send_response(200 if response['status'] == 0 else 500)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def _authorize(self):
+                origin = self.headers.get('Origin', None)
+                if origin is not None and origin not in origins:
+                    self.send_error(403, "Cross-origin requests are not allowed")
+                    return False
+                auth = self.headers.get('Authorization', '')
+                if not hmac.compare_digest(auth.encode('utf-8'), ("Bearer " + token).encode('utf-8')):
+                    self.send_error(401, "Invalid access token")
+                    return False
+                return True
+
+            def do_GET(self):
+                if self.path != "/status":
+                    self.send_error(404)
+                    return
+                if not self._authorize():
+                    return
+                self._respond(server.handle(dict(command='__status__')))
+
+            def do_POST(self):
+                if self.path != "/run":
+                    self.send_error(404)
+                    return
+                if not self._authorize():
+                    return
+                if self.headers.get('Content-Type', '').split(";")[0].strip().lower() != "application/json":
+                    self.send_error(415, "Content type must be application/json")
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(length).decode('utf-8'))
+                except ValueError as e:
+                    self._respond(dict(status=1, output="", error="Invalid request: " + str(e)))
+                    return
+                if 'commands' in request or 'path' in request:
+                    self._respond(dict(status=1, output="", error="User-defined commands are not accepted over HTTP"))
+                    return
+                self._respond(server.handle(request))
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, http_server.HTTPServer):
+            daemon_threads = True
+
+        srv = Server((host, int(port)), Handler)
+        self._servers.append(srv)
+        try:
+            srv.serve_forever()
+        finally:
+            srv.server_close()
+
+    def shutdown(self):
+        """Stops serving the requests"""
+        import threading
+        for srv in self._servers:
+            # shutdown() blocks until serve_forever() returns, so it must be called from another thread
+            threading.Thread(target=srv.shutdown).start()
+
+    def close(self):
+        """Stops the worker processes"""
+        self._executor.shutdown(wait=True)
+
+
+def send_request(request, path=None, timeout=None):
+    """ Sends a request to the server over the Unix socket.
+
+    :param request: request dict
+    :type request: dict
+    :param path: path to the Unix socket (default is the value returned by :py:func:`socket_path`)
+    :type path: str
+    :param timeout: connection timeout in seconds
+    :type timeout: float
+    :return: response dict or None, if the server is not running
+    :rtype: dict
+    """
+    path = path if path else socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+    except (IOError, OSError):
+        sock.close()
+        return None
+    try:
+        sock.settimeout(None)
+        with sock.makefile('rwb') as fp:
+            fp.write(json.dumps(request).encode('utf-8') + b"\n")
+            fp.flush()
+            line = fp.readline()
+    finally:
+        sock.close()
+    return json.loads(line.decode('utf-8')) if line else None
+
+
+def forward(cmd_name, args, params):
+    """ Forwards the command to the server, if the server is running.
+
+    Only the commands writing their output to the screen or to files are forwarded, e.g. 'plot' command is forwarded
+    only if '--name' parameter is set. '--local', '--timings' and '--profile' parameters or setting ``serve_forward``
+    configuration variable to False disables forwarding. The commands reading the standard input or writing to the
+    standard output, i.e. using "-" as the file name, are not forwarded. The request contains the effective
+    configuration and the command definitions of the client, which the server uses while running the command.
+
+    :param cmd_name: command name
+    :type cmd_name: str
+    :param args: command arguments
+    :type args: list
+    :param params: command parameters
+    :type params: dict
+    :return: response dict or None, if the command is not forwarded
+    :rtype: dict
+    """
+    if not config.get('serve_forward', True) or cmd_name not in CLI_FORWARD_COMMANDS:
+        return None
+    if any(p in params for p in CLI_LOCAL_PARAMS) or (cmd_name == 'plot' and 'name' not in params):
+        return None
+    if streams.CLI_STDIO_NAME in args or params.get('name', None) == streams.CLI_STDIO_NAME:
+        return None
+    # Relative paths are resolved using the working directory of the client
+    request = dict(
+        command=cmd_name,
+        args=list(args),
+        params={k: v for k, v in params.items() if k not in CLI_CLIENT_PARAMS},
+        cwd=os.getcwd(),
+        config=dict(config),
+        commands=dict(__cli_commands__),
+        # Directories of the custom configuration files containing the modules of the user-defined commands
+        path=[p for p in sys.path if os.path.basename(p) == __cli_config_dir__]
+    )
+    return send_request(request, timeout=0.5)
+
+
+def serve(**kwargs):
+    """ Starts the server.
+
+    Keyword Arguments:
+        * ``socket``: path to the Unix socket. *Default: value returned by socket_path()*
+        * ``port``: serves over HTTP on localhost if set
+        * ``token``: access token of the HTTP server. *Default: serve_token configuration variable or a random token*
+        * ``jobs``: number of worker processes. *Default: 1*
+    """
+    from . import batch
+    jobs = batch.num_jobs(kwargs.get('jobs', 1))
+    server = EvaluationServer(jobs=jobs)
+    try:
+        if 'port' in kwargs:
+            import secrets
+            token = str(kwargs.get('token', None) or config.get('serve_token', None) or secrets.token_urlsafe(32))
+            print(__cli_name__, "server is listening on http://127.0.0.1:" + str(kwargs['port']),
+                  "with", jobs, "worker(s)")
+            print("Access token:", token)
+            sys.stdout.flush()
+            server.serve_http(kwargs['port'], token)
+        else:
+            path = kwargs.get('socket', socket_path())
+            print(__cli_name__, "server is listening on", path, "with", jobs, "worker(s)")
+            sys.stdout.flush()
+            server.serve_unix(path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
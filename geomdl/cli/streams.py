@@ -0,0 +1,413 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Input and output streams for geomdl-cli
+#
+# The file name "-" reads the input from the standard input and writes the output to the standard output, so the
+# commands can be chained in pipelines without temporary files. The NDJSON shape streams contain one geomdl JSON
+# document per line, which allows the shapes to be processed one by one as they arrive.
+#
+# The files with a compression extension, e.g. surface.json.gz, are decompressed and compressed while they are read and
+# written; the compressed standard input is detected from its signature.
+#
+
+import io
+import os.path
+import sys
+import json
+from . import parsers
+
+# File name of the standard input and output
+CLI_STDIO_NAME = "-"
+
+# Output formats which update their headers after writing the data or seek while writing, e.g. the zip archives of
+# npz; they are buffered while writing to the standard output or to a compressed file and copied to it when the output
+# is closed
+CLI_SPOOLED_FORMATS = ('npy', 'npz', 'vtk', 'stl', 'off', 'gnb')
+
+# Maximum size of the buffered output kept in the memory (in bytes), the rest is buffered in a temporary file
+CLI_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+# Supported compression formats: file extension -> file signature
+CLI_COMPRESSION_TYPES = dict(
+    gz=b"\x1f\x8b",
+    xz=b"\xfd7zXZ\x00",
+    zst=b"\x28\xb5\x2f\xfd",
+)
+
+
+def is_stdio(file_name):
+    """ Checks if the file name refers to the standard input or output.
+
+    :param file_name: file name
+    :type file_name: str
+    :rtype: bool
+    """
+    return file_name == CLI_STDIO_NAME
+
+
+def split_compression(file_name):
+    """ Splits the compression extension from the file name, e.g. surface.json.gz to surface.json and gz.
+
+    :param file_name: file name
+    :type file_name: str
+    :return: file name without the compression extension and the compression type (None if not compressed)
+    :rtype: tuple
+    """
+    fname, fext = os.path.splitext(file_name)
+    if fext[1:].lower() in CLI_COMPRESSION_TYPES:
+        return fname, fext[1:].lower()
+    return file_name, None
+
+
+def is_compressed(file_name):
+    """ Checks if the input or output file is compressed, from its extension.
+
+    :param file_name: file name
+    :type file_name: str
+    :rtype: bool
+    """
+    return split_compression(file_name)[1] is not None
+
+
+def open_compressed(file_obj, mode, compression):
+    """ Opens a compressed file, which compresses or decompresses the data while writing or reading.
+
+    :param file_obj: file name or a binary file object
+    :param mode: file mode, e.g. 'rb', 'wb' or 'rt'
+    :type mode: str
+    :param compression: compression type, one of :py:data:`CLI_COMPRESSION_TYPES`
+    :type compression: str
+    :return: file object
+    """
+    if compression == 'gz':
+        import gzip
+        return gzip.open(file_obj, mode)
+    if compression == 'xz':
+        import lzma
+        return lzma.open(file_obj, mode)
+    if compression == 'zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Please install 'zstandard' package to use zstd compression: pip install zstandard")
+        return zstandard.open(file_obj, mode)
+    raise RuntimeError("Unsupported compression type: " + str(compression))
+
+
+class OutputStream(object):
+    """ File object writing to another file object, e.g. the standard output or a compressed file.
+
+    If ``spooled`` is True, the output is buffered in a temporary file, which makes the stream seekable for the writers
+    updating the file headers, and copied to the target when the stream is closed. Closing the stream closes the target,
+    except the standard output, which is flushed instead.
+
+    :param target: target file object
+    :param spooled: buffers the output until the stream is closed
+    :type spooled: bool
+    """
+    def __init__(self, target, spooled=False):
+        self._target = target
+        self._spool = None
+        if spooled:
+            import tempfile
+            binary = not isinstance(target, io.TextIOBase)
+            self._spool = tempfile.SpooledTemporaryFile(max_size=CLI_SPOOL_MAX_SIZE, mode='w+b' if binary else 'w+')
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, data):
+        if self._spool is not None:
+            return self._spool.write(data)
+        return self._target.write(data)
+
+    def seekable(self):
+        return self._spool is not None
+
+    def tell(self):
+        if self._spool is None:
+            raise io.UnsupportedOperation("The output stream is not seekable")
+        return self._spool.tell()
+
+    def seek(self, offset, whence=0):
+        if self._spool is None:
+            raise io.UnsupportedOperation("The output stream is not seekable")
+        return self._spool.seek(offset, whence)
+
+    def flush(self):
+        if self._spool is None:
+            self._target.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._spool is not None:
+            import shutil
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, self._target)
+            self._spool.close()
+        if self._target in (sys.stdout, sys.stdout.buffer):
+            self._target.flush()
+        else:
+            self._target.close()
+
+
+def open_output(file_name, mode='w', export_format='', spooled=False):
+    """ Opens the output file, or the standard output if the file name is "-".
+
+    The files with a compression extension, e.g. points.csv.gz, are compressed while writing. The outputs of the formats
+    in :py:data:`CLI_SPOOLED_FORMATS` are buffered if they are written to the standard output or compressed.
+
+    :param file_name: output file name
+    :type file_name: str
+    :param mode: file mode, 'w' or 'wb'
+    :type mode: str
+    :param export_format: export format
+    :type export_format: str
+    :param spooled: buffers the output of the standard output or the compressed files regardless of the format
+    :type spooled: bool
+    :return: file object
+    """
+    binary = 'b' in mode
+    spooled = spooled or export_format in CLI_SPOOLED_FORMATS
+    if is_stdio(file_name):
+        return OutputStream(sys.stdout.buffer if binary else sys.stdout, spooled=spooled)
+    compression = split_compression(file_name)[1]
+    if compression is None:
+        return open(file_name, mode)
+    target = open_compressed(file_name, 'wb' if binary else 'wt', compression)
+    return OutputStream(target, spooled=True) if spooled else target
+
+
+def open_input(file_name, binary=False):
+    """ Opens the input file, or the standard input if the file name is "-".
+
+    The compressed files are decompressed while reading. The compression is detected from the file extension, or from
+    the signature of the data for the standard input.
+
+    :param file_name: input file name
+    :type file_name: str
+    :param binary: reads bytes instead of strings
+    :type binary: bool
+    :return: file object, which should not be closed if it is the standard input
+    """
+    if is_stdio(file_name):
+        target = sys.stdin.buffer
+        signature = target.peek(8)
+        compression = None
+        for ctype, magic in CLI_COMPRESSION_TYPES.items():
+            if signature.startswith(magic):
+                compression = ctype
+        if compression is None:
+            return target if binary else sys.stdin
+        target = open_compressed(target, 'rb', compression)
+        return target if binary else io.TextIOWrapper(target)
+    compression = split_compression(file_name)[1]
+    if compression is None:
+        return open(file_name, 'rb' if binary else 'r')
+    return open_compressed(file_name, 'rb' if binary else 'rt', compression)
+
+
+def read_input(file_name, binary=False):
+    """ Reads the complete input file, or the standard input if the file name is "-".
+
+    :param file_name: input file name
+    :type file_name: str
+    :param binary: returns bytes instead of a string
+    :type binary: bool
+    :return: file contents
+    """
+    fp = open_input(file_name, binary=binary)
+    try:
+        return fp.read()
+    finally:
+        if not is_stdio(file_name):
+            fp.close()
+
+
+def write_output(file_name, data):
+    """ Writes a string to the output file, or to the standard output if the file name is "-".
+
+    :param file_name: output file name
+    :type file_name: str
+    :param data: file contents
+    :type data: str
+    """
+    with open_output(file_name, 'w') as fp:
+        fp.write(data)
+
+
+class ShapeStream(object):
+    """ Shapes of an NDJSON stream, which are read and constructed one at a time.
+
+    Each line of the stream is a JSON document in geomdl format, e.g. ``{"shape": {"type": "surface", "data": [...]}}``,
+    usually containing a single shape. The lines are read while iterating, so the previous shapes can be evaluated and
+    written before the next line arrives. The selected shapes are returned in the order of the stream and the stream can
+    be iterated only once if it is the standard input.
+
+    :param file_name: input file name, "-" reads the standard input
+    :type file_name: str
+    :param delta: evaluation delta of the shapes
+    :type delta: float
+    :param indices: indices of the shapes to read (default: all shapes)
+    :type indices: list
+    :param callback: function called with each constructed shape, e.g. for setting the evaluator
+    """
+    def __init__(self, file_name, delta=-1.0, indices=None, callback=None):
+        self.file_name = file_name
+        self.delta = float(delta)
+        self.indices = indices
+        self.callback = callback
+
+    def _lines(self):
+        fp = open_input(self.file_name)
+        try:
+            for line in fp:
+                yield line
+        finally:
+            if not is_stdio(self.file_name):
+                fp.close()
+
+    def __iter__(self):
+        from geomdl import _exchange
+        importers = dict(curve=_exchange.import_dict_crv, surface=_exchange.import_dict_surf,
+                         volume=_exchange.import_dict_vol)
+        selected = None if self.indices is None else set(self.indices)
+        count = 0
+        for line_no, line in enumerate(self._lines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = parsers.parse_json(line)
+                importer = importers[data['shape']['type']]
+                shape_list = data['shape']['data']
+            except (ValueError, KeyError, TypeError):
+                raise RuntimeError("Line " + str(line_no) + " of the NDJSON stream is not a geomdl JSON document")
+            for shape_data in shape_list:
+                if selected is None or count in selected:
+                    shape = importer(shape_data)
+                    if 0.0 < self.delta < 1.0:
+                        shape.delta = self.delta
+                    if self.callback is not None:
+                        self.callback(shape)
+                    yield shape
+                count += 1
+        if selected is not None and max(selected) >= count:
+            raise RuntimeError("Shape index " + str(max(selected)) + " is out of range, the input stream contains "
+                               + str(count) + " shapes")
+
+
+def import_ndjson(file_name, **kwargs):
+    """ Imports the shapes from an NDJSON file or stream.
+
+    Keyword Arguments:
+        * ``delta``: evaluation delta of the imported shapes
+        * ``indices``: list of the shape indices to import (default: all shapes)
+
+    :param file_name: input file name, "-" reads the standard input
+    :type file_name: str
+    :return: list of the imported shapes
+    :rtype: list
+    """
+    indices = kwargs.get('indices', None)
+    shapes = list(ShapeStream(file_name, delta=kwargs.get('delta', -1.0), indices=indices))
+    if indices is None:
+        return shapes
+    # Return the shapes in the order of the indices, like the other importers do
+    order = sorted(set(indices))
+    return [shapes[order.index(idx)] for idx in indices]
+
+
+def ndjson_line(shape):
+    """ Generates the NDJSON line of a single shape.
+
+    :param shape: curve, surface or volume
+    :return: geomdl JSON document of the shape on a single line
+    :rtype: str
+    """
+    from geomdl import _exchange
+    return _exchange.export_dict_str(shape, callback=lambda data: json.dumps(data, separators=(',', ':'))) + "\n"
+
+
+def export_ndjson(obj, file_name):
+    """ Exports the shapes as an NDJSON stream, one shape per line.
+
+    The shapes are written and flushed one by one, so the next command of a pipeline can start processing the first
+    shapes while the others are being read.
+
+    :param obj: curve, surface, volume, a container of them or a :py:class:`ShapeStream`
+    :param file_name: name of the export file, "-" writes to the standard output
+    :type file_name: str
+    """
+    with open_output(file_name, 'w') as fp:
+        for shape in obj:
+            fp.write(ndjson_line(shape))
+            fp.flush()
+
+
+def _dump_json(data):
+    return json.dumps(data, indent=4)
+
+
+def _dump_yaml(data):
+    try:
+        from ruamel.yaml import YAML
+    except ImportError:
+        raise RuntimeError("Please install 'ruamel.yaml' package to use YAML format: pip install ruamel.yaml")
+    stream = io.StringIO()
+    YAML().dump(data, stream)
+    return stream.getvalue()
+
+
+def _dump_cfg(data):
+    try:
+        import libconf
+    except ImportError:
+        raise RuntimeError("Please install 'libconf' package to use libconfig format: pip install libconf")
+    return libconf.dumps(data)
+
+
+# Serializers of the text shape formats, the same as the exporters of geomdl use
+CLI_TEXT_DUMPERS = dict(
+    json=_dump_json,
+    yaml=_dump_yaml,
+    cfg=_dump_cfg,
+)
+
+
+def export_text(obj, file_name, export_format):
+    """ Exports the shapes in a text shape format, e.g. json or yaml, to the standard output or to a compressed file.
+
+    :param obj: curve, surface, volume or a container of them
+    :param file_name: name of the export file, "-" writes to the standard output
+    :type file_name: str
+    :param export_format: export format, one of :py:data:`CLI_TEXT_DUMPERS`
+    :type export_format: str
+    """
+    from geomdl import _exchange
+    write_output(file_name, _exchange.export_dict_str(obj, callback=CLI_TEXT_DUMPERS[export_format]))
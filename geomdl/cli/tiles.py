@@ -0,0 +1,249 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tiled evaluation of the curves, surfaces and volumes
+#
+# The parameter grid of a shape is split into blocks (tiles) of at most the tile size points, which are evaluated and
+# passed to the point writers one by one. The tiles are contiguous ranges of the evaluated points, so the writers
+# receive the points in the same order as the complete evaluation and the peak memory usage is set by the tile size
+# instead of the sample size of the shape.
+#
+
+import itertools
+from . import basis
+from . import timings
+
+
+def tile_ranges(sizes, tile_size):
+    """ Splits the parameter grid into tiles containing at most the tile size points.
+
+    The last parametric direction changes fastest in the evaluated points. The trailing directions fitting into a tile
+    are kept complete and the first direction not fitting is split, so each tile is a contiguous range of points.
+
+    :param sizes: sample size in each parametric direction
+    :type sizes: list, tuple
+    :param tile_size: maximum number of points in a tile
+    :type tile_size: int
+    :return: (start, stop) index range in each parametric direction for each tile
+    :rtype: generator
+    """
+    inner = 1
+    split = len(sizes)
+    while split > 0 and inner * sizes[split - 1] <= tile_size:
+        split -= 1
+        inner *= sizes[split]
+    if split == 0:
+        yield [(0, size) for size in sizes]
+        return
+    split -= 1
+    step = max(1, tile_size // inner)
+    for outer in itertools.product(*[range(size) for size in sizes[:split]]):
+        for start in range(0, sizes[split], step):
+            yield [(idx, idx + 1) for idx in outer] + [(start, min(start + step, sizes[split]))] + \
+                  [(0, size) for size in sizes[split + 1:]]
+
+
+class GridEvaluator(object):
+    """ Evaluates the tiles of the parameter grid of a shape using the algorithms of geomdl evaluators.
+
+    The parameters, the knot spans and the basis functions of each parametric direction are taken from the memoized
+    tables of :py:mod:`.basis` module and the points are summed in the same order as geomdl evaluators, so the tiles
+    contain exactly the same values as the evaluated points of the shape.
+
+    :param shape: curve, surface or volume
+    :param data: data dictionary of the shape, if it is already available
+    :type data: dict
+    """
+    def __init__(self, shape, data=None):
+        data = shape.data if data is None else data
+        self._degree = data['degree']
+        self._size = data['size']
+        self._ctrlpts = data['control_points']
+        self._rational = data['rational']
+        self._dim = data['dimension'] + 1 if data['rational'] else data['dimension']
+        self._spans = []
+        self._basis = []
+        for degree, knotvector, size, sample_size in zip(data['degree'], data['knotvector'], data['size'],
+                                                         data['sample_size']):
+            spans, basis_funcs = basis.grid_tables(degree, knotvector, size, sample_size, data['precision'])
+            self._spans.append(spans)
+            self._basis.append(basis_funcs)
+        self.sample_sizes = [len(spans) for spans in self._spans]
+
+    def _curve(self, ranges):
+        degree = self._degree[0]
+        spans, basis = self._spans[0], self._basis[0]
+        ctrlpts = self._ctrlpts
+        points = []
+        for idx in range(*ranges[0]):
+            crvpt = [0.0 for _ in range(self._dim)]
+            for i in range(0, degree + 1):
+                crvpt[:] = [crv_p + (basis[idx][i] * ctl_p) for crv_p, ctl_p in
+                            zip(crvpt, ctrlpts[spans[idx] - degree + i])]
+            points.append(crvpt)
+        return points
+
+    def _surface(self, ranges):
+        degree, size = self._degree, self._size
+        spans, basis = self._spans, self._basis
+        ctrlpts = self._ctrlpts
+        points = []
+        for i in range(*ranges[0]):
+            idx_u = spans[0][i] - degree[0]
+            for j in range(*ranges[1]):
+                idx_v = spans[1][j] - degree[1]
+                spt = [0.0 for _ in range(self._dim)]
+                for k in range(0, degree[0] + 1):
+                    temp = [0.0 for _ in range(self._dim)]
+                    for l in range(0, degree[1] + 1):
+                        temp[:] = [tmp + (basis[1][j][l] * cp) for tmp, cp in
+                                   zip(temp, ctrlpts[idx_v + l + (size[1] * (idx_u + k))])]
+                    spt[:] = [pt + (basis[0][i][k] * tmp) for pt, tmp in zip(spt, temp)]
+                points.append(spt)
+        return points
+
+    def _volume(self, ranges):
+        degree, size = self._degree, self._size
+        spans, basis = self._spans, self._basis
+        ctrlpts = self._ctrlpts
+        points = []
+        for i in range(*ranges[0]):
+            iu = spans[0][i] - degree[0]
+            for j in range(*ranges[1]):
+                iv = spans[1][j] - degree[1]
+                for k in range(*ranges[2]):
+                    iw = spans[2][k] - degree[2]
+                    spt = [0.0 for _ in range(self._dim)]
+                    for du in range(0, degree[0] + 1):
+                        temp2 = [0.0 for _ in range(self._dim)]
+                        for dv in range(0, degree[1] + 1):
+                            temp = [0.0 for _ in range(self._dim)]
+                            for dw in range(0, degree[2] + 1):
+                                temp[:] = [tmp + (basis[2][k][dw] * cp) for tmp, cp in
+                                           zip(temp, ctrlpts[iv + dv + (size[1] * (iu + du + (size[0] * (iw + dw))))])]
+                            temp2[:] = [pt + (basis[1][j][dv] * tmp) for pt, tmp in zip(temp2, temp)]
+                        spt[:] = [pt + (basis[0][i][du] * tmp) for pt, tmp in zip(spt, temp2)]
+                    points.append(spt)
+        return points
+
+    def evaluate(self, ranges):
+        """ Evaluates a tile.
+
+        :param ranges: (start, stop) index range in each parametric direction
+        :type ranges: list
+        :return: evaluated points
+        :rtype: list
+        """
+        points = (self._curve, self._surface, self._volume)[len(ranges) - 1](ranges)
+        if self._rational:
+            points = [[float(c / pt[-1]) for c in pt[0:(self._dim - 1)]] for pt in points]
+        return points
+
+
+class NumpyGridEvaluator(object):
+    """ Evaluates the tiles of the parameter grid of a shape using the vectorized evaluator of numpy backend.
+
+    The basis function matrices of the complete parametric directions are taken from the memoized tables of
+    :py:mod:`.basis` module and sliced for each tile.
+
+    :param shape: curve, surface or volume
+    """
+    def __init__(self, shape):
+        from . import backends
+        if backends.np is None:
+            raise RuntimeError("Please install 'numpy' package to use numpy backend: pip install numpy")
+        self._backends = backends
+        self._bases = []
+        self.sample_sizes = []
+        for degree, knotvector, size, sample_size in backends.shape_data(shape):
+            self.sample_sizes.append(sample_size)
+            self._bases.append(backends.grid_basis_matrix(degree, knotvector, size, knotvector[degree],
+                                                          knotvector[-(degree + 1)], sample_size))
+        self._ctrlptsw = backends.homogeneous_ctrlpts(shape)
+
+    def evaluate(self, ranges):
+        """ Evaluates a tile.
+
+        :param ranges: (start, stop) index range in each parametric direction
+        :type ranges: list
+        :return: evaluated points
+        :rtype: list
+        """
+        bases = [basis[start:stop] for basis, (start, stop) in zip(self._bases, ranges)]
+        return self._backends.evaluate_grid(bases, self._ctrlptsw).tolist()
+
+
+# Tile evaluators of the evaluation backends
+CLI_TILE_EVALUATORS = dict(
+    geomdl=GridEvaluator,
+    numpy=NumpyGridEvaluator,
+)
+
+
+def evaluate_tiles(shape, tile_size, backend='geomdl'):
+    """ Evaluates the shape tile by tile.
+
+    :param shape: curve, surface or volume
+    :param tile_size: maximum number of points in a tile
+    :type tile_size: int
+    :param backend: evaluation backend, see ``CLI_TILE_EVALUATORS``
+    :type backend: str
+    :return: evaluated points of each tile
+    :rtype: generator
+    """
+    try:
+        evaluator_cls = CLI_TILE_EVALUATORS[backend]
+    except KeyError:
+        raise RuntimeError("Unknown evaluation backend '" + str(backend) + "'. Possible backends: " +
+                           ", ".join(sorted(CLI_TILE_EVALUATORS.keys())))
+    with timings.stage('eval'):
+        evaluator = evaluator_cls(shape)
+    for ranges in tile_ranges(evaluator.sample_sizes, max(1, int(tile_size))):
+        with timings.stage('eval'):
+            points = evaluator.evaluate(ranges)
+        yield points
+
+
+def write_tiles(obj, writer, tile_size, backend='geomdl'):
+    """ Evaluates the shapes tile by tile and passes the evaluated points of each tile to the writer.
+
+    The shapes whose evaluated points are already available, e.g. cached or evaluated by the worker processes, are
+    written without evaluating them again. The evaluated points of the tiles are not stored in the cache.
+
+    :param obj: a spline geometry or a container
+    :param writer: evaluated point writer
+    :type writer: writers.PointWriter
+    :param tile_size: maximum number of points in a tile
+    :type tile_size: int
+    :param backend: evaluation backend
+    :type backend: str
+    """
+    with writer:
+        for shape in obj:
+            writer.begin_shape(shape)
+            evaluator = shape.evaluator
+            if hasattr(evaluator, 'is_cached') and evaluator.is_cached():
+                writer.write(shape.evalpts)
+                shape.reset(evalpts=True)
+            else:
+                for points in evaluate_tiles(shape, tile_size, backend):
+                    writer.write(points)
+            writer.end_shape()
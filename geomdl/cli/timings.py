@@ -0,0 +1,200 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Stage timing and profiling functions for geomdl-cli
+#
+# This module is imported at the start-up, so it must only import the lightweight standard library modules.
+#
+
+import sys
+import json
+import time
+import threading
+import contextlib
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def peak_rss(children=False):
+    """ Returns the peak resident set size of the process or its terminated child processes.
+
+    :param children: if True, returns the largest peak resident set size of the child processes
+    :type children: bool
+    :return: peak resident set size in bytes, or None if it is not available on the platform
+    :rtype: int
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes on the other platforms
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+class StageTimer(object):
+    """ Collects the wall time and the peak memory usage of the command stages.
+
+    The stages can be nested and the same stage can be entered multiple times. The time of a stage excludes the time of
+    its nested stages, so that the stage times add up to the total run time. The stages can also run in multiple
+    threads, e.g. while writing multiple outputs concurrently, in which case the stage times may add up to more than
+    the total run time.
+
+    The counters, e.g. the cache hits and misses, are reported after the stages.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.command = None
+        self._start = time.perf_counter()
+        self._stages = OrderedDict()
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        # Each thread nests its own stages
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ Measures the stage running inside the context.
+
+        :param name: stage name, e.g. parse, eval or export
+        :type name: str
+        """
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            with self._lock:
+                entry = self._stages.setdefault(name, dict(time=0.0, calls=0))
+                entry['time'] += elapsed - nested
+                entry['calls'] += 1
+                entry['peak_rss'] = peak_rss()
+
+    def count(self, name, key, value=1):
+        """ Increments a counter.
+
+        :param name: counter name, e.g. basis_cache
+        :type name: str
+        :param key: counted value, e.g. hits or misses
+        :type key: str
+        :param value: increment
+        :type value: int
+        """
+        with self._lock:
+            entry = self._counters.setdefault(name, OrderedDict())
+            entry[key] = entry.get(key, 0) + value
+
+    def records(self):
+        """ Returns the timing records of the stages and the counters followed by a record of the total run time.
+
+        :return: list of timing records
+        :rtype: list
+        """
+        ret = []
+        for name, entry in self._stages.items():
+            ret.append(dict(type='timing', command=self.command, stage=name, time=round(entry['time'], 6),
+                            calls=entry['calls'], peak_rss=entry['peak_rss']))
+        for name, entry in self._counters.items():
+            rec = dict(type='counter', command=self.command, counter=name)
+            rec.update(entry)
+            # Hit rate of the caches
+            lookups = entry.get('hits', 0) + entry.get('misses', 0)
+            if lookups:
+                rec['hit_rate'] = round(entry.get('hits', 0) / float(lookups), 4)
+            ret.append(rec)
+        total = dict(type='timing', command=self.command, stage='total',
+                     time=round(time.perf_counter() - self._start, 6), calls=1, peak_rss=peak_rss())
+        children_rss = peak_rss(children=True)
+        if children_rss:
+            total['peak_rss_children'] = children_rss
+        ret.append(total)
+        return ret
+
+    def report(self, fp=None):
+        """ Writes the timing records as JSON lines.
+
+        :param fp: file object (default: sys.stderr)
+        """
+        fp = sys.stderr if fp is None else fp
+        for rec in self.records():
+            fp.write(json.dumps(rec) + "\n")
+        fp.flush()
+
+
+# Timer of the current process
+timer = StageTimer()
+
+
+def stage(name):
+    """ Measures a stage of the command running in the current process.
+
+    The stages are always measured, as the overhead is negligible, but they are only reported if '--timings'
+    parameter is set.
+
+    :param name: stage name
+    :type name: str
+    """
+    return timer.stage(name)
+
+
+def profile(func, file_name, *args, **kwargs):
+    """ Runs the function with cProfile and tracemalloc and saves the results.
+
+    The cProfile statistics are saved as ``file_name`` which can be loaded via :py:mod:`pstats` or the visualization
+    tools, e.g. snakeviz. The peak memory usage and the top memory allocations are saved as ``file_name.mem``.
+
+    :param func: function to profile
+    :param file_name: name of the profile output file
+    :type file_name: str
+    :return: return value of the function
+    """
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        profiler.dump_stats(file_name)
+        with open(file_name + ".mem", 'w') as fp:
+            fp.write("Peak traced memory: {p:.1f} KB\n".format(p=peak / 1024.0))
+            fp.write("Current traced memory: {c:.1f} KB\n\n".format(c=current / 1024.0))
+            fp.write("Top memory allocations:\n")
+            for stat in snapshot.statistics('lineno')[:25]:
+                fp.write(str(stat) + "\n")
+        sys.stderr.write("Profiling results saved as {fn} and {fn}.mem\n".format(fn=file_name))
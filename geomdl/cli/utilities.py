@@ -24,25 +24,60 @@
 
 import os
 import os.path
+import sys
+import copy
 from geomdl import __version__
 from geomdl import NURBS
 from geomdl import multi
 from geomdl import exchange
-from geomdl.visualization import VisMPL
+from geomdl import evaluators
+from geomdl import _exchange
+from . import basis
+from . import cache
+from . import gnb
+from . import parsers
+from . import streams
+from . import timings
+from . import writers
+from . import writers_vtk
+from . import writers_mesh
 
 
+# Export formats using the evaluated points of the shapes
+CLI_MESH_EXPORT_TYPES = ('obj', 'stl', 'off')
+
+# Export formats of the evaluated points
+CLI_EVALPTS_EXPORT_TYPES = ('screen', 'csv', 'txt', 'npy', 'npz', 'raw', 'vtk', 'vts', 'vtp', 'vtm')
+
 # File types allowed for importing
 CLI_FILE_IMPORT_TYPES = dict(
     cfg=exchange.import_cfg,
     conf=exchange.import_cfg,
     yaml=exchange.import_yaml,
     json=exchange.import_json,
+    gnb=gnb.import_gnb,
+    ndjson=streams.import_ndjson,
 )
 
 
+class TimedEvaluator(evaluators.AbstractEvaluator):
+    """Evaluator measuring the evaluation stage of the wrapped evaluator (used by '--timings' parameter)"""
+    def __init__(self, evaluator):
+        super(TimedEvaluator, self).__init__(name=evaluator.name)
+        self._evaluator = evaluator
+
+    def evaluate(self, *args, **kwargs):
+        with timings.stage('eval'):
+            return self._evaluator.evaluate(*args, **kwargs)
+
+    def derivatives(self, *args, **kwargs):
+        with timings.stage('eval'):
+            return self._evaluator.derivatives(*args, **kwargs)
+
+
 def replace_extension(filename, extension):
-    """Replaces file extension"""
-    fname, fext = os.path.splitext(filename)
+    """Replaces file extension, including the compression extension, e.g. surface.json.gz"""
+    fname, fext = os.path.splitext(streams.split_compression(filename)[0])
     fext = extension
     return fname + "." + fext
 
@@ -52,21 +87,135 @@ def print_version():
     print("geomdl version", __version__)
 
 
-def generate_nurbs_from_file(file_name, delta, shape_idx, file_type=''):
-    """Generates NURBS objects from supported file formats"""
-    # Fix input types
-    delta = float(delta)
-    shape_idx = int(shape_idx)
+def parse_indices(value):
+    """ Parses the shape indices, e.g. 3 or "3,7,10-20" (the ranges include both ends).
 
-    # Try to find file type from its extension
-    if not file_type:
-        fname, fext = os.path.splitext(file_name)
-        file_type = fext[1:]
+    :param value: shape indices; -1 or an empty value selects all shapes, the other negative values are invalid
+    :type value: int or str
+    :return: list of the shape indices or None for all shapes
+    :rtype: list
+    """
+    value = str(value).strip()
+    if value in ("", "-1"):
+        return None
+
+    indices = []
+    for item in value.split(","):
+        try:
+            if "-" in item.strip()[1:]:
+                start, end = [int(v) for v in item.split("-")]
+                if start > end:
+                    raise ValueError
+                indices += range(start, end + 1)
+            else:
+                if int(item) < 0:
+                    raise ValueError
+                indices.append(int(item))
+        except ValueError:
+            raise RuntimeError("Invalid shape index: '" + item.strip() + "'. The shape indices start from 0 and "
+                               "-1 selects all shapes")
+
+    # Remove the duplicates keeping the order of the indices
+    seen = set()
+    return [idx for idx in indices if not (idx in seen or seen.add(idx))]
+
+
+def select_shapes(data, indices):
+    """ Keeps the selected shapes in the parsed file data, so that the other shapes are not constructed.
+
+    :param data: parsed file data
+    :type data: dict
+    :param indices: indices of the shapes to keep (default: all shapes)
+    :type indices: list
+    :return: updated file data
+    :rtype: dict
+    """
+    if indices is None:
+        return data
+    shapes = data['shape']['data']
+    for idx in indices:
+        if not 0 <= idx < len(shapes):
+            raise RuntimeError("Shape index " + str(idx) + " is out of range, the input file contains "
+                               + str(len(shapes)) + " shapes")
+    data['shape']['data'] = [shapes[idx] for idx in indices]
+    return data
+
+
+def import_file(file_name, file_type, delta=-1.0, template=None, indices=None):
+    """ Imports the shapes from the input file processing the Jinja2 templates.
+
+    Works the same as the importers in :py:data:`CLI_FILE_IMPORT_TYPES` with ``jinja2=True``, but reading, template
+    processing and parsing are measured as separate stages. The files are parsed by :py:func:`.parsers.parse`.
 
-    ftype = file_type.lower()
+    If ``template`` is None, the template processing is skipped for the files without any Jinja2 tags. If ``indices``
+    is set, only the selected shapes are constructed; the binary files are not even read beyond the selected shapes.
+
+    :param file_name: input file name
+    :type file_name: str
+    :param file_type: input file type, e.g. yaml
+    :type file_type: str
+    :param delta: evaluation delta of the imported shapes
+    :type delta: float
+    :param template: flag to process the Jinja2 templates; None detects the templates automatically
+    :type template: bool or None
+    :param indices: indices of the shapes to import (default: all shapes)
+    :type indices: list
+    :return: list of the imported shapes
+    :rtype: list
+    """
+    # Binary files are not processed as text
+    if file_type not in parsers.CLI_FILE_PARSERS:
+        with timings.stage('parse'):
+            return CLI_FILE_IMPORT_TYPES[file_type](file_name, delta=delta, indices=indices)
+
+    with timings.stage('read'):
+        file_src = streams.read_input(file_name)
+    if template is None:
+        template = parsers.is_template(file_src)
+    if template:
+        with timings.stage('template'):
+            file_src = _exchange.process_template(file_src)
+    with timings.stage('parse'):
+        return _exchange.import_dict_str(file_src=file_src, delta=delta,
+                                         callback=lambda src: select_shapes(parsers.parse(src, file_type), indices),
+                                         tmpl=False)
+
+
+def generate_nurbs_from_file(file_name, delta, shape_idx, file_type='', use_cache=False, backend='geomdl',
+                             use_template=None):
+    """ Generates NURBS objects from supported file formats.
+
+    If ``use_cache`` is True, the parsed shapes and their evaluated points are loaded from the persistent cache when
+    the input file has not been changed since the last run. ``backend`` sets the evaluation backend of the shapes,
+    e.g. numpy. ``use_template`` is passed to :py:func:`import_file`.
+
+    ``shape_idx`` selects the shapes to import, e.g. 3 or "3,7,10-20" (see :py:func:`parse_indices`). Only the selected
+    shapes are constructed and a single selected shape is returned without a container.
+
+    The file name "-" reads the standard input, which requires the file type and is not cached.
+    """
+    # Fix input types
+    delta = float(delta)
+    indices = parse_indices(shape_idx)
+    ftype = input_file_type(file_name, file_type)
     if ftype in CLI_FILE_IMPORT_TYPES:
+        nurbs_objs = None
+        use_cache = use_cache and not streams.is_stdio(file_name)
+        if use_cache:
+            with timings.stage('cache'):
+                shape_cache = cache.ShapeCache()
+                key = cache.cache_key(file_name, ftype, delta, indices=indices, template=use_template,
+                                      backend=backend)
+                nurbs_objs = shape_cache.load(key)
+
         # Build NURBS object
-        nurbs_objs = CLI_FILE_IMPORT_TYPES[ftype](file_name, delta=delta, jinja2=True)
+        if nurbs_objs is None:
+            nurbs_objs = import_file(file_name, ftype, delta=delta, template=use_template, indices=indices)
+            if use_cache:
+                with timings.stage('cache'):
+                    nurbs_objs = shape_cache.store(key, nurbs_objs)
+
+        _set_evaluators(nurbs_objs, backend)
 
         # Return the shape
         if len(nurbs_objs) == 1:
@@ -82,20 +231,99 @@ def generate_nurbs_from_file(file_name, delta, shape_idx, file_type=''):
         # Set the delta for multi shape objects
         if 0.0 < delta < 1.0:
             result.delta = delta
+        apply_container_delta(result)
 
-        if shape_idx >= 0:
-            return result[shape_idx]
         return result
     else:
         raise RuntimeError("The input file type '" + str(file_type) + "' is not supported")
 
 
+def input_file_type(file_name, file_type=''):
+    """ Returns the input file type, which is found from the file extension if it is not set.
+
+    The compression extension is skipped, e.g. the file type of surface.json.gz is json.
+
+    :param file_name: input file name, "-" reads the standard input
+    :type file_name: str
+    :param file_type: input file type set by the user, e.g. yaml
+    :type file_type: str
+    :return: file type in lower case
+    :rtype: str
+    """
+    if not file_type:
+        if streams.is_stdio(file_name):
+            raise RuntimeError("'--type' parameter is required for reading from the standard input")
+        fname, fext = os.path.splitext(streams.split_compression(file_name)[0])
+        file_type = fext[1:]
+    return file_type.lower()
+
+
+def apply_container_delta(obj):
+    """ Applies the evaluation delta of the container to its shapes.
+
+    The shapes of a container are evaluated with the delta of the container, as the container and the visualization
+    modules evaluate them, instead of the deltas defined in the input file. The shapes already using the delta of the
+    container keep their evaluated points.
+
+    :param obj: a container
+    :type obj: multi.AbstractContainer
+    """
+    def to_list(val):
+        return list(val) if isinstance(val, (list, tuple)) else [val]
+    delta = obj.delta
+    for shape in obj:
+        if to_list(shape.delta) != to_list(delta):
+            shape.delta = delta
+
+
+def _set_evaluators(nurbs_objs, backend):
+    """Sets the evaluation backend of the shapes and measures their evaluation stage if the timings are enabled"""
+    if backend != 'geomdl':
+        with timings.stage('import'):
+            from . import backends
+        backends.set_backend(nurbs_objs, backend)
+    else:
+        # geomdl evaluation algorithms sharing the basis function tables of the shapes
+        basis.set_evaluators(nurbs_objs)
+
+    # Measure the evaluation stage beneath the caching evaluator
+    if timings.timer.enabled:
+        for obj in nurbs_objs:
+            if hasattr(obj.evaluator, 'wrapped'):
+                obj.evaluator.wrapped = TimedEvaluator(obj.evaluator.wrapped)
+            else:
+                obj.evaluator = TimedEvaluator(obj.evaluator)
+
+
+def generate_nurbs_stream(file_name, delta, shape_idx, backend='geomdl', tolerance=None):
+    """ Generates NURBS objects from an NDJSON file or stream one at a time.
+
+    The shapes are constructed while iterating over the returned stream, so each shape can be evaluated and exported
+    before the next one is read. If ``tolerance`` is set, each shape is evaluated adaptively after it is read. The other
+    parameters are the same as :py:func:`generate_nurbs_from_file`.
+
+    :return: shape stream
+    :rtype: streams.ShapeStream
+    """
+    def prepare(shape):
+        _set_evaluators([shape], backend)
+        if tolerance is not None:
+            from . import adaptive
+            adaptive.evaluate_adaptive([shape], tolerance)
+
+    return streams.ShapeStream(file_name, delta=delta, indices=parse_indices(shape_idx), callback=prepare)
+
+
 def build_vis(obj, **kwargs):
     """ Prepares visualization module for the input spline geometry.
 
     :param obj: input spline geometry object
     :return: spline geometry object updated with a visualization module
     """
+    # Importing matplotlib is expensive, import it only when plotting is required
+    with timings.stage('import'):
+        from geomdl.visualization import VisMPL
+
     vis_config = VisMPL.VisConfig(**kwargs)
     if isinstance(obj, (NURBS.Curve, multi.CurveContainer)):
         if obj.dimension == 2:
@@ -114,56 +342,194 @@ def build_vis(obj, **kwargs):
     return obj
 
 
-def export_evalpts(obj, file_name, export_format):
+def export_evalpts(obj, file_name, export_format, **kwargs):
     """ Prints the evaluated points on the screen and optionally exports them to a file.
 
+    The shapes are evaluated one by one and the evaluated points are written in blocks while the evaluation proceeds.
+
+    Keyword Arguments:
+        * ``precision``: number of decimal places of the exported values. *Default: None (full precision)*
+        * ``dtype``: data type of the binary outputs, float64 or float32. *Default: float64*
+        * ``encoding``: encoding of the VTK outputs, ascii, base64 (XML only) or binary. *Default: binary*
+        * ``release``: releases the evaluated points of each shape after writing. *Default: True*
+        * ``tile_size``: evaluates and writes at most this number of points at once, 0 disables. *Default: 0*
+        * ``backend``: evaluation backend of the tiles. *Default: geomdl*
+
     :param obj: input curve or surface
     :type obj: NURBS.Curve, NURBS.Surface, Multi.CurveContainer or Multi.SurfaceContainer
     :param file_name: name of the export file
     :type file_name: str
-    :param export_format: export file format, e.g. txt or csv
+    :param export_format: export file format, e.g. txt, csv or npy
     :type export_format: str
     """
+    precision = kwargs.get('precision', None)
+    dtype = kwargs.get('dtype', 'float64')
+    encoding = kwargs.get('encoding', 'binary')
     if export_format == "csv":
-        exchange.export_csv(obj, file_name, point_type='evalpts')
+        writer = writers.TextPointWriter(streams.open_output(file_name, 'w'), separator=",", header=writers.csv_header,
+                                         precision=precision)
     elif export_format == "txt":
-        exchange.export_txt(obj, file_name, point_type='evalpts')
+        writer = writers.TextPointWriter(streams.open_output(file_name, 'w'), separator=",", precision=precision)
+    elif export_format == "npy":
+        writer = writers.NpyPointWriter(streams.open_output(file_name, 'wb', export_format), dtype=dtype)
+    elif export_format == "npz":
+        writer = writers.NpzPointWriter(streams.open_output(file_name, 'wb', export_format), dtype=dtype)
+    elif export_format == "raw":
+        # The sidecar file is not written for the standard output and not compressed, e.g. points.raw.json
+        sidecar = None if streams.is_stdio(file_name) else streams.split_compression(file_name)[0] + ".json"
+        writer = writers.RawPointWriter(streams.open_output(file_name, 'wb'), dtype=dtype, sidecar=sidecar)
+    elif export_format == "vtk":
+        writer = writers_vtk.LegacyVTKWriter(streams.open_output(file_name, 'wb', export_format),
+                                             dtype=dtype, encoding=encoding)
+    elif export_format in ("vts", "vtp"):
+        if isinstance(obj, streams.ShapeStream):
+            raise RuntimeError("Please use vtk or vtm format for exporting the shape streams in VTK format")
+        if len(obj) > 1:
+            raise RuntimeError("Please use vtm format for exporting multiple shapes in VTK XML format")
+        if (obj.pdimension == 1) != (export_format == "vtp"):
+            raise RuntimeError("Curves can be exported in vtp format, surfaces and volumes in vts format")
+        writer = writers_vtk.XMLVTKWriter(streams.open_output(file_name, 'wb', export_format), dtype=dtype,
+                                          encoding=encoding)
+    elif export_format == "vtm":
+        if streams.is_stdio(file_name) or streams.is_compressed(file_name):
+            raise RuntimeError("Cannot write vtm format to the standard output or compress it, it references a file "
+                               "for each shape")
+        writer = writers_vtk.MultiBlockVTKWriter(open(file_name, 'w'), dtype=dtype, encoding=encoding,
+                                                 file_name=file_name)
     else:
-        if isinstance(obj, multi.AbstractContainer):
-            sz = len(obj)
-            for idx, opt in enumerate(obj.evalpts):
-                for pt in opt:
-                    line = ", ".join([str(p) for p in pt])
-                    print(line)
-                if idx != sz - 1:
-                    print("---")
+        writer = writers.TextPointWriter(sys.stdout, separator=", ", shape_separator="---", precision=precision)
+    tile_size = kwargs.get('tile_size', 0)
+    with timings.stage('export'):
+        if tile_size > 0:
+            from . import tiles
+            tiles.write_tiles(obj, writer, tile_size, backend=kwargs.get('backend', 'geomdl'))
         else:
-            for pt in obj.evalpts:
-                line = ", ".join([str(p) for p in pt])
-                print(line)
+            writers.write_evalpts(obj, writer, release=kwargs.get('release', True))
 
 
-def export_nurbs(obj, file_name, export_format):
+def export_nurbs(obj, file_name, export_format, update_delta=True, encoding='binary', release=True):
     """ Exports NURBS data in common CAD exchange formats.
 
+    The mesh formats (obj, stl and off) are written by the streaming mesh writers, which triangulate and write the
+    surfaces one by one, so the memory usage is bounded by the largest surface instead of the complete model.
+
+    The file name "-" writes to the standard output. The mesh formats and the ndjson format also accept a
+    :py:class:`.streams.ShapeStream`, whose shapes are exported one by one as they are read.
+
     :param obj: input spline geometry
-    :param file_name: name of the export file
+    :param file_name: name of the export file, "-" writes to the standard output
     :type file_name: str
     :param export_format: export file format, e.g. cfg, obj, stl, ...
     :type export_format: str
+    :param update_delta: if True, the mesh formats use the evaluation delta of the container for all shapes
+    :type update_delta: bool
+    :param encoding: encoding of the stl format, ascii or binary
+    :type encoding: str
+    :param release: releases the evaluated points of each shape after writing (mesh formats only)
+    :type release: bool
     """
     type_maps = dict(
         cfg=exchange.export_cfg,
         yaml=exchange.export_yaml,
         json=exchange.export_json,
-        obj=exchange.export_obj,
-        stl=exchange.export_stl,
-        off=exchange.export_off,
+        gnb=gnb.export_gnb,
+        ndjson=streams.export_ndjson,
         smesh=exchange.export_smesh,
         vmesh=exchange.export_vmesh,
     )
 
+    if export_format in writers_mesh.CLI_MESH_WRITERS:
+        # The mesh writers check the shapes of the streams one by one
+        if not isinstance(obj, streams.ShapeStream) and obj.pdimension != 2:
+            raise RuntimeError("Can only export surfaces in '" + str(export_format) + "' format")
+        # Use the same evaluation delta for all surfaces, as geomdl mesh exporters do
+        if update_delta and isinstance(obj, multi.AbstractContainer):
+            for srf in obj:
+                srf.sample_size_u = obj.sample_size_u
+                srf.sample_size_v = obj.sample_size_v
+        with timings.stage('export'):
+            writer = writers_mesh.CLI_MESH_WRITERS[export_format](streams.open_output(file_name, 'wb', export_format),
+                                                                  encoding=encoding)
+            writers.write_evalpts(obj, writer, release=release)
+        return
+
     try:
-        type_maps[export_format](obj, file_name)
+        exporter = type_maps[export_format]
     except KeyError:
         raise RuntimeError("The export method '" + str(export_format) + "' has not been implemented yet")
+    # smesh and vmesh formats write a file for each shape
+    stream_output = streams.is_stdio(file_name) or streams.is_compressed(file_name)
+    if stream_output and export_format in ('smesh', 'vmesh'):
+        raise RuntimeError("Cannot write '" + str(export_format) + "' format to the standard output or compress it")
+    with timings.stage('export'):
+        if stream_output and export_format in streams.CLI_TEXT_DUMPERS:
+            streams.export_text(obj, file_name, export_format)
+        else:
+            exporter(obj, file_name)
+
+
+def _mesh_sample_size(obj):
+    """Returns True if the shapes use the sample size of the container, as the mesh formats do"""
+    if not isinstance(obj, multi.AbstractContainer) or obj.pdimension != 2:
+        return True
+    return all(shape.sample_size_u == obj.sample_size_u and shape.sample_size_v == obj.sample_size_v
+               for shape in obj)
+
+
+def _export_output(obj, file_name, export_format, kwargs):
+    """Writes a single output of the shapes using the evaluated points shared by the other outputs"""
+    # geomdl shapes and containers are their own iterators, each thread iterates over a shallow copy
+    obj = copy.copy(obj)
+    if export_format in CLI_EVALPTS_EXPORT_TYPES:
+        export_evalpts(obj, file_name, export_format, precision=kwargs.get('precision', None),
+                       dtype=kwargs.get('dtype', 'float64'), encoding=kwargs.get('encoding', 'binary'), release=False)
+    else:
+        export_nurbs(obj, file_name, export_format, update_delta=False, encoding=kwargs.get('encoding', 'binary'),
+                     release=False)
+
+
+def export_outputs(obj, outputs, **kwargs):
+    """ Exports the shapes in multiple formats at once.
+
+    The shapes are evaluated once and the outputs are written concurrently by a thread pool, sharing the evaluated
+    points of the shapes, which overlaps the disk I/O of the writers. The evaluated point formats use the sample sizes
+    of the shapes and the mesh formats use the sample size of the container. If they are different, the mesh formats
+    are written after the other formats using the re-evaluated shapes.
+
+    Keyword Arguments:
+        * ``precision``: number of decimal places of the evaluated point formats. *Default: None (full precision)*
+        * ``dtype``: data type of the binary evaluated point formats. *Default: float64*
+        * ``encoding``: encoding of the VTK and stl formats. *Default: binary*
+        * ``update_delta``: if True, the mesh formats use the evaluation delta of the container. *Default: True*
+        * ``jobs``: number of worker processes evaluating the shapes of a container. *Default: 1*
+        * ``backend``: evaluation backend of the worker processes. *Default: geomdl*
+
+    :param obj: input spline geometry
+    :param outputs: list of (export format, file name) tuples
+    :type outputs: list
+    """
+    from concurrent import futures
+    from . import batch
+
+    mesh_outputs = [out for out in outputs if out[0] in CLI_MESH_EXPORT_TYPES]
+    update_delta = kwargs.get('update_delta', True) and isinstance(obj, multi.AbstractContainer)
+    if mesh_outputs and update_delta and not _mesh_sample_size(obj):
+        phases = [[out for out in outputs if out not in mesh_outputs], mesh_outputs]
+    else:
+        phases = [outputs]
+
+    for phase in phases:
+        # Evaluate the shapes before starting the writers, which only read the evaluated points
+        if any(fmt in CLI_EVALPTS_EXPORT_TYPES or fmt in CLI_MESH_EXPORT_TYPES for fmt, _ in phase):
+            mesh_phase = any(fmt in CLI_MESH_EXPORT_TYPES for fmt, _ in phase)
+            if mesh_phase and update_delta:
+                if obj.pdimension != 2:
+                    raise RuntimeError("Can only export surfaces in '" + str(mesh_outputs[0][0]) + "' format")
+                for srf in obj:
+                    srf.sample_size_u = obj.sample_size_u
+                    srf.sample_size_v = obj.sample_size_v
+            batch.evaluate_shapes(obj, jobs=kwargs.get('jobs', 1), backend=kwargs.get('backend', 'geomdl'))
+        with futures.ThreadPoolExecutor(max_workers=len(phase)) as executor:
+            tasks = [executor.submit(_export_output, obj, fname, fmt, kwargs) for fmt, fname in phase]
+            for task in tasks:
+                task.result()
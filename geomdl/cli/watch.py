@@ -0,0 +1,204 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Watch mode of geomdl-cli
+#
+# The input file is polled for changes and the parsed shape definitions are compared with the previous ones using
+# their fingerprints, so that only the changed shapes are rebuilt and re-evaluated. The unchanged shapes keep their
+# evaluated points between the updates.
+#
+
+import os
+import sys
+import json
+import time
+import hashlib
+from geomdl import _exchange
+from geomdl import multi
+from . import parsers
+from . import render
+from . import streams
+from . import utilities
+
+# Shape importers by shape type
+CLI_WATCH_SHAPE_TYPES = dict(
+    curve=_exchange.import_dict_crv,
+    surface=_exchange.import_dict_surf,
+    volume=_exchange.import_dict_vol,
+)
+
+
+def file_state(file_name):
+    """Returns the modification time and the size of the file, or None if the file does not exist"""
+    try:
+        st = os.stat(file_name)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def fingerprint(data):
+    """Computes the fingerprint of the parsed shape definition"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ShapeWatcher(object):
+    """ Keeps the shapes of the input file and rebuilds the changed ones on every update.
+
+    :param file_name: input file name
+    :type file_name: str
+    :param file_type: input file type, e.g. yaml
+    :type file_type: str
+    :param delta: evaluation delta of the shapes
+    :type delta: float
+    :param indices: indices of the shapes to watch (default: all shapes)
+    :type indices: list
+    :param template: flag to process the Jinja2 templates; None detects the templates automatically
+    :type template: bool or None
+    """
+    def __init__(self, file_name, file_type, delta=-1.0, indices=None, template=None):
+        if file_type not in parsers.CLI_FILE_PARSERS:
+            raise RuntimeError("Watching '" + str(file_type) + "' files is not supported. Supported file types: "
+                               + ", ".join(sorted(parsers.CLI_FILE_PARSERS)))
+        self.file_name = file_name
+        self.file_type = file_type
+        self.delta = float(delta)
+        self.indices = indices
+        self.template = template
+        self.shape_type = None
+        self.shapes = []
+        self.fingerprints = []
+
+    @property
+    def obj(self):
+        """Single shape or the container of the shapes"""
+        if len(self.shapes) == 1:
+            return self.shapes[0]
+        container = dict(curve=multi.CurveContainer, surface=multi.SurfaceContainer, volume=multi.VolumeContainer)
+        result = container[self.shape_type](self.shapes)
+        if 0.0 < self.delta < 1.0:
+            result.delta = self.delta
+        utilities.apply_container_delta(result)
+        return result
+
+    def update(self):
+        """ Reads the input file and rebuilds the changed shapes.
+
+        The shapes are matched by the fingerprints of their definitions, so the unchanged shapes are reused even if the
+        other shapes are added, removed or reordered.
+
+        :return: indices of the rebuilt shapes
+        :rtype: list
+        """
+        file_src = streams.read_input(self.file_name)
+        template = parsers.is_template(file_src) if self.template is None else self.template
+        if template:
+            file_src = _exchange.process_template(file_src)
+        data = utilities.select_shapes(parsers.parse(file_src, self.file_type), self.indices)
+        shape_type = data['shape']['type']
+        if shape_type not in CLI_WATCH_SHAPE_TYPES:
+            raise RuntimeError("Unsupported shape type: " + str(shape_type))
+
+        # Reuse the unchanged shapes, even if they are moved in the file; rebuild all if the shape type is changed
+        unchanged = {}
+        if shape_type == self.shape_type:
+            for fp, shape in zip(self.fingerprints, self.shapes):
+                unchanged.setdefault(fp, []).append(shape)
+
+        shapes = []
+        fingerprints = []
+        changed = []
+        for idx, shape_data in enumerate(data['shape']['data']):
+            fp = fingerprint(shape_data)
+            if unchanged.get(fp):
+                shapes.append(unchanged[fp].pop(0))
+            else:
+                shape = CLI_WATCH_SHAPE_TYPES[shape_type](shape_data)
+                if 0.0 < self.delta < 1.0:
+                    shape.delta = self.delta
+                shapes.append(shape)
+                changed.append(idx)
+            fingerprints.append(fp)
+
+        # Update the state after all shapes are successfully built
+        self.shape_type = shape_type
+        self.shapes = shapes
+        self.fingerprints = fingerprints
+        return changed
+
+
+class LivePlot(render.ShapeRenderer):
+    """ Plots the shapes on a single matplotlib figure and draws only the changed shapes on every update.
+
+    If ``file_name`` is set, the figure is saved after every update instead of being displayed.
+
+    :param file_name: figure file name
+    :type file_name: str
+    :param options: visualization options
+    :type options: dict
+    """
+    def __init__(self, file_name=None, options=None):
+        super(LivePlot, self).__init__(interactive=not file_name, options=options)
+        self.file_name = file_name
+
+    def __call__(self, watcher, changed):
+        self.update(watcher.shapes)
+        if self.file_name:
+            self.save(self.file_name)
+        else:
+            self.show()
+
+
+def watch(watcher, action, interval=0.5, count=0):
+    """ Polls the input file and runs the action after each change.
+
+    :param watcher: shape watcher
+    :type watcher: ShapeWatcher
+    :param action: function called with the watcher and the indices of the changed shapes, e.g. :py:class:`LivePlot`
+    :param interval: polling interval in seconds
+    :type interval: float
+    :param count: number of updates to process before returning (0 runs until interrupted)
+    :type count: int
+    """
+    wait = getattr(action, 'wait', time.sleep)
+    last_state = None
+    updates = 0
+    try:
+        while getattr(action, 'is_open', True):
+            state = file_state(watcher.file_name)
+            if state is not None and state != last_state:
+                last_state = state
+                start = time.perf_counter()
+                try:
+                    changed = watcher.update()
+                    if changed or updates == 0:
+                        action(watcher, changed)
+                except Exception as e:
+                    print("An error occurred: {}".format(e.args[-1] if e.args else e), file=sys.stderr)
+                else:
+                    print("Updated {c} of {n} shapes in {t:.3f} seconds".format(
+                        c=len(changed), n=len(watcher.shapes), t=time.perf_counter() - start), file=sys.stderr)
+                updates += 1
+                if 0 < count <= updates:
+                    break
+            wait(interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,302 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Evaluated point writers for geomdl-cli
+#
+
+import sys
+import json
+import array
+import struct
+import zipfile
+import itertools
+
+
+# Supported data types for the binary outputs: (array module type code, NumPy type descriptor)
+CLI_BINARY_DTYPES = dict(
+    float64=('d', '<f8'),
+    float32=('f', '<f4'),
+)
+
+
+class PointWriter(object):
+    """ Base class for the evaluated point writers.
+
+    The writers receive the evaluated points shape by shape and block by block, which allows them to write the output
+    while the evaluation proceeds instead of keeping all evaluated points in the memory.
+
+    The calling order is ``begin_shape()``, ``write()`` (one or more times), ``end_shape()`` for each shape and
+    ``close()`` after the last shape.
+    """
+    def __init__(self, fp, **kwargs):
+        self._fp = fp
+        self._num_shapes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def begin_shape(self, shape):
+        """ Starts a new shape.
+
+        :param shape: the shape whose evaluated points will be written next
+        """
+        self._num_shapes += 1
+
+    def write(self, points):
+        """ Writes a block of evaluated points.
+
+        :param points: evaluated points
+        :type points: list, tuple
+        """
+        raise NotImplementedError
+
+    def end_shape(self):
+        """Finishes the current shape"""
+        pass
+
+    def close(self):
+        """Flushes the output and closes the file"""
+        if self._fp is not sys.stdout:
+            self._fp.close()
+        else:
+            self._fp.flush()
+
+
+class TextPointWriter(PointWriter):
+    """ Writes the evaluated points as delimited text.
+
+    The rows are formatted in blocks using a single format string per block and written with one call to the file
+    object, which keeps the output I/O-bound for large point sets.
+
+    Keyword Arguments:
+        * ``separator``: value separator. *Default: ", "*
+        * ``precision``: number of decimal places; prints the shortest exact representation if not set
+        * ``header``: a function which takes the point dimension and returns the header line
+        * ``shape_separator``: line to write between the shapes. *Default: None*
+        * ``block_size``: number of rows to format at once. *Default: 8192*
+    """
+    def __init__(self, fp, **kwargs):
+        super(TextPointWriter, self).__init__(fp, **kwargs)
+        self._sep = kwargs.get('separator', ", ")
+        precision = kwargs.get('precision', None)
+        self._value_fmt = "%s" if precision is None else "%." + str(int(precision)) + "f"
+        self._header = kwargs.get('header', None)
+        self._shape_sep = kwargs.get('shape_separator', None)
+        self._block_size = int(kwargs.get('block_size', 8192))
+        self._row_fmt = None
+
+    def begin_shape(self, shape):
+        if self._num_shapes > 0 and self._shape_sep is not None:
+            self._fp.write(self._shape_sep + "\n")
+        super(TextPointWriter, self).begin_shape(shape)
+
+    def write(self, points):
+        bsz = self._block_size
+        for i in range(0, len(points), bsz):
+            block = points[i:i + bsz]
+            if self._row_fmt is None:
+                dim = len(block[0])
+                self._row_fmt = self._sep.join([self._value_fmt] * dim) + "\n"
+                if self._header is not None:
+                    self._fp.write(self._header(dim) + "\n")
+            fmt = self._row_fmt
+            self._fp.write("".join([fmt % tuple(pt) for pt in block]))
+
+
+class BinaryPointWriter(PointWriter):
+    """ Base class for the binary evaluated point writers.
+
+    The points are packed as contiguous arrays, in little-endian byte order by default.
+
+    Keyword Arguments:
+        * ``dtype``: data type of the values, float64 or float32. *Default: float64*
+        * ``byteorder``: byte order of the output, little or big. *Default: little*
+    """
+    def __init__(self, fp, **kwargs):
+        super(BinaryPointWriter, self).__init__(fp, **kwargs)
+        self._byteswap = sys.byteorder != kwargs.get('byteorder', 'little')
+        dtype = kwargs.get('dtype', 'float64')
+        try:
+            self._typecode, self._descr = CLI_BINARY_DTYPES[dtype]
+        except KeyError:
+            raise RuntimeError("Unsupported data type '" + str(dtype) + "'. Possible types: " +
+                               ", ".join(sorted(CLI_BINARY_DTYPES.keys())))
+        self._itemsize = array.array(self._typecode).itemsize
+        self._dim = 0
+        self._count = 0
+
+    def _pack(self, points, typecode=None):
+        """Packs the points (or a flat list of values) in the output byte order"""
+        values = itertools.chain.from_iterable(points) if typecode is None else points
+        arr = array.array(typecode or self._typecode, values)
+        if self._byteswap:
+            arr.byteswap()
+        return arr.tobytes()
+
+    def write(self, points):
+        if not points:
+            return
+        self._dim = len(points[0])
+        self._count += len(points)
+        self._fp.write(self._pack(points))
+
+
+def sample_shape(shape):
+    """ Returns the number of evaluated points in each parametric direction of the shape.
+
+    :param shape: a spline geometry
+    :return: sample size in each parametric direction
+    :rtype: tuple
+    """
+    ssz = shape.sample_size
+    return tuple(ssz) if isinstance(ssz, (list, tuple)) else (ssz,)
+
+
+def npy_header(descr, shape, size=0):
+    """ Generates NPY (v1.0) file header.
+
+    :param descr: NumPy type descriptor, e.g. <f8
+    :type descr: str
+    :param shape: array shape
+    :type shape: tuple
+    :param size: total header size in bytes; 0 pads to the next 64 bytes
+    :type size: int
+    :return: file header
+    :rtype: bytes
+    """
+    header = "{'descr': '" + descr + "', 'fortran_order': False, 'shape': (" + \
+             "".join([str(s) + ", " for s in shape]).rstrip(" ") + "), }"
+    if size <= 0:
+        size = ((10 + len(header) + 1) // 64 + 1) * 64
+    header = header.ljust(size - 10 - 1) + "\n"
+    if len(header) + 10 != size:
+        raise RuntimeError("NPY header does not fit in " + str(size) + " bytes")
+    return b"\x93NUMPY\x01\x00" + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class NpyPointWriter(BinaryPointWriter):
+    """ Writes the evaluated points as a NumPy NPY file.
+
+    The points of all shapes are stored in a single (number of points, dimension) array. The file header is reserved
+    at the beginning and updated when the writer is closed, so the file can be loaded via
+    ``numpy.load(file_name, mmap_mode='r')`` without any parsing.
+    """
+    # Reserved header size in bytes
+    header_size = 128
+
+    def __init__(self, fp, **kwargs):
+        super(NpyPointWriter, self).__init__(fp, **kwargs)
+        self._fp.write(npy_header(self._descr, (0, 0), self.header_size))
+
+    def close(self):
+        self._fp.seek(0)
+        self._fp.write(npy_header(self._descr, (self._count, self._dim), self.header_size))
+        super(NpyPointWriter, self).close()
+
+
+class RawPointWriter(BinaryPointWriter):
+    """ Writes the evaluated points as raw binary data with a JSON sidecar file.
+
+    The sidecar file describes the data type, the dimension and the byte offset, number of points and the sample size
+    of each shape, e.g. ``numpy.memmap(file_name, dtype=meta['dtype'], offset=shape['offset'], ...)``.
+
+    Keyword Arguments:
+        * ``sidecar``: name of the JSON sidecar file
+    """
+    def __init__(self, fp, **kwargs):
+        super(RawPointWriter, self).__init__(fp, **kwargs)
+        self._sidecar = kwargs.get('sidecar', None)
+        self._shapes = []
+        self._start = 0
+
+    def begin_shape(self, shape):
+        super(RawPointWriter, self).begin_shape(shape)
+        self._start = self._count
+        self._shapes.append(dict(sample_size=list(sample_shape(shape))))
+
+    def end_shape(self):
+        self._shapes[-1].update(
+            offset=self._start * self._dim * self._itemsize,
+            count=self._count - self._start
+        )
+
+    def close(self):
+        super(RawPointWriter, self).close()
+        if self._sidecar:
+            meta = dict(dtype=self._descr, dimension=self._dim, count=self._count, shapes=self._shapes)
+            with open(self._sidecar, 'w') as fp:
+                json.dump(meta, fp, indent=2)
+
+
+class NpzPointWriter(BinaryPointWriter):
+    """ Writes the evaluated points of each shape as a separate array into a NumPy NPZ archive.
+
+    The arrays are named ``shape_0``, ``shape_1``, etc. and shaped by the sample size of the shape, e.g.
+    (size_u, size_v, dimension) for the surfaces.
+    """
+    def __init__(self, fp, **kwargs):
+        super(NpzPointWriter, self).__init__(fp, **kwargs)
+        self._zip = zipfile.ZipFile(fp, 'w', allowZip64=True)
+        self._entry = None
+
+    def begin_shape(self, shape):
+        idx = self._num_shapes
+        super(NpzPointWriter, self).begin_shape(shape)
+        self._entry = self._zip.open("shape_" + str(idx) + ".npy", 'w', force_zip64=True)
+        self._entry.write(npy_header(self._descr, sample_shape(shape) + (shape.dimension,)))
+
+    def write(self, points):
+        if points:
+            self._entry.write(self._pack(points))
+
+    def end_shape(self):
+        self._entry.close()
+        self._entry = None
+
+    def close(self):
+        self._zip.close()
+        super(NpzPointWriter, self).close()
+
+
+def csv_header(dim):
+    """Generates CSV header for the evaluated points"""
+    return ", ".join(["dim " + str(i + 1) for i in range(dim)])
+
+
+def write_evalpts(obj, writer, release=True):
+    """ Evaluates the shapes one by one and passes the evaluated points to the writer.
+
+    :param obj: a spline geometry or a container
+    :param writer: evaluated point writer
+    :type writer: PointWriter
+    :param release: releases the evaluated points of each shape after writing
+    :type release: bool
+    """
+    with writer:
+        for shape in obj:
+            writer.begin_shape(shape)
+            writer.write(shape.evalpts)
+            writer.end_shape()
+            if release:
+                shape.reset(evalpts=True)
@@ -0,0 +1,257 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Streaming mesh writers (STL, OBJ and OFF) for the surfaces
+#
+
+import struct
+import math
+from . import writers
+
+
+# Number of triangles to generate at once while writing the faces
+TRIANGLE_BLOCK_SIZE = 8192
+
+# Binary STL header size and triangle record (normal, 3 vertices and the attribute byte count)
+STL_HEADER_SIZE = 80
+STL_TRIANGLE = struct.Struct('<12fH')
+
+
+def triangles(start, size_u, size_v):
+    """ Generates the triangles of a surface grid in blocks, row by row.
+
+    Each quad of the grid is split into two triangles using the same vertex order as ``geomdl.tessellate``, i.e. the
+    quad (i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1) generates the triangles (v1, v2, v3) and (v1, v3, v4).
+
+    :param start: index of the first vertex of the surface
+    :type start: int
+    :param size_u: number of the vertices in u-direction
+    :type size_u: int
+    :param size_v: number of the vertices in v-direction
+    :type size_v: int
+    :return: generator of the lists of vertex index triplets
+    """
+    block = []
+    for i in range(size_u - 1):
+        row = start + i * size_v
+        for j in range(size_v - 1):
+            v1 = row + j
+            v2 = v1 + size_v
+            block.append((v1, v2, v2 + 1))
+            block.append((v1, v2 + 1, v1 + 1))
+        if len(block) >= TRIANGLE_BLOCK_SIZE:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def triangle_normal(pt1, pt2, pt3):
+    """Computes the unit normal vector of the triangle"""
+    a = [pt2[0] - pt1[0], pt2[1] - pt1[1], pt2[2] - pt1[2]]
+    b = [pt3[0] - pt1[0], pt3[1] - pt1[1], pt3[2] - pt1[2]]
+    n = [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+    length = math.sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2])
+    if length > 0.0:
+        return [n[0] / length, n[1] / length, n[2] / length]
+    return n
+
+
+class MeshWriter(writers.PointWriter):
+    """ Base class for the mesh writers.
+
+    The mesh writers take the evaluated points of the surfaces and triangulate the grid of each surface while writing,
+    so that the complete triangle list is never kept in the memory.
+    """
+    def __init__(self, fp, **kwargs):
+        super(MeshWriter, self).__init__(fp, **kwargs)
+        self._size = None
+        self._num_vertices = 0
+        self._num_triangles = 0
+
+    def _write_text(self, text):
+        self._fp.write(text.encode('ascii'))
+
+    def begin_shape(self, shape):
+        if shape.pdimension != 2:
+            raise RuntimeError("Can only export surfaces in mesh formats")
+        super(MeshWriter, self).begin_shape(shape)
+        self._size = writers.sample_shape(shape)
+        self._num_triangles += 2 * (self._size[0] - 1) * (self._size[1] - 1)
+
+
+class IndexedMeshWriter(MeshWriter):
+    """ Base class for the mesh formats storing the vertices followed by the faces (OBJ and OFF).
+
+    The vertices are written while the surfaces are evaluated. The faces only depend on the sample sizes of the
+    surfaces, so they are generated from the grid sizes when the writer is closed.
+    """
+    # Vertex line prefix, face line prefix and the index of the first vertex
+    vertex_prefix = ""
+    face_prefix = "3 "
+    index_base = 0
+
+    def __init__(self, fp, **kwargs):
+        super(IndexedMeshWriter, self).__init__(fp, **kwargs)
+        self._grids = []
+
+    def begin_shape(self, shape):
+        super(IndexedMeshWriter, self).begin_shape(shape)
+        self._grids.append((self._num_vertices, self._size[0], self._size[1]))
+
+    def write(self, points):
+        if not points:
+            return
+        fmt = self.vertex_prefix + ("%s %s %s\n" if len(points[0]) > 2 else "%s %s 0.0\n")
+        bsz = TRIANGLE_BLOCK_SIZE
+        for i in range(0, len(points), bsz):
+            self._write_text("".join([fmt % tuple(pt[:3]) for pt in points[i:i + bsz]]))
+        self._num_vertices += len(points)
+
+    def write_faces(self):
+        """Writes the triangles of all surfaces"""
+        fmt = self.face_prefix + "%d %d %d\n"
+        base = self.index_base
+        for start, size_u, size_v in self._grids:
+            for block in triangles(start + base, size_u, size_v):
+                self._write_text("".join([fmt % tri for tri in block]))
+
+    def close(self):
+        self.write_faces()
+        super(IndexedMeshWriter, self).close()
+
+
+class OBJWriter(IndexedMeshWriter):
+    """Writes the triangulated surfaces as a Wavefront OBJ file"""
+    vertex_prefix = "v "
+    face_prefix = "f "
+    index_base = 1
+
+    def __init__(self, fp, **kwargs):
+        super(OBJWriter, self).__init__(fp, **kwargs)
+        self._write_text("# Generated by geomdl-cli\n")
+
+
+class OFFWriter(IndexedMeshWriter):
+    """ Writes the triangulated surfaces as an OFF file.
+
+    The numbers of the vertices and the faces are reserved in the header and updated when the writer is closed.
+    """
+    def __init__(self, fp, **kwargs):
+        super(OFFWriter, self).__init__(fp, **kwargs)
+        self._write_text("OFF\n")
+        self._counts_pos = self._fp.tell()
+        self._write_text(self._counts_line())
+
+    def _counts_line(self):
+        # Fixed width allows updating the counts in place
+        return "{v:<15d} {f:<15d} 0\n".format(v=self._num_vertices, f=self._num_triangles)
+
+    def write_faces(self):
+        super(OFFWriter, self).write_faces()
+        self._fp.seek(self._counts_pos)
+        self._write_text(self._counts_line())
+        self._fp.seek(0, 2)
+
+
+class STLWriter(MeshWriter):
+    """ Writes the triangulated surfaces as an STL file.
+
+    The triangles are generated row by row between the consecutive rows of the surface grid, so only two rows of
+    points are needed at a time. The binary STL header contains the number of triangles, which is updated when the
+    writer is closed.
+
+    Keyword Arguments:
+        * ``encoding``: ascii or binary. *Default: binary*
+    """
+    def __init__(self, fp, **kwargs):
+        super(STLWriter, self).__init__(fp, **kwargs)
+        encoding = kwargs.get('encoding', 'binary')
+        if encoding not in ('ascii', 'binary'):
+            raise RuntimeError("STL files can only be encoded as ascii or binary")
+        self._binary = encoding == 'binary'
+        self._pending = []
+        self._prev_row = None
+        if self._binary:
+            self._fp.write(b"geomdl-cli".ljust(STL_HEADER_SIZE, b"\0"))
+            self._fp.write(struct.pack('<I', 0))
+        else:
+            self._write_text("solid Surface\n")
+
+    def begin_shape(self, shape):
+        super(STLWriter, self).begin_shape(shape)
+        self._pending = []
+        self._prev_row = None
+
+    def write(self, points):
+        if not points:
+            return
+        if len(points[0]) == 2:
+            points = [(p[0], p[1], 0.0) for p in points]
+        size_v = self._size[1]
+        pts = self._pending + list(points) if self._pending else points
+        pos = 0
+        while len(pts) - pos >= size_v:
+            row = pts[pos:pos + size_v]
+            pos += size_v
+            if self._prev_row is not None:
+                self._write_strip(self._prev_row, row)
+            self._prev_row = row
+        self._pending = list(pts[pos:])
+
+    def _write_strip(self, row0, row1):
+        """Writes the triangles between two consecutive rows of the surface grid"""
+        tris = []
+        for j in range(len(row0) - 1):
+            v1, v2, v3, v4 = row0[j], row1[j], row1[j + 1], row0[j + 1]
+            tris.append((v1, v2, v3))
+            tris.append((v1, v3, v4))
+        if self._binary:
+            pack = STL_TRIANGLE.pack
+            self._fp.write(b"".join([pack(*(triangle_normal(*t) + list(t[0][:3]) + list(t[1][:3]) +
+                                            list(t[2][:3]) + [0])) for t in tris]))
+        else:
+            lines = []
+            for t in tris:
+                lines.append("\tfacet normal %s %s %s\n\t\touter loop\n" % tuple(triangle_normal(*t)))
+                for v in t:
+                    lines.append("\t\t\tvertex %s %s %s\n" % tuple(v[:3]))
+                lines.append("\t\tendloop\n\tendfacet\n")
+            self._write_text("".join(lines))
+
+    def close(self):
+        if self._binary:
+            if self._num_triangles > 0xFFFFFFFF:
+                raise RuntimeError("Binary STL files cannot contain more than 2^32 - 1 triangles")
+            self._fp.seek(STL_HEADER_SIZE)
+            self._fp.write(struct.pack('<I', self._num_triangles))
+            self._fp.seek(0, 2)
+        else:
+            self._write_text("endsolid Surface\n")
+        super(STLWriter, self).close()
+
+
+# Mesh writers of the supported export formats
+CLI_MESH_WRITERS = dict(
+    obj=OBJWriter,
+    off=OFFWriter,
+    stl=STLWriter,
+)
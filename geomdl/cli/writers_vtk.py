@@ -0,0 +1,368 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# VTK writers for the evaluated points
+#
+
+import os.path
+import base64
+from . import writers
+
+
+# VTK cell types
+VTK_POLY_LINE = 4
+VTK_QUAD = 9
+VTK_HEXAHEDRON = 12
+
+# VTK data type names for the binary data types
+VTK_DATA_TYPES = dict(
+    float64=("Float64", "double"),
+    float32=("Float32", "float"),
+)
+
+# Number of cells to generate at once while writing the connectivity
+CELL_BLOCK_SIZE = 8192
+
+
+def points3d(points):
+    """Pads 2-dimensional points with zero z-coordinate, as VTK requires 3-dimensional points"""
+    if points and len(points[0]) == 2:
+        return [(p[0], p[1], 0.0) for p in points]
+    return points
+
+
+def point_index(start, size):
+    """ Returns a function that computes the point index from the grid index of the shape.
+
+    The evaluated points are ordered so that the last parametric direction changes fastest.
+    """
+    if len(size) == 2:
+        return lambda i, j, k=0: start + j + size[1] * i
+    return lambda i, j, k=0: start + k + size[2] * (j + size[1] * i)
+
+
+def cells(start, size):
+    """ Generates the connectivity of a shape in blocks of cells.
+
+    Curves generate a single poly line cell, surfaces generate quads and volumes generate hexahedra.
+
+    :param start: index of the first point of the shape
+    :type start: int
+    :param size: sample size of the shape
+    :type size: tuple
+    :return: generator of (cell type, list of cells) tuples
+    """
+    if len(size) == 1:
+        yield VTK_POLY_LINE, [list(range(start, start + size[0]))]
+        return
+
+    idx = point_index(start, size)
+    block = []
+    if len(size) == 2:
+        for i in range(size[0] - 1):
+            for j in range(size[1] - 1):
+                block.append([idx(i, j), idx(i + 1, j), idx(i + 1, j + 1), idx(i, j + 1)])
+            if len(block) >= CELL_BLOCK_SIZE:
+                yield VTK_QUAD, block
+                block = []
+        if block:
+            yield VTK_QUAD, block
+    else:
+        for i in range(size[0] - 1):
+            for j in range(size[1] - 1):
+                for k in range(size[2] - 1):
+                    block.append([idx(i, j, k), idx(i + 1, j, k), idx(i + 1, j + 1, k), idx(i, j + 1, k),
+                                  idx(i, j, k + 1), idx(i + 1, j, k + 1), idx(i + 1, j + 1, k + 1),
+                                  idx(i, j + 1, k + 1)])
+            if len(block) >= CELL_BLOCK_SIZE:
+                yield VTK_HEXAHEDRON, block
+                block = []
+        if block:
+            yield VTK_HEXAHEDRON, block
+
+
+def num_cells(size):
+    """Returns the number of cells and the number of connectivity entries of a shape"""
+    if len(size) == 1:
+        return 1, size[0]
+    ncells = 1
+    for s in size:
+        ncells *= s - 1
+    return ncells, ncells * (2 ** len(size))
+
+
+class LegacyVTKWriter(writers.BinaryPointWriter):
+    """ Writes the evaluated points as a legacy VTK unstructured grid.
+
+    Curves are written as poly lines, surfaces as quads and volumes as hexahedra, so multiple shapes can be written
+    into a single file. The number of points is reserved in the header and updated when the writer is closed.
+
+    Keyword Arguments:
+        * ``encoding``: ascii or binary. *Default: binary*
+        * ``dtype``: data type of the binary values, float64 or float32. *Default: float64*
+    """
+    def __init__(self, fp, **kwargs):
+        kwargs['byteorder'] = 'big'
+        super(LegacyVTKWriter, self).__init__(fp, **kwargs)
+        self._binary = kwargs.get('encoding', 'binary') == 'binary'
+        if kwargs.get('encoding', 'binary') not in ('ascii', 'binary'):
+            raise RuntimeError("Legacy VTK files can only be encoded as ascii or binary")
+        self._vtk_type = VTK_DATA_TYPES[kwargs.get('dtype', 'float64')][1]
+        self._shapes = []
+        self._write_text("# vtk DataFile Version 3.0\ngeomdl-cli evaluated points\n" +
+                         ("BINARY" if self._binary else "ASCII") + "\nDATASET UNSTRUCTURED_GRID\n")
+        self._points_pos = self._fp.tell()
+        self._write_text(self._points_line())
+
+    def _write_text(self, text):
+        self._fp.write(text.encode('ascii'))
+
+    def _points_line(self):
+        # Fixed width allows updating the number of points in place
+        return "POINTS {n:<15d} {t}\n".format(n=self._count, t=self._vtk_type)
+
+    def begin_shape(self, shape):
+        super(LegacyVTKWriter, self).begin_shape(shape)
+        self._shapes.append((self._count, writers.sample_shape(shape)))
+
+    def write(self, points):
+        if not points:
+            return
+        points = points3d(points)
+        self._dim = 3
+        self._count += len(points)
+        if self._binary:
+            self._fp.write(self._pack(points))
+        else:
+            self._write_text("".join(["%s %s %s\n" % tuple(pt) for pt in points]))
+
+    def _write_ints(self, values):
+        if self._binary:
+            self._fp.write(self._pack(values, typecode='i'))
+        else:
+            self._write_text(" ".join([str(v) for v in values]) + "\n")
+
+    def close(self):
+        # Connectivity
+        ncells = 0
+        nentries = 0
+        for _, size in self._shapes:
+            nc, ne = num_cells(size)
+            ncells += nc
+            nentries += ne + nc
+        self._write_text(("\n" if self._binary else "") + "CELLS {n} {s}\n".format(n=ncells, s=nentries))
+        cell_types = []
+        for start, size in self._shapes:
+            for ctype, block in cells(start, size):
+                values = []
+                for c in block:
+                    values.append(len(c))
+                    values += c
+                self._write_ints(values)
+                cell_types.append((ctype, len(block)))
+        self._write_text(("\n" if self._binary else "") + "CELL_TYPES {n}\n".format(n=ncells))
+        for ctype, cnt in cell_types:
+            self._write_ints([ctype] * cnt)
+
+        # Update number of points
+        self._fp.seek(self._points_pos)
+        self._write_text(self._points_line())
+        super(LegacyVTKWriter, self).close()
+
+
+class Base64Stream(object):
+    """Encodes the written bytes in base64 in chunks, keeping the remainder for the next write"""
+    def __init__(self, fp):
+        self._fp = fp
+        self._rem = b""
+
+    def write(self, data):
+        data = self._rem + data
+        cut = len(data) - len(data) % 3
+        self._rem = data[cut:]
+        self._fp.write(base64.b64encode(data[:cut]))
+
+    def flush(self):
+        self._fp.write(base64.b64encode(self._rem))
+        self._rem = b""
+
+
+class XMLVTKWriter(writers.BinaryPointWriter):
+    """ Writes the evaluated points of a single shape in VTK XML format.
+
+    Surfaces and volumes are written as structured grids (.vts) and curves are written as poly data (.vtp) with a
+    single poly line.
+
+    Keyword Arguments:
+        * ``encoding``: ascii, base64 (inline binary) or binary (appended raw binary). *Default: binary*
+        * ``dtype``: data type of the binary values, float64 or float32. *Default: float64*
+    """
+    def __init__(self, fp, **kwargs):
+        super(XMLVTKWriter, self).__init__(fp, **kwargs)
+        self._encoding = kwargs.get('encoding', 'binary')
+        if self._encoding not in ('ascii', 'base64', 'binary'):
+            raise RuntimeError("VTK XML files can only be encoded as ascii, base64 or binary")
+        self._vtk_type = VTK_DATA_TYPES[kwargs.get('dtype', 'float64')][0]
+        self._size = None
+        self._b64 = None
+
+    def _write_text(self, text):
+        self._fp.write(text.encode('ascii'))
+
+    def _data_array(self, vtk_type, name, ncomp, offset):
+        fmt = dict(ascii="ascii", base64="binary", binary="appended")[self._encoding]
+        tag = '<DataArray type="{t}"{n} NumberOfComponents="{c}" format="{f}"'.format(
+            t=vtk_type, n=' Name="' + name + '"' if name else "", c=ncomp, f=fmt)
+        if self._encoding == 'binary':
+            return tag + ' offset="' + str(offset) + '"/>\n'
+        return tag + '>\n'
+
+    def _connectivity(self):
+        # Poly line connectivity and offsets of the curves
+        return [("connectivity", list(range(self._size[0]))), ("offsets", [self._size[0]])]
+
+    def begin_shape(self, shape):
+        if self._size is not None:
+            raise RuntimeError("VTK XML files can contain a single shape, please use vtm format for multiple shapes")
+        super(XMLVTKWriter, self).begin_shape(shape)
+        self._size = writers.sample_shape(shape)
+        npts = 1
+        for s in self._size:
+            npts *= s
+        pts_nbytes = npts * 3 * self._itemsize
+
+        header = '<?xml version="1.0"?>\n'
+        if len(self._size) == 1:
+            header += '<VTKFile type="PolyData" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n' \
+                      '<PolyData>\n<Piece NumberOfPoints="{n}" NumberOfVerts="0" NumberOfLines="1" ' \
+                      'NumberOfStrips="0" NumberOfPolys="0">\n'.format(n=npts)
+        else:
+            # The last parametric direction changes fastest, which corresponds to the first VTK direction
+            ext = list(reversed(self._size)) + [1] * (3 - len(self._size))
+            extent = " ".join(["0 " + str(e - 1) for e in ext])
+            header += '<VTKFile type="StructuredGrid" version="1.0" byte_order="LittleEndian" ' \
+                      'header_type="UInt64">\n<StructuredGrid WholeExtent="{e}">\n' \
+                      '<Piece Extent="{e}">\n'.format(e=extent)
+        header += '<Points>\n' + self._data_array(self._vtk_type, None, 3, 0)
+        if self._encoding == 'binary':
+            header += '</Points>\n'
+            if len(self._size) == 1:
+                offset = 8 + pts_nbytes
+                header += '<Lines>\n'
+                for name, values in self._connectivity():
+                    header += self._data_array("Int64", name, 1, offset)
+                    offset += 8 + 8 * len(values)
+                header += '</Lines>\n'
+            header += self._footer(appended=False) + '<AppendedData encoding="raw">\n_'
+        self._write_text(header)
+
+        # Binary data blocks start with the size of the block
+        if self._encoding == 'base64':
+            self._b64 = Base64Stream(self._fp)
+            self._b64.write(self._pack([pts_nbytes], typecode='Q'))
+        elif self._encoding == 'binary':
+            self._fp.write(self._pack([pts_nbytes], typecode='Q'))
+
+    def _footer(self, appended):
+        piece = '</Piece>\n' + ('</PolyData>\n' if len(self._size) == 1 else '</StructuredGrid>\n')
+        if appended:
+            return '\n</AppendedData>\n</VTKFile>\n'
+        return piece if self._encoding == 'binary' else piece + '</VTKFile>\n'
+
+    def write(self, points):
+        if not points:
+            return
+        points = points3d(points)
+        self._count += len(points)
+        if self._encoding == 'ascii':
+            self._write_text("".join(["%s %s %s\n" % tuple(pt) for pt in points]))
+        elif self._encoding == 'base64':
+            self._b64.write(self._pack(points))
+        else:
+            self._fp.write(self._pack(points))
+
+    def end_shape(self):
+        if self._encoding == 'binary':
+            if len(self._size) == 1:
+                for _, values in self._connectivity():
+                    self._fp.write(self._pack([8 * len(values)], typecode='Q') + self._pack(values, typecode='q'))
+            self._write_text(self._footer(appended=True))
+            return
+
+        if self._encoding == 'base64':
+            self._b64.flush()
+        self._write_text('\n</DataArray>\n</Points>\n')
+        if len(self._size) == 1:
+            self._write_text('<Lines>\n')
+            for name, values in self._connectivity():
+                self._write_text(self._data_array("Int64", name, 1, 0))
+                if self._encoding == 'ascii':
+                    self._write_text(" ".join([str(v) for v in values]))
+                else:
+                    b64 = Base64Stream(self._fp)
+                    b64.write(self._pack([8 * len(values)], typecode='Q') + self._pack(values, typecode='q'))
+                    b64.flush()
+                self._write_text('\n</DataArray>\n')
+            self._write_text('</Lines>\n')
+        self._write_text(self._footer(appended=False))
+
+
+class MultiBlockVTKWriter(writers.PointWriter):
+    """ Writes the evaluated points of multiple shapes as a VTK multiblock data set (.vtm).
+
+    Each shape is written into a separate VTK XML file (.vts or .vtp) next to the .vtm file, which references them.
+
+    Keyword Arguments:
+        * ``file_name``: name of the .vtm file, used for generating the names of the shape files
+        * ``encoding`` and ``dtype`` are passed to :py:class:`.XMLVTKWriter`
+    """
+    def __init__(self, fp, **kwargs):
+        super(MultiBlockVTKWriter, self).__init__(fp, **kwargs)
+        self._base_name = os.path.splitext(kwargs['file_name'])[0]
+        self._kwargs = kwargs
+        self._blocks = []
+        self._writer = None
+
+    def begin_shape(self, shape):
+        ext = "vtp" if shape.pdimension == 1 else "vts"
+        fname = self._base_name + "_" + str(self._num_shapes) + "." + ext
+        super(MultiBlockVTKWriter, self).begin_shape(shape)
+        self._blocks.append(os.path.basename(fname))
+        self._writer = XMLVTKWriter(open(fname, 'wb'), **self._kwargs)
+        self._writer.begin_shape(shape)
+
+    def write(self, points):
+        self._writer.write(points)
+
+    def end_shape(self):
+        self._writer.end_shape()
+        self._writer.close()
+        self._writer = None
+
+    def close(self):
+        content = '<?xml version="1.0"?>\n' \
+                  '<VTKFile type="vtkMultiBlockDataSet" version="1.0" byte_order="LittleEndian" ' \
+                  'header_type="UInt64">\n<vtkMultiBlockDataSet>\n'
+        for idx, fname in enumerate(self._blocks):
+            content += '<DataSet index="{i}" name="shape_{i}" file="{f}"/>\n'.format(i=idx, f=fname)
+        content += '</vtkMultiBlockDataSet>\n</VTKFile>\n'
+        self._fp.write(content)
+        super(MultiBlockVTKWriter, self).close()
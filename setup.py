@@ -47,6 +47,10 @@ data = dict(
     keywords='NURBS B-Spline curve surface CAD modeling visualization surface-generator',
     packages=['geomdl.cli'],
     install_requires=['geomdl>=5.0.0', 'matplotlib', 'Jinja2>=2.10', 'ruamel.yaml>=0.15', 'libconf'],
+    extras_require={
+        'numpy': ['numpy'],
+        'zstd': ['zstandard>=0.14'],
+    },
     entry_points={
         'console_scripts': ['geomdl-cli=geomdl.cli.command_line:main'],
     },
@@ -0,0 +1,64 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the adaptive evaluation
+#
+
+import time
+import pytest
+from geomdl.cli import adaptive
+from geomdl.cli import utilities
+
+
+@pytest.fixture
+def surface(examples):
+    return utilities.generate_nurbs_from_file(examples("surface.yaml"), 0.1, -1)
+
+
+def test_refine_indices_keeps_maximum_size(monkeypatch):
+    monkeypatch.setattr(adaptive, 'CLI_ADAPTIVE_MAX_SIZE', 7)
+    params = [0.0, 0.25, 0.5, 0.75, 1.0]
+    ret = adaptive._refine_indices(params, [1.0, 1.0, 1.0, 1.0], 0.5)
+    assert ret == [0.0, 0.125, 0.25, 0.375, 0.5, 0.75, 1.0]
+    assert adaptive._refine_indices(ret, [1.0] * 6, 0.5) == ret
+
+
+def test_evaluate_adaptive(surface):
+    num_points = adaptive.evaluate_adaptive(surface, 0.01)
+    assert num_points == surface[0].sample_size_u * surface[0].sample_size_v
+    assert len(surface.evalpts) == num_points
+
+
+def test_evaluate_adaptive_points_budget(monkeypatch, surface):
+    monkeypatch.setitem(adaptive.config, 'adaptive_max_points', 1000)
+    start = time.time()
+    with pytest.raises(RuntimeError):
+        adaptive.evaluate_adaptive(surface, 1e-7)
+    assert time.time() - start < 10
+
+
+def test_evaluate_adaptive_budget_is_shared(monkeypatch, examples):
+    obj = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+    num_points = adaptive.evaluate_adaptive(obj, 0.01)
+    obj = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+    monkeypatch.setitem(adaptive.config, 'adaptive_max_points', num_points - 1)
+    with pytest.raises(RuntimeError):
+        adaptive.evaluate_adaptive(obj, 0.01)
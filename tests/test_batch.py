@@ -0,0 +1,129 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the batch processing functions
+#
+
+import os
+import shutil
+import pytest
+from geomdl.cli import batch
+from geomdl.cli import commands
+from geomdl.cli import utilities
+
+
+def test_output_file_name_keeps_input_extension():
+    assert batch.output_file_name(os.path.join("a", "surface.yaml"), "json") == os.path.join("a", "surface.yaml.json")
+    assert batch.output_file_name(os.path.join("a", "surface.json"), "json") == os.path.join("a", "surface.json.json")
+
+
+def test_output_file_name_drops_compression_extension():
+    assert batch.output_file_name("surface.json.gz", "csv") == "surface.json.csv"
+
+
+def test_output_file_name_mirrors_subdirectories(tmp_path):
+    root = str(tmp_path / "in")
+    fname = os.path.join(root, "a", "surface.yaml")
+    out = batch.output_file_name(fname, "stl", str(tmp_path / "out"), root)
+    assert out == str(tmp_path / "out" / "a" / "surface.yaml.stl")
+    assert os.path.isdir(str(tmp_path / "out" / "a"))
+
+
+def test_input_root(tmp_path):
+    files = [str(tmp_path / "in" / "a" / "s.yaml"), str(tmp_path / "in" / "b" / "s.yaml")]
+    assert batch.input_root(files) == str(tmp_path / "in")
+
+
+def test_find_conflicts_no_conflicts():
+    assert batch.find_conflicts(["a.yaml", "a.json"], [["a.yaml.csv"], ["a.json.csv"]]) == {}
+
+
+def test_find_conflicts_output_overwrites_input(tmp_path):
+    inputs = [str(tmp_path / "s.json"), str(tmp_path / "s.json.json")]
+    errors = batch.find_conflicts(inputs, [[inputs[1]], [inputs[1] + ".json"]])
+    assert list(errors.keys()) == [inputs[0]]
+    assert "would overwrite the input file" in errors[inputs[0]]
+
+
+def test_find_conflicts_shared_output():
+    errors = batch.find_conflicts(["a/s.yaml", "b/s.yaml"], [["out/s.yaml.png"], ["out/s.yaml.png"]])
+    assert sorted(errors.keys()) == ["a/s.yaml", "b/s.yaml"]
+    assert "is shared by the input files" in errors["a/s.yaml"]
+
+
+def test_run_batch_skips_conflicting_tasks(capsys):
+    calls = []
+
+    def func(file_name, **kwargs):
+        calls.append(file_name)
+
+    failed = batch.run_batch(func, [("a", {}), ("b", {})], errors={"b": "conflict"})
+    assert calls == ["a"]
+    assert failed == [("b", "conflict")]
+    assert "Processed 2 file(s): 1 succeeded, 1 failed" in capsys.readouterr().out
+
+
+@pytest.fixture
+def input_dir(tmp_path, examples):
+    path = tmp_path / "shapes"
+    path.mkdir()
+    for fname in ("surface.yaml", "surface.json", "surface.cfg"):
+        shutil.copy(examples(fname), str(path / fname))
+    return path
+
+
+def test_export_directory_does_not_overwrite_inputs(input_dir):
+    with open(str(input_dir / "surface.json")) as fp:
+        original = fp.read()
+    commands.command_export(str(input_dir), format="json")
+    assert sorted(os.listdir(str(input_dir))) == ["surface.cfg", "surface.cfg.json", "surface.json",
+                                                  "surface.json.json", "surface.yaml", "surface.yaml.json"]
+    with open(str(input_dir / "surface.json")) as fp:
+        assert fp.read() == original
+
+    # The second run finds the outputs of the first run as inputs
+    with pytest.raises(RuntimeError):
+        commands.command_export(str(input_dir), format="json")
+    with open(str(input_dir / "surface.json")) as fp:
+        assert fp.read() == original
+
+
+def test_eval_glob_mirrors_input_directories(tmp_path, examples):
+    for sub in ("a", "b"):
+        (tmp_path / "in" / sub).mkdir(parents=True)
+        shutil.copy(examples("surface.yaml"), str(tmp_path / "in" / sub / "surface.yaml"))
+    commands.command_eval(os.path.join(str(tmp_path), "in", "*", "surface.yaml"), format="csv",
+                          name=str(tmp_path / "out"))
+    assert os.path.isfile(str(tmp_path / "out" / "a" / "surface.yaml.csv"))
+    assert os.path.isfile(str(tmp_path / "out" / "b" / "surface.yaml.csv"))
+
+
+def test_export_refuses_to_overwrite_input(tmp_path, examples):
+    shutil.copy(examples("surface.json"), str(tmp_path / "surface.json"))
+    with pytest.raises(RuntimeError):
+        commands.command_export("surface.json", format="json")
+
+
+def test_evaluate_shapes_in_parallel(examples):
+    serial = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+    parallel = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+    assert batch.evaluate_shapes(parallel, jobs=2) == batch.evaluate_shapes(serial)
+    assert [list(pt) for pt in parallel.evalpts] == [list(pt) for pt in serial.evalpts]
@@ -0,0 +1,137 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the persistent cache of the parsed and evaluated shapes
+#
+
+import os
+import shutil
+import pytest
+from geomdl.cli import cache
+from geomdl.cli import utilities
+
+
+@pytest.fixture
+def input_file(tmp_path, examples):
+    fname = str(tmp_path / "surface.yaml")
+    shutil.copy(examples("surface.yaml"), fname)
+    return fname
+
+
+def test_cache_key_is_stable(input_file):
+    assert cache.cache_key(input_file, "yaml", 0.1) == cache.cache_key(input_file, "yaml", 0.1)
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(delta=0.05),
+    dict(file_type="json"),
+    dict(indices=[0]),
+    dict(template=False),
+    dict(template=True),
+    dict(backend="numpy"),
+])
+def test_cache_key_covers_options(input_file, kwargs):
+    args = dict(file_type="yaml", delta=0.1, indices=None, template=None, backend="geomdl")
+    base = cache.cache_key(input_file, **args)
+    args.update(kwargs)
+    assert cache.cache_key(input_file, **args) != base
+
+
+def test_cache_key_covers_contents(input_file):
+    key = cache.cache_key(input_file, "yaml", 0.1)
+    with open(input_file, 'a') as fp:
+        fp.write("\n# changed\n")
+    assert cache.cache_key(input_file, "yaml", 0.1) != key
+
+
+@pytest.mark.parametrize("file_type, max_size", [("gnb", cache.CACHE_HASH_MAX_SIZE), ("yaml", 0)])
+def test_cache_key_uses_file_stat(monkeypatch, input_file, file_type, max_size):
+    monkeypatch.setattr(cache, 'CACHE_HASH_MAX_SIZE', max_size)
+    st = os.stat(input_file)
+    key = cache.cache_key(input_file, file_type, 0.1)
+    # Same size and modification time, the contents are not read
+    with open(input_file, 'r+') as fp:
+        fp.write("#")
+    os.utime(input_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.cache_key(input_file, file_type, 0.1) == key
+    os.utime(input_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+    assert cache.cache_key(input_file, file_type, 0.1) != key
+
+
+def test_store_and_load(tmp_path, input_file):
+    shape_cache = cache.ShapeCache(root=str(tmp_path / "cache"))
+    shapes = utilities.import_file(input_file, "yaml", delta=0.1)
+    key = cache.cache_key(input_file, "yaml", 0.1)
+    shape_cache.store(key, shapes)
+    points = shapes[0].evalpts
+    loaded = shape_cache.load(key)
+    assert loaded is not None
+    assert loaded[0].ctrlpts == shapes[0].ctrlpts
+    assert loaded[0].evaluator.is_cached()
+    assert loaded[0].evalpts == points
+
+
+def test_points_writes_evict_entries(tmp_path, input_file):
+    root = tmp_path / "cache"
+    shape_cache = cache.ShapeCache(root=str(root))
+    key1 = cache.cache_key(input_file, "yaml", 0.1)
+    assert shape_cache.store(key1, utilities.import_file(input_file, "yaml", delta=0.1))[0].evalpts
+    os.utime(str(root / key1), (0, 0))
+    entry_size = shape_cache.stats()['size']
+    shapes_size = os.path.getsize(str(root / key1 / cache.CACHE_SHAPES_FILE))
+
+    # The shapes of the second entry fit into the limit, but its evaluated points do not
+    shape_cache = cache.ShapeCache(root=str(root), max_size=(entry_size + shapes_size + 1) / (1024.0 * 1024.0))
+    key2 = cache.cache_key(input_file, "yaml", 0.05)
+    shapes = shape_cache.store(key2, utilities.import_file(input_file, "yaml", delta=0.1))
+    assert (root / key1).is_dir()
+    assert shapes[0].evalpts
+    assert not (root / key1).exists()
+    assert (root / key2 / cache.CACHE_POINTS_FILE.format(idx=0)).is_file()
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="requires POSIX file ownership")
+def test_cache_directory_is_private(tmp_path, input_file):
+    root = str(tmp_path / "cache")
+    shape_cache = cache.ShapeCache(root=root)
+    key = cache.cache_key(input_file, "yaml", 0.1)
+    shape_cache.store(key, utilities.import_file(input_file, "yaml", delta=0.1))
+    assert os.stat(root).st_mode & 0o777 == 0o700
+    assert cache.is_private(root)
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="requires POSIX file ownership")
+def test_shared_cache_directory_is_not_used(tmp_path, input_file):
+    root = str(tmp_path / "cache")
+    shape_cache = cache.ShapeCache(root=root)
+    key = cache.cache_key(input_file, "yaml", 0.1)
+    shape_cache.store(key, utilities.import_file(input_file, "yaml", delta=0.1))
+    os.chmod(root, 0o777)
+    assert not cache.is_private(root)
+    assert cache.ShapeCache(root=root).load(key) is None
+    assert not shape_cache.stats()['private']
+
+
+def test_generate_nurbs_uses_backend_in_key(input_file):
+    pytest.importorskip("numpy")
+    utilities.generate_nurbs_from_file(input_file, 0.1, -1, use_cache=True)
+    utilities.generate_nurbs_from_file(input_file, 0.1, -1, use_cache=True, backend='numpy')
+    assert cache.ShapeCache().stats()['entries'] == 2
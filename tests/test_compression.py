@@ -0,0 +1,114 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the compressed inputs and outputs
+#
+
+import io
+import sys
+import gzip
+import lzma
+import json
+import pytest
+from geomdl.cli import streams
+from geomdl.cli import utilities
+
+
+def test_split_compression():
+    assert streams.split_compression("surface.json.gz") == ("surface.json", "gz")
+    assert streams.split_compression("points.csv.XZ") == ("points.csv", "xz")
+    assert streams.split_compression("surface.json") == ("surface.json", None)
+    assert streams.is_compressed("points.csv.zst")
+    assert not streams.is_compressed("points.csv")
+
+
+@pytest.mark.parametrize("compression, opener", [("gz", gzip.open), ("xz", lzma.open)])
+def test_compressed_text_round_trip(tmp_path, compression, opener):
+    fname = str(tmp_path / ("data.txt." + compression))
+    streams.write_output(fname, "line 1\nline 2\n")
+    with opener(fname, 'rt') as fp:
+        assert fp.read() == "line 1\nline 2\n"
+    assert streams.read_input(fname) == "line 1\nline 2\n"
+
+
+def test_spooled_output_seeks_before_compressing(tmp_path):
+    fname = str(tmp_path / "data.bin.gz")
+    with streams.open_output(fname, 'wb', 'npy') as fp:
+        fp.write(b"0000data")
+        fp.seek(0)
+        fp.write(b"head")
+    with gzip.open(fname, 'rb') as fp:
+        assert fp.read() == b"headdata"
+
+
+def test_zstd_requires_zstandard(tmp_path):
+    try:
+        import zstandard
+    except ImportError:
+        with pytest.raises(RuntimeError):
+            streams.write_output(str(tmp_path / "data.txt.zst"), "data")
+    else:
+        streams.write_output(str(tmp_path / "data.txt.zst"), "data")
+        assert streams.read_input(str(tmp_path / "data.txt.zst")) == "data"
+
+
+def test_input_file_type_ignores_compression():
+    assert utilities.input_file_type("surface.json.gz") == "json"
+    assert utilities.replace_extension("surface.json.gz", "csv") == "surface.csv"
+
+
+def test_compressed_npz(tmp_path, examples):
+    np = pytest.importorskip("numpy")
+    obj = utilities.generate_nurbs_from_file(examples("surface.yaml"), 0.1, -1)
+    fname = str(tmp_path / "points.npz.gz")
+    utilities.export_evalpts(obj, fname, "npz")
+    with gzip.open(fname, 'rb') as fp:
+        data = np.load(io.BytesIO(fp.read()))
+    assert data["shape_0"].reshape(-1, 3).tolist() == [list(pt) for pt in obj.evalpts]
+
+
+def test_compressed_raw_sidecar_name(tmp_path, examples):
+    obj = utilities.generate_nurbs_from_file(examples("surface.yaml"), 0.1, -1)
+    fname = str(tmp_path / "points.raw.gz")
+    utilities.export_evalpts(obj, fname, "raw")
+    with open(str(tmp_path / "points.raw.json")) as fp:
+        assert json.load(fp)['count'] == len(obj.evalpts)
+    assert not (tmp_path / "points.raw.gz.json").exists()
+
+
+def test_compressed_shape_input(tmp_path, examples):
+    fname = str(tmp_path / "surface.json.gz")
+    with open(examples("surface.json"), 'rb') as fin, gzip.open(fname, 'wb') as fout:
+        fout.write(fin.read())
+    obj = utilities.generate_nurbs_from_file(fname, 0.1, -1)
+    ref = utilities.generate_nurbs_from_file(examples("surface.json"), 0.1, -1)
+    assert obj.ctrlpts == ref.ctrlpts
+
+
+def test_stdin_compressed_input(monkeypatch, examples):
+    with open(examples("surface.json"), 'rb') as fp:
+        data = gzip.compress(fp.read())
+
+    class Stdin(object):
+        buffer = io.BufferedReader(io.BytesIO(data))
+
+    monkeypatch.setattr(sys, 'stdin', Stdin())
+    assert json.loads(streams.read_input(streams.CLI_STDIO_NAME))['shape']['type'] == "surface"
@@ -0,0 +1,51 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the gnb binary shape format
+#
+
+import pytest
+from geomdl.cli import utilities
+from geomdl.cli import gnb
+
+
+@pytest.fixture
+def surfaces(examples):
+    return utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+
+
+def test_gnb_round_trip(tmp_path, surfaces):
+    fname = str(tmp_path / "shapes.gnb")
+    gnb.export_gnb(surfaces, fname)
+    shapes = gnb.import_gnb(fname)
+    assert len(shapes) == len(surfaces)
+    for imported, shape in zip(shapes, surfaces):
+        assert imported.degree_u == shape.degree_u and imported.degree_v == shape.degree_v
+        assert list(imported.knotvector_u) == list(shape.knotvector_u)
+        assert [list(pt) for pt in imported.ctrlpts] == [list(pt) for pt in shape.ctrlpts]
+
+
+def test_gnb_selected_shape(tmp_path, surfaces):
+    fname = str(tmp_path / "shapes.gnb")
+    gnb.export_gnb(surfaces, fname)
+    shapes = gnb.import_gnb(fname, indices=[2])
+    assert len(shapes) == 1
+    assert [list(pt) for pt in shapes[0].ctrlpts] == [list(pt) for pt in surfaces[2].ctrlpts]
@@ -0,0 +1,45 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the level of detail selection of plot command
+#
+
+import pytest
+from geomdl.cli import commands
+from geomdl.cli import utilities
+
+
+@pytest.fixture
+def surfaces(examples):
+    return utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.01, -1)
+
+
+@pytest.mark.parametrize("kwargs, applied", [
+    ({}, True),
+    ({'delta': 0.01}, False),
+    ({'delta': 0.01, 'max-points': 100}, True),
+    ({'max-points': 0}, False),
+])
+def test_apply_lod(monkeypatch, surfaces, kwargs, applied):
+    monkeypatch.setitem(commands.config, 'plot_max_points', 100)
+    sample_sizes = [shape.sample_size for shape in surfaces]
+    assert commands._apply_lod(surfaces, {}, kwargs) == applied
+    assert ([shape.sample_size for shape in surfaces] != sample_sizes) == applied
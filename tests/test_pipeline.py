@@ -0,0 +1,87 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the job manifest runner
+#
+
+import os
+import shutil
+import time
+import pytest
+from geomdl.cli import pipeline
+
+
+MANIFEST = """\
+jobs:
+  - name: a
+    command: export
+    input: shapes/surface.yaml
+    options: {format: json, name: build/a.json}
+  - name: b
+    command: eval
+    input: shapes/surface.yaml
+    depends: [a]
+    options: {format: csv, name: build/b.csv}
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path, examples):
+    (tmp_path / "shapes").mkdir()
+    (tmp_path / "build").mkdir()
+    shutil.copy(examples("surface.yaml"), str(tmp_path / "shapes" / "surface.yaml"))
+    fname = str(tmp_path / "jobs.yaml")
+    with open(fname, 'w') as fp:
+        fp.write(MANIFEST)
+    return fname
+
+
+def test_run_and_skip_up_to_date_jobs(manifest, capsys):
+    assert pipeline.run_jobs(pipeline.load_manifest(manifest)) == []
+    assert "2 succeeded" in capsys.readouterr().out
+    assert pipeline.run_jobs(pipeline.load_manifest(manifest)) == []
+    assert "2 skipped" in capsys.readouterr().out
+
+
+def test_dependents_of_updated_jobs_run(tmp_path, manifest, capsys):
+    pipeline.run_jobs(pipeline.load_manifest(manifest))
+    capsys.readouterr()
+    # Only the upstream job is out of date; the downstream job depends on it via 'depends'
+    later = time.time() + 10
+    os.utime(str(tmp_path / "shapes" / "surface.yaml"), (later, later))
+    os.utime(str(tmp_path / "build" / "b.csv"), (later + 10, later + 10))
+    pipeline.run_jobs(pipeline.load_manifest(manifest))
+    out = capsys.readouterr().out
+    assert "[ok] a" in out
+    assert "[ok] b" in out
+
+
+def test_dry_run(tmp_path, manifest, capsys):
+    pipeline.run_jobs(pipeline.load_manifest(manifest), dry_run=True)
+    assert "Found 2 job(s): 2 to run, 0 up to date" in capsys.readouterr().out
+    assert not (tmp_path / "build" / "a.json").exists()
+
+
+def test_serial_run_restores_working_directory(tmp_path, manifest):
+    (tmp_path / "other").mkdir()
+    os.chdir(str(tmp_path / "other"))
+    pipeline.run_jobs(pipeline.load_manifest(manifest), force=True)
+    assert os.getcwd() == str(tmp_path / "other")
@@ -0,0 +1,165 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the evaluation server
+#
+
+import os
+import sys
+import json
+import shutil
+import threading
+import pytest
+from geomdl.cli import server
+
+
+def test_execute_captures_output(tmp_path, examples):
+    shutil.copy(examples("curve3d.yaml"), str(tmp_path / "curve3d.yaml"))
+    result = server.execute('eval', ["curve3d.yaml"], {'delta': 0.5}, str(tmp_path))
+    assert result['status'] == 0
+    assert result['error'] is None
+    assert result['output'].splitlines() == ["10.0, 5.0, 10.0", "-10.0, 5.0, 0.0"]
+
+
+def test_execute_unknown_command(tmp_path):
+    result = server.execute('nope', [], {}, str(tmp_path))
+    assert result['status'] == 1
+    assert result['error'] == "The command NOPE is not available on the server"
+
+
+def test_execute_reports_key_errors_of_commands(tmp_path):
+    with open(str(tmp_path / "bad.json"), 'w') as fp:
+        json.dump(dict(foo=1), fp)
+    result = server.execute('eval', ["bad.json"], {}, str(tmp_path))
+    assert result['status'] == 1
+    assert "not available" not in result['error']
+
+
+def test_execute_reports_command_errors(tmp_path):
+    result = server.execute('eval', ["missing.yaml"], {}, str(tmp_path))
+    assert result['status'] == 1
+    assert result['error']
+
+
+def test_execute_uses_client_config(tmp_path, examples):
+    shutil.copy(examples("curve3d.yaml"), str(tmp_path / "curve3d.yaml"))
+    cli_config = dict(server.config, eval_format="csv")
+    result = server.execute('eval', ["curve3d.yaml"], {'delta': 0.5, 'name': "out.csv"}, str(tmp_path), cli_config)
+    assert result['status'] == 0
+    with open(str(tmp_path / "out.csv")) as fp:
+        assert fp.readline().strip() == "dim 1, dim 2, dim 3"
+    assert server.config['eval_format'] == "screen"
+
+
+def test_execute_uses_client_commands(tmp_path):
+    config_dir = tmp_path / ".geomdl-cli"
+    config_dir.mkdir()
+    with open(str(config_dir / "my_commands.py"), 'w') as fp:
+        fp.write("def my_eval(file_name, **kwargs):\n    print('my eval', file_name)\n")
+    commands = dict(server.__cli_commands__, eval=dict(module="my_commands", func="my_eval", func_args=1))
+    path = list(sys.path)
+    result = server.execute('eval', ["shape.yaml"], {}, str(tmp_path), None, commands, [str(config_dir)])
+    assert result['output'] == "my eval shape.yaml\n"
+    assert sys.path == path
+    assert server.__cli_commands__['eval']['func'] == "command_eval"
+
+
+def test_forward_sends_client_config(monkeypatch):
+    requests = []
+    monkeypatch.setattr(server, 'send_request', lambda request, timeout=None: requests.append(request))
+    monkeypatch.setitem(server.config, 'serve_forward', True)
+    monkeypatch.setitem(server.config, 'eval_format', "csv")
+    monkeypatch.setattr(sys, 'path', sys.path + [os.path.join("home", ".geomdl-cli")])
+    server.forward('eval', ["shape.yaml"], {'debug': 1})
+    assert requests[0]['config']['eval_format'] == "csv"
+    assert requests[0]['commands'] == server.__cli_commands__
+    assert requests[0]['path'] == [os.path.join("home", ".geomdl-cli")]
+    assert requests[0]['params'] == {}
+
+
+def test_server_runs_only_forwardable_commands():
+    srv = server.EvaluationServer(jobs=1)
+    try:
+        response = srv.handle(dict(command='run', args=["jobs.yaml"], cwd="/"))
+        assert response['status'] == 1
+        assert "not available" in response['error']
+        assert srv.handle(dict(command='__status__'))['status'] == 0
+    finally:
+        srv.close()
+
+
+@pytest.fixture
+def http_server():
+    import socket
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    srv = server.EvaluationServer(jobs=1)
+    thread = threading.Thread(target=srv.serve_http, args=(port, "secret"))
+    thread.daemon = True
+    thread.start()
+    # Wait until the server is listening
+    for _ in range(100):
+        if srv._servers:
+            break
+        threading.Event().wait(0.05)
+    yield "http://127.0.0.1:" + str(port)
+    srv.shutdown()
+    thread.join(5)
+    srv.close()
+
+
+def post(url, data, headers):
+    from urllib import request, error
+    req = request.Request(url + "/run", data=json.dumps(data).encode('utf-8'), headers=headers, method='POST')
+    try:
+        with request.urlopen(req, timeout=10) as resp:
+            return resp.status, json.loads(resp.read().decode('utf-8'))
+    except error.HTTPError as e:
+        if e.headers.get('Content-Type', '') == "application/json":
+            return e.code, json.loads(e.read().decode('utf-8'))
+        return e.code, None
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"Content-Type": "application/json"}, 401),
+    ({"Content-Type": "application/json", "Authorization": "Bearer wrong"}, 401),
+    ({"Content-Type": "text/plain", "Authorization": "Bearer secret"}, 415),
+    ({"Content-Type": "application/json", "Authorization": "Bearer secret", "Origin": "http://example.com"}, 403),
+])
+def test_http_rejects_requests(http_server, headers, status):
+    assert post(http_server, dict(command='__status__'), headers)[0] == status
+
+
+def test_http_rejects_user_commands(http_server):
+    headers = {"Content-Type": "application/json", "Authorization": "Bearer secret"}
+    request = dict(command='eval', args=["shape.yaml"], commands=dict(eval=dict(module="os", func="system")))
+    status, response = post(http_server, request, headers)
+    assert status == 500
+    assert "not accepted" in response['error']
+
+
+def test_http_accepts_authorized_requests(http_server):
+    headers = {"Content-Type": "application/json; charset=utf-8", "Authorization": "Bearer secret"}
+    status, response = post(http_server, dict(command='__status__'), headers)
+    assert status == 200
+    assert response['status'] == 0
@@ -0,0 +1,64 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the standard input and output and the ndjson format
+#
+
+import io
+import sys
+import json
+import pytest
+from geomdl.cli import streams
+from geomdl.cli import utilities
+
+
+@pytest.fixture
+def surfaces(examples):
+    return utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+
+
+def test_stdin_requires_file_type():
+    with pytest.raises(RuntimeError):
+        utilities.input_file_type(streams.CLI_STDIO_NAME)
+
+
+def test_stdin_input(monkeypatch, examples):
+    with open(examples("surface.json"), 'rb') as fp:
+        data = fp.read()
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BufferedReader(io.BytesIO(data))))
+    assert json.loads(streams.read_input(streams.CLI_STDIO_NAME))['shape']['type'] == "surface"
+
+
+def test_stdout_output(examples, capsys):
+    obj = utilities.generate_nurbs_from_file(examples("curve3d.yaml"), 0.1, -1)
+    utilities.export_evalpts(obj, streams.CLI_STDIO_NAME, "csv")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "dim 1, dim 2, dim 3"
+    assert len(lines) == len(obj.evalpts) + 1
+
+
+def test_ndjson_round_trip(tmp_path, surfaces):
+    fname = str(tmp_path / "shapes.ndjson")
+    streams.export_ndjson(surfaces, fname)
+    with open(fname) as fp:
+        assert len(fp.read().splitlines()) == len(surfaces)
+    shapes = streams.import_ndjson(fname)
+    assert [[list(pt) for pt in s.ctrlpts] for s in shapes] == [[list(pt) for pt in s.ctrlpts] for s in surfaces]
@@ -0,0 +1,59 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the utility functions
+#
+
+import pytest
+from geomdl.cli import utilities
+
+
+@pytest.mark.parametrize("value", [-1, "-1", "", " "])
+def test_parse_indices_all_shapes(value):
+    assert utilities.parse_indices(value) is None
+
+
+@pytest.mark.parametrize("value, indices", [
+    (3, [3]),
+    ("3", [3]),
+    ("3,7,10-12", [3, 7, 10, 11, 12]),
+    ("0-0", [0]),
+    ("2,1,2", [2, 1]),
+])
+def test_parse_indices(value, indices):
+    assert utilities.parse_indices(value) == indices
+
+
+@pytest.mark.parametrize("value", [-2, "-2", "0,-3", "1--2", "5-3", "x"])
+def test_parse_indices_invalid(value):
+    with pytest.raises(RuntimeError):
+        utilities.parse_indices(value)
+
+
+def test_select_shapes_out_of_range(examples):
+    with pytest.raises(RuntimeError):
+        utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, 5)
+
+
+def test_select_single_shape(examples):
+    obj = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, "1")
+    ref = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+    assert obj.ctrlpts == ref[1].ctrlpts
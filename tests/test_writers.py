@@ -0,0 +1,119 @@
+# geomdl-cli - Copyright (c) 2018-2019 Onur Rauf Bingol <orbingol@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+#
+# Tests for the evaluated point writers
+#
+
+import os
+import json
+import array
+import pytest
+from geomdl.cli import utilities
+from geomdl.cli import commands
+
+
+@pytest.fixture
+def surfaces(examples):
+    return utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), 0.1, -1)
+
+
+def evalpts(obj):
+    return [list(pt) for shape in obj for pt in shape.evalpts]
+
+
+def test_csv_round_trip(tmp_path, surfaces):
+    fname = str(tmp_path / "points.csv")
+    utilities.export_evalpts(surfaces, fname, "csv")
+    with open(fname) as fp:
+        lines = fp.read().splitlines()
+    assert lines[0] == "dim 1, dim 2, dim 3"
+    assert [[float(v) for v in line.split(",")] for line in lines[1:]] == evalpts(surfaces)
+
+
+def test_txt_writes_evaluated_points(tmp_path, surfaces):
+    fname = str(tmp_path / "points.txt")
+    utilities.export_evalpts(surfaces, fname, "txt")
+    with open(fname) as fp:
+        points = [[float(v) for v in line.split(",")] for line in fp.read().splitlines()]
+    assert points == evalpts(surfaces)
+
+
+def test_container_delta_is_applied_to_shapes(examples):
+    obj = utilities.generate_nurbs_from_file(examples("surface_multi.cfg"), -1.0, -1)
+    assert all(list(shape.delta) == list(obj.delta) for shape in obj)
+    # The earlier versions evaluated the shapes via the container, 3 surfaces with 20 x 20 points
+    assert len(evalpts(obj)) == 1200
+
+
+def test_raw_round_trip(tmp_path, surfaces):
+    fname = str(tmp_path / "points.raw")
+    utilities.export_evalpts(surfaces, fname, "raw")
+    with open(fname + ".json") as fp:
+        meta = json.load(fp)
+    values = array.array('d')
+    with open(fname, 'rb') as fp:
+        values.frombytes(fp.read())
+    dim = meta['dimension']
+    assert meta['count'] == len(values) // dim
+    assert [values[i:i + dim].tolist() for i in range(0, len(values), dim)] == evalpts(surfaces)
+    assert [shape['sample_size'] for shape in meta['shapes']] == [list(s.sample_size) for s in surfaces]
+
+
+def test_npy_round_trip(tmp_path, surfaces):
+    np = pytest.importorskip("numpy")
+    fname = str(tmp_path / "points.npy")
+    utilities.export_evalpts(surfaces, fname, "npy")
+    assert np.load(fname).tolist() == evalpts(surfaces)
+
+
+def test_npz_round_trip(tmp_path, surfaces):
+    np = pytest.importorskip("numpy")
+    fname = str(tmp_path / "points.npz")
+    utilities.export_evalpts(surfaces, fname, "npz")
+    data = np.load(fname)
+    for idx, shape in enumerate(surfaces):
+        arr = data["shape_" + str(idx)]
+        assert arr.shape == tuple(shape.sample_size) + (shape.dimension,)
+        assert arr.reshape(-1, shape.dimension).tolist() == [list(pt) for pt in shape.evalpts]
+
+
+def test_legacy_vtk_ascii(tmp_path, surfaces):
+    fname = str(tmp_path / "points.vtk")
+    utilities.export_evalpts(surfaces, fname, "vtk", encoding="ascii")
+    with open(fname) as fp:
+        lines = fp.read().splitlines()
+    assert lines[0] == "# vtk DataFile Version 3.0"
+    points_line = [line for line in lines if line.startswith("POINTS")][0]
+    assert int(points_line.split()[1]) == len(evalpts(surfaces))
+
+
+@pytest.mark.parametrize("kwargs, tile_size", [({'tile-size': 100}, 0), ({}, 100)])
+def test_tiles_with_multiple_formats(monkeypatch, examples, kwargs, tile_size):
+    monkeypatch.setitem(commands.config, 'eval_tile_size', tile_size)
+    with pytest.raises(RuntimeError):
+        commands.command_eval(examples("surface.yaml"), format="csv,npy", name="points.csv", **kwargs)
+    assert not os.path.exists("points.csv")
+
+
+def test_tiles_of_config_disabled_by_parameter(monkeypatch, examples):
+    monkeypatch.setitem(commands.config, 'eval_tile_size', 100)
+    commands.command_eval(examples("surface.yaml"), format="csv,npy", name="points.csv", **{'tile-size': 0})
+    assert os.path.isfile("points.csv") and os.path.isfile("points.npy")